@@ -0,0 +1,285 @@
+import asyncio
+from typing import List, Optional, Any, Callable
+
+import aiohttp
+from requests import RequestException
+
+from api.champ_select import ChampSelectSnapshot, ChampSelectTransition
+from api.client import LobbyNotReady, LCU_RETRY_RULES, LCU_TRANSPORT
+from api.client_base import ClientBase, PHASE_FROM_EVENTS, PHASE_POLL
+from api.models import ChampSelectSession, ChampSelectAction
+from common import clock
+from common.async_request_api import AsyncRequestAPI, AsyncResponse, EventLoopThread
+from common.capture import CaptureRecorder
+from common.constants import LobbyTypes, Positions, ChampionIds, SummonerSpells
+from common.retry_policy import RetryPolicy
+
+
+class AsyncClientAPI(ClientBase, AsyncRequestAPI):
+    """Client LCU API on asyncio, mirrors ClientAPI"""
+
+    def __init__(self, protocol: str, domain: str, port: str, password: str,
+                 session: Optional[aiohttp.ClientSession] = None, recorder: Optional[CaptureRecorder] = None):
+        AsyncRequestAPI.__init__(self, protocol=protocol, domain=domain, port=port, session=session, name="lcu",
+                                 retry_policy=RetryPolicy(rules=LCU_RETRY_RULES), transport=LCU_TRANSPORT,
+                                 recorder=recorder)
+        ClientBase.__init__(self, domain=domain, port=port, password=password)
+
+    async def connect(self, timeout: int = 60, delay: int = 5) -> None:
+        """
+        Attempts to connect to Client. Logs out after close
+        :param timeout: time to wait for connection to succeed
+        :param delay: delay between retries
+        """
+        self.logger.info("Connecting to Client")
+        deadline = clock.monotonic() + timeout
+        while clock.monotonic() < deadline:
+            if (await self.get_with_retries("/lol-login/v1/session")).json()["state"] == "SUCCEEDED":
+                break
+            await clock.async_sleep(delay)
+        self.logger.info("Connection to Client Successful")
+        await self.post("/lol-login/v1/delete-rso-on-close")  # ensures self.logout after close
+
+    async def subscribe_events(self, timeout: float = 5) -> bool:
+        """
+        Subscribe to phase and champion select changes over the client WebSocket
+        :param timeout: time to wait for connection
+        :return: True if subscribed, False if get_phase will keep polling
+        """
+        if not await asyncio.get_running_loop().run_in_executor(None, self._new_listener().start, timeout):
+            self.logger.info("Client events unavailable. Falling back to polling")
+            return False
+        self.events.seed_phase((await self.get_with_retries("/lol-gameflow/v1/gameflow-phase")).json())
+        return True
+
+    async def get_phase(self, timeout: float = 3) -> str:
+        """
+        Get the League Client phase. Returns as soon as a phase or champion select change arrives
+        if subscribed to client events, requests it after a fixed delay otherwise
+        :param timeout: maximum time to wait for a change
+        """
+        source = self._phase_source()
+        if source == PHASE_FROM_EVENTS:
+            self._events_version = await asyncio.get_running_loop().run_in_executor(
+                None, self.events.wait_for_change, self._events_version, timeout)
+            return self._phase_read(self.events.phase, source)
+        if source == PHASE_POLL:
+            await clock.async_sleep(timeout)  # To avoid spam and give time to update phase
+        return self._phase_read((await self.get_with_retries("/lol-gameflow/v1/gameflow-phase")).json(), source)
+
+    async def create_lobby(self, lobby_type: LobbyTypes) -> AsyncResponse:
+        """
+        Creates a lobby for given lobby ID
+        :param lobby_type: Lobby type to create
+        """
+        self.logger.info(f"Creating lobby {lobby_type.name}")
+        data = {'queueId': lobby_type.value}
+        return await self.post("/lol-lobby/v2/lobby", data=data)
+
+    async def select_positions(self, primary: Positions, secondary: Positions) -> None:
+        """
+        Selects preferred positions
+        :param primary: primary position
+        :param secondary: secondary position
+        """
+        self.logger.info("Selecting Positions")
+        await self.put(url="/lol-lobby/v2/lobby/members/localMember/position-preferences",
+                       data={"firstPreference": primary.value, "secondPreference": secondary.value})
+
+    async def lobby_can_start(self) -> bool:
+        """"
+        Check whether lobby can start
+        :return: True if yes, False otherwise
+        """
+        return (await self.get_with_retries("/lol-lobby/v2/lobby")).json()["canStartActivity"]
+
+    async def wait_dodge_timer(self) -> None:
+        """"Checks whether there is a dodge penalty and waits it out"""
+        response = await self.get_with_retries("/lol-lobby/v2/lobby/matchmaking/search-state")
+        dodge_timer = self._dodge_seconds(response.json())
+        if dodge_timer:
+            await clock.async_sleep(dodge_timer)
+
+    async def start_queue(self) -> None:
+        """Starts queue"""
+        self.logger.info("Starting queue")
+        _, can_start = await asyncio.gather(self.wait_dodge_timer(), self.lobby_can_start())
+        if not can_start:
+            raise LobbyNotReady()
+        await self.post("/lol-lobby/v2/lobby/matchmaking/search")
+
+    async def accept_match(self) -> None:
+        """Accepts the Ready Check"""
+        self.logger.info("Accepting match")
+        await self.post("/lol-matchmaking/v1/ready-check/accept")
+
+    async def get_champ_select_info(self) -> ChampSelectSession:
+        """"Get all information about current champion select"""
+        return ChampSelectSession.from_json((await self.get_with_retries("/lol-champ-select/v1/session")).json())
+
+    async def get_pickable_champ_ids(self) -> List[int]:
+        """"Get ids of champions available to pick"""
+        return (await self.get_with_retries("/lol-champ-select/v1/pickable-champion-ids")).json()
+
+    async def get_bannable_champ_ids(self) -> List[int]:
+        """"Get ids of champions available to ban"""
+        return (await self.get_with_retries("/lol-champ-select/v1/bannable-champion-ids")).json()
+
+    async def get_champ_select_snapshot(self) -> ChampSelectSnapshot:
+        """
+        Fetch session, pickable and bannable champion ids concurrently in one round trip
+        :return: ChampSelectSnapshot object
+        """
+        session, pickable, bannable = await asyncio.gather(
+            self.get_champ_select_info(), self.get_pickable_champ_ids(), self.get_bannable_champ_ids())
+        return self._champ_select_snapshot(session, pickable, bannable)
+
+    async def update_champ_select(self) -> List[ChampSelectTransition]:
+        """
+        Fetch a champion select snapshot and diff it against the previous one
+        :return: transitions the bot has to act on, turns till locked in, others once per champion select
+        """
+        return self.champ_select.update(await self.get_champ_select_snapshot())
+
+    async def is_champ_pickable(self, champ: ChampionIds) -> bool:
+        """"
+        Validate if champion is available to pick
+        :param champ: Champion to check if available to pick
+        :return: True if pickable, False otherwise
+        """
+        return champ.value in await self.get_pickable_champ_ids()
+
+    async def is_champ_bannable(self, champ: ChampionIds) -> bool:
+        """"
+        Validate if champion is available to pick
+        :param champ: Champion to check if available to ban
+        :return: True if bannable, False otherwise
+        """
+        return champ.value in await self.get_bannable_champ_ids()
+
+    async def confirm_champion(self, phase_id: int) -> AsyncResponse:
+        """"
+        Completes champion action(pick, ban) on already selected champion
+        :param phase_id: id of the current champion select phase
+        """
+        return await self.post(f"/lol-champ-select/v1/session/actions/{phase_id}/complete")
+
+    async def _lock_in(self, action: ChampSelectAction, champ_id: int, snapshot: ChampSelectSnapshot) -> bool:
+        """
+        Select and complete a champion for a ban or pick action
+        :param action: local player's action in progress
+        :param champ_id: champion to select
+        :param snapshot: snapshot the action was taken from
+        :return: True if locked in, False if a write failed and the turn is emitted again next tick
+        """
+        try:
+            locked_in = ((await self.patch(url=f"/lol-champ-select/v1/session/actions/{action.id}",
+                                           data={"championId": champ_id})).ok
+                         and (await self.confirm_champion(phase_id=action.id)).ok)
+        except RequestException as err:
+            self.logger.warning(f"Locking in {action.type} failed. Error {err}")
+            return False
+        return self._lock_in_done(action, snapshot, locked_in)
+
+    async def select_summoner_spells(self, spell1: SummonerSpells, spell2: SummonerSpells) -> None:
+        """
+        Selects summoner spells
+        :param spell1: left summoner spell
+        :param spell2: right summoner spell
+        """
+        self.logger.info(f"Summoner spells {spell1.name}, {spell2.name}")
+        data = {
+            "spell1Id": spell1.value,
+            "spell2Id": spell2.value,
+        }
+        await self.patch(url="/lol-champ-select/v1/session/my-selection", data=data)
+        await self.post(url="/lol-champ-select/v1/session/my-selection/reroll")
+
+    async def ban_champion(self, champs: Optional[List[ChampionIds]] = None,
+                           snapshot: Optional[ChampSelectSnapshot] = None) -> bool:
+        """
+        Select champions to ban by given ids
+        :param champs: champions to ban in order of priority
+        :param snapshot: champion select snapshot of current tick, fetched if None
+        :return: True if champion banned, False otherwise
+        """
+        snapshot = snapshot or await self.get_champ_select_snapshot()
+        champ_id, action = self._champion_to_lock("ban", champs, snapshot)
+        if not champ_id:
+            return True  # If champion not bannable will ignore ban phase
+        if not action:  # Will ban only if player's turn
+            return False
+        self.logger.info(f"Banning {ChampionIds(champ_id).name}")
+        return await self._lock_in(action, champ_id, snapshot)
+
+    async def pick_champion(self, champs: List[ChampionIds], snapshot: Optional[ChampSelectSnapshot] = None) -> None:
+        """
+        Select champions to pick by given ids. Will dodge if champions unavailable
+        :param champs: champions to pick in order of priority
+        :param snapshot: champion select snapshot of current tick, fetched if None
+        """
+        snapshot = snapshot or await self.get_champ_select_snapshot()
+        champ_id, action = self._champion_to_lock("pick", champs, snapshot)
+        if not champ_id:
+            self.logger.info("Dodging Champion select. Desired champion unavailable")
+            return
+        if action:  # Will pick only if player's turn
+            self.logger.info(f"Picking {ChampionIds(champ_id).name}")
+            await self._lock_in(action, champ_id, snapshot)
+
+    async def decline_trade(self, trade_id: int) -> None:
+        """
+        Decline a champion trade offered by another player
+        :param trade_id: id of the trade
+        """
+        self.logger.info("Declining champion trade")
+        await self.post(f"/lol-champ-select/v1/session/trades/{trade_id}/decline")
+
+    async def get_game_result(self) -> Optional[str]:
+        """
+        Get the result of the last game from the end of game stats
+        :return: Win or Lose, None if no stats are available
+        """
+        response = await self.get("/lol-end-of-game/v1/eog-stats-block")
+        return self._game_result(response.json()) if response.ok else None
+
+    async def skip_end_of_game(self) -> None:
+        """Skip end of game screen"""
+        await self.post(url="/lol-end-of-game/v1/state/dismiss-stats")
+
+    async def reconnect(self) -> None:
+        """Reconnect to game if disconnected"""
+        await self.post_with_retries(url="/lol-gameflow/v1/reconnect")
+
+
+class SyncClientAPI:
+    """Blocking facade over AsyncClientAPI so the bots can use it like ClientAPI"""
+
+    def __init__(self, protocol: str, domain: str, port: str, password: str,
+                 loop_thread: Optional[EventLoopThread] = None, recorder: Optional[CaptureRecorder] = None):
+        """
+        :param loop_thread: event loop to run requests on, shared with other facades to share the loop
+        :param recorder: records every request and response if set
+        """
+        self.loop_thread = loop_thread or EventLoopThread()
+        self.client = AsyncClientAPI(protocol=protocol, domain=domain, port=port, password=password, recorder=recorder)
+
+    @property
+    def on_phase(self) -> Optional[Callable[[str], None]]:
+        return self.client.on_phase
+
+    @on_phase.setter
+    def on_phase(self, callback: Optional[Callable[[str], None]]) -> None:
+        self.client.on_phase = callback
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.client, name)
+        if asyncio.iscoroutinefunction(attribute):
+            return self._blocking(attribute)
+        return attribute
+
+    def _blocking(self, coroutine_function: Callable) -> Callable:
+        def run(*args, **kwargs):
+            return self.loop_thread.run(coroutine_function(*args, **kwargs))
+
+        return run
@@ -0,0 +1,139 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, List, Set
+
+from api.models import ChampSelectSession, ChampSelectAction, ChampSelectTrade
+from common import clock
+from common.constants import ChampSelectPhases, ChampSelectTransitions
+
+# Trade state of a trade another player offered to the local player
+TRADE_RECEIVED = "RECEIVED"
+
+
+@dataclass(frozen=True)
+class ChampSelectSnapshot:
+    """Champion select state of one tick: session plus pickable and bannable champion ids"""
+    session: ChampSelectSession
+    pickable: FrozenSet[int]
+    bannable: FrozenSet[int]
+    taken_at: float = field(default_factory=clock.monotonic)
+    pending_actions: Dict[str, ChampSelectAction] = field(init=False)
+
+    def __post_init__(self):
+        # Local player's not completed action per type, found once per tick
+        pending = {}
+        cell_id = self.session.local_player_cell_id
+        for turn in self.session.actions:
+            for action in turn:
+                if action.actor_cell_id == cell_id and not action.completed:
+                    if action.type not in pending or action.is_in_progress:
+                        pending[action.type] = action
+        object.__setattr__(self, "pending_actions", pending)
+
+    @property
+    def phase(self) -> Optional[str]:
+        """Champion select timer phase"""
+        return self.session.phase
+
+    def pending_action(self, action_type: str) -> Optional[ChampSelectAction]:
+        """
+        Get local player's not completed action
+        :param action_type: pick or ban
+        :return: action if any, None otherwise
+        """
+        return self.pending_actions.get(action_type)
+
+
+class LockInTimer:
+    """Measures time from local player's turn starting to the action being locked in"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.lock_in_times: List[float] = []
+        self._turn_started: Dict[int, float] = {}
+
+    def observe(self, snapshot: ChampSelectSnapshot) -> None:
+        """
+        Remember when local player's actions were first seen in progress
+        :param snapshot: current champion select snapshot
+        """
+        for action in snapshot.pending_actions.values():
+            if action.is_in_progress:
+                self._turn_started.setdefault(action.id, snapshot.taken_at)
+
+    def locked_in(self, action: ChampSelectAction, snapshot: ChampSelectSnapshot) -> float:
+        """
+        Record an action as locked in
+        :param action: completed action
+        :param snapshot: snapshot the action was taken from
+        :return: seconds from turn start to lock in
+        """
+        elapsed = clock.monotonic() - self._turn_started.pop(action.id, snapshot.taken_at)
+        self.lock_in_times.append(elapsed)
+        self.logger.info(f"Locked in {action.type} {elapsed * 1000:.0f} ms after turn started")
+        return elapsed
+
+
+@dataclass(frozen=True)
+class ChampSelectTransition:
+    """Champion select change the bot has to act on"""
+    event: ChampSelectTransitions
+    snapshot: ChampSelectSnapshot
+    action: Optional[ChampSelectAction] = None  # started turn of ban and pick transitions
+    trade: Optional[ChampSelectTrade] = None  # offered trade of trade transitions
+
+
+class ChampSelectStateMachine:
+    """
+    Diffs each champion select snapshot against the previous one. Turns are emitted every tick till the client locked
+    them in, every other transition exactly once
+    """
+
+    _TURN_EVENTS = (("ban", ChampSelectTransitions.BAN_TURN_STARTED),
+                    ("pick", ChampSelectTransitions.PICK_TURN_STARTED))
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.last: Optional[ChampSelectSnapshot] = None
+        self._locked_actions: Set[int] = set()
+        self._offered_trades: Set[int] = set()
+
+    def reset(self) -> None:
+        """Forget the previous session, e.g. when a new champion select starts"""
+        self.last = None
+        self._locked_actions.clear()
+        self._offered_trades.clear()
+
+    def locked_in(self, action: ChampSelectAction) -> None:
+        """
+        Stop emitting the turn of an action once its champion was selected and completed
+        :param action: locked in action
+        """
+        self._locked_actions.add(action.id)
+
+    def update(self, snapshot: ChampSelectSnapshot) -> List[ChampSelectTransition]:
+        """
+        Compare a snapshot with the previous one
+        :param snapshot: current champion select snapshot
+        :return: transitions since the previous snapshot, turns first and finalization last
+        """
+        transitions = []
+        # A turn is emitted again while nothing is pickable yet or a write failed. Ids of locked in actions are
+        # remembered, a session polled before the client completed the action does not emit it again
+        for action_type, event in self._TURN_EVENTS:
+            action = snapshot.pending_action(action_type)
+            if action and action.is_in_progress and action.id not in self._locked_actions:
+                transitions.append(ChampSelectTransition(event=event, snapshot=snapshot, action=action))
+        for trade in snapshot.session.trades:
+            if trade.state == TRADE_RECEIVED and trade.id not in self._offered_trades:
+                self._offered_trades.add(trade.id)
+                transitions.append(ChampSelectTransition(event=ChampSelectTransitions.TRADE_OFFERED,
+                                                         snapshot=snapshot, trade=trade))
+        finalization = ChampSelectPhases.FINALIZATION.value
+        if snapshot.phase == finalization and (self.last is None or self.last.phase != finalization):
+            transitions.append(ChampSelectTransition(event=ChampSelectTransitions.FINALIZATION_ENTERED,
+                                                     snapshot=snapshot))
+        for transition in transitions:
+            self.logger.debug(f"Champion select transition {transition.event.value}")
+        self.last = snapshot
+        return transitions
@@ -1,30 +1,45 @@
-from base64 import b64encode
-from time import sleep
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-from requests import Response
+from requests import Response, RequestException
 
+from api.champ_select import ChampSelectSnapshot, ChampSelectTransition
+from api.client_base import ClientBase, PHASE_FROM_EVENTS, PHASE_POLL
+from api.models import ChampSelectSession, ChampSelectAction
+from common import clock
+from common.capture import CaptureRecorder
+from common.json_backend import decode
 from common.request_api import RequestAPI
 from common.constants import LobbyTypes, Positions, ChampionIds, SummonerSpells
+from common.retry_policy import RetryPolicy, RetryRule, TRANSIENT_STATUSES
+from common.transport import TransportConfig
 from common.utils import wait_for_condition
 
+# Endpoints that answer 404 while the client is still loading them are retried, others fail on 4xx at once
+LCU_RETRY_RULES = {
+    "/lol-login/v1/session": RetryRule(retry_statuses=TRANSIENT_STATUSES | {404}, retries=10, deadline=60),
+    "/lol-champ-select/v1/*": RetryRule(retry_statuses=TRANSIENT_STATUSES | {404}, max_delay=2, deadline=10),
+    "/lol-gameflow/v1/reconnect": RetryRule(retries=3, max_delay=4, deadline=10),
+}
+
+# Champion select is polled every tick and has to stay fast, everything else gets the default timeout
+LCU_TRANSPORT = TransportConfig(timeouts={"/lol-champ-select/v1/*": (1.0, 3.0)})
+
 
 class LobbyNotReady(Exception):
     def __init__(self, message="Unexpected lobby state. Can't start"):
         super().__init__(message)
 
 
-class ClientAPI(RequestAPI):
+class ClientAPI(ClientBase, RequestAPI):
     """Client LCU API"""
 
-    def __init__(self, protocol: str, domain: str, port: str, password: str):
-        super().__init__(protocol=protocol, domain=domain, port=port)
-        self.username = "riot"
-        self.password = password
-        self.headers = {
-            "Authorization":
-                f"Basic {b64encode(bytes(f'{self.username}:{self.password}', 'utf-8')).decode('ascii')}"
-        }
+    def __init__(self, protocol: str, domain: str, port: str, password: str,
+                 recorder: Optional[CaptureRecorder] = None):
+        RequestAPI.__init__(self, protocol=protocol, domain=domain, port=port, recorder=recorder, name="lcu",
+                            retry_policy=RetryPolicy(rules=LCU_RETRY_RULES), transport=LCU_TRANSPORT)
+        ClientBase.__init__(self, domain=domain, port=port, password=password)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="client")
 
     def connect(self, timeout: int = 60, delay: int = 5) -> None:
         """
@@ -34,19 +49,38 @@ class ClientAPI(RequestAPI):
         """
         self.logger.info("Connecting to Client")
         wait_for_condition(
-            condition_callback=lambda: self.get_with_retries("/lol-login/v1/session").json()["state"] == "SUCCEEDED",
+            condition_callback=lambda: decode(self.get_with_retries("/lol-login/v1/session"))["state"] == "SUCCEEDED",
             timeout=timeout,
             delay=delay
         )
         self.logger.info("Connection to Client Successful")
         self.post("/lol-login/v1/delete-rso-on-close")  # ensures self.logout after close
 
-    def get_phase(self) -> str:
-        """Requests the League Client phase"""
-        sleep(3)  # To avoid spam and give time to update phase
-        phase = self.get_with_retries("/lol-gameflow/v1/gameflow-phase")
-        self.logger.info(f"Current phase: {phase.json()}")
-        return phase.json()
+    def subscribe_events(self, timeout: float = 5) -> bool:
+        """
+        Subscribe to phase and champion select changes over the client WebSocket
+        :param timeout: time to wait for connection
+        :return: True if subscribed, False if get_phase will keep polling
+        """
+        if not self._new_listener().start(timeout=timeout):
+            self.logger.info("Client events unavailable. Falling back to polling")
+            return False
+        self.events.seed_phase(decode(self.get_with_retries("/lol-gameflow/v1/gameflow-phase")))
+        return True
+
+    def get_phase(self, timeout: float = 3) -> str:
+        """
+        Get the League Client phase. Returns as soon as a phase or champion select change arrives
+        if subscribed to client events, requests it after a fixed delay otherwise
+        :param timeout: maximum time to wait for a change
+        """
+        source = self._phase_source()
+        if source == PHASE_FROM_EVENTS:
+            self._events_version = self.events.wait_for_change(self._events_version, timeout=timeout)
+            return self._phase_read(self.events.phase, source)
+        if source == PHASE_POLL:
+            clock.sleep(timeout)  # To avoid spam and give time to update phase
+        return self._phase_read(decode(self.get_with_retries("/lol-gameflow/v1/gameflow-phase")), source)
 
     def create_lobby(self, lobby_type: LobbyTypes) -> Response:
         """
@@ -72,15 +106,14 @@ class ClientAPI(RequestAPI):
         Check whether lobby can start
         :return: True if yes, False otherwise
         """
-        return self.get_with_retries("/lol-lobby/v2/lobby").json()["canStartActivity"]
+        return decode(self.get_with_retries("/lol-lobby/v2/lobby"))["canStartActivity"]
 
     def wait_dodge_timer(self) -> None:
         """"Checks whether there is a dodge penalty and waits it out"""
         response = self.get_with_retries("/lol-lobby/v2/lobby/matchmaking/search-state")
-        if response.json()["errors"]:
-            dodge_timer = int(response.json()["errors"][0]["penaltyTimeRemaining"])
-            self.logger.info(f"Dodge Timer. Time Remaining: {dodge_timer}")
-            sleep(dodge_timer)
+        dodge_timer = self._dodge_seconds(decode(response))
+        if dodge_timer:
+            clock.sleep(dodge_timer)
 
     def start_queue(self) -> None:
         """Starts queue"""
@@ -95,9 +128,34 @@ class ClientAPI(RequestAPI):
         self.logger.info("Accepting match")
         self.post("/lol-matchmaking/v1/ready-check/accept")
 
-    def get_champ_select_info(self) -> Dict:
+    def get_champ_select_info(self) -> ChampSelectSession:
         """"Get all information about current champion select"""
-        return self.get_with_retries("/lol-champ-select/v1/session").json()
+        return ChampSelectSession.from_json(decode(self.get_with_retries("/lol-champ-select/v1/session")))
+
+    def get_pickable_champ_ids(self) -> List[int]:
+        """"Get ids of champions available to pick"""
+        return decode(self.get_with_retries("/lol-champ-select/v1/pickable-champion-ids"))
+
+    def get_bannable_champ_ids(self) -> List[int]:
+        """"Get ids of champions available to ban"""
+        return decode(self.get_with_retries("/lol-champ-select/v1/bannable-champion-ids"))
+
+    def get_champ_select_snapshot(self) -> ChampSelectSnapshot:
+        """
+        Fetch session, pickable and bannable champion ids concurrently in one round trip
+        :return: ChampSelectSnapshot object
+        """
+        session = self._executor.submit(self.get_champ_select_info)
+        pickable = self._executor.submit(self.get_pickable_champ_ids)
+        bannable = self.get_bannable_champ_ids()
+        return self._champ_select_snapshot(session.result(), pickable.result(), bannable)
+
+    def update_champ_select(self) -> List[ChampSelectTransition]:
+        """
+        Fetch a champion select snapshot and diff it against the previous one
+        :return: transitions the bot has to act on, turns till locked in, others once per champion select
+        """
+        return self.champ_select.update(self.get_champ_select_snapshot())
 
     def is_champ_pickable(self, champ: ChampionIds) -> bool:
         """"
@@ -105,7 +163,7 @@ class ClientAPI(RequestAPI):
         :param champ: Champion to check if available to pick
         :return: True if pickable, False otherwise
         """
-        return champ.value in self.get_with_retries("/lol-champ-select/v1/pickable-champion-ids").json()
+        return champ.value in decode(self.get_with_retries("/lol-champ-select/v1/pickable-champion-ids"))
 
     def is_champ_bannable(self, champ: ChampionIds) -> bool:
         """"
@@ -113,14 +171,31 @@ class ClientAPI(RequestAPI):
         :param champ: Champion to check if available to ban
         :return: True if bannable, False otherwise
         """
-        return champ.value in self.get_with_retries("/lol-champ-select/v1/bannable-champion-ids").json()
+        return champ.value in decode(self.get_with_retries("/lol-champ-select/v1/bannable-champion-ids"))
 
-    def confirm_champion(self, phase_id: int) -> None:
+    def confirm_champion(self, phase_id: int) -> Response:
         """"
         Completes champion action(pick, ban) on already selected champion
         :param phase_id: id of the current champion select phase
         """
-        self.post(f"/lol-champ-select/v1/session/actions/{phase_id}/complete")
+        return self.post(f"/lol-champ-select/v1/session/actions/{phase_id}/complete")
+
+    def _lock_in(self, action: ChampSelectAction, champ_id: int, snapshot: ChampSelectSnapshot) -> bool:
+        """
+        Select and complete a champion for a ban or pick action
+        :param action: local player's action in progress
+        :param champ_id: champion to select
+        :param snapshot: snapshot the action was taken from
+        :return: True if locked in, False if a write failed and the turn is emitted again next tick
+        """
+        try:
+            locked_in = (self.patch(url=f"/lol-champ-select/v1/session/actions/{action.id}",
+                                    data={"championId": champ_id}).ok
+                         and self.confirm_champion(phase_id=action.id).ok)
+        except RequestException as err:
+            self.logger.warning(f"Locking in {action.type} failed. Error {err}")
+            return False
+        return self._lock_in_done(action, snapshot, locked_in)
 
     def select_summoner_spells(self, spell1: SummonerSpells, spell2: SummonerSpells) -> None:
         """
@@ -136,45 +211,53 @@ class ClientAPI(RequestAPI):
         self.patch(url="/lol-champ-select/v1/session/my-selection", data=data)
         self.post(url="/lol-champ-select/v1/session/my-selection/reroll")
 
-    def ban_champion(self, champs: Optional[List[ChampionIds]] = None) -> bool:
+    def ban_champion(self, champs: Optional[List[ChampionIds]] = None,
+                     snapshot: Optional[ChampSelectSnapshot] = None) -> bool:
         """
         Select champions to ban by given ids
         :param champs: champions to ban in order of priority
+        :param snapshot: champion select snapshot of current tick, fetched if None
         :return: True if champion banned, False otherwise
         """
-        champ_id = next((champ.value for champ in champs if self.is_champ_bannable(champ=champ)), None)
+        snapshot = snapshot or self.get_champ_select_snapshot()
+        champ_id, action = self._champion_to_lock("ban", champs, snapshot)
         if not champ_id:
             return True  # If champion not bannable will ignore ban phase
-        champ_select = self.get_champ_select_info()
-        data = {"championId": champ_id}
-        for action in champ_select["actions"]:
-            for action_cell in action:
-                if action_cell["actorCellId"] == champ_select['localPlayerCellId'] and not action_cell["completed"] \
-                        and action_cell["type"] == "ban":  # Will ban only if player's turn
-                    self.logger.info(f"Banning {ChampionIds(champ_id).name}")
-                    self.patch(url=f"/lol-champ-select/v1/session/actions/{action_cell["id"]}", data=data)
-                    self.confirm_champion(phase_id=action_cell["id"])
-                    return True
-        return False
-
-    def pick_champion(self, champs: List[ChampionIds]) -> None:
+        if not action:  # Will ban only if player's turn
+            return False
+        self.logger.info(f"Banning {ChampionIds(champ_id).name}")
+        return self._lock_in(action, champ_id, snapshot)
+
+    def pick_champion(self, champs: List[ChampionIds], snapshot: Optional[ChampSelectSnapshot] = None) -> None:
         """
         Select champions to pick by given ids. Will dodge if champions unavailable
         :param champs: champions to pick in order of priority
+        :param snapshot: champion select snapshot of current tick, fetched if None
         """
-        champ_id = next((champ.value for champ in champs if self.is_champ_pickable(champ=champ)), None)
+        snapshot = snapshot or self.get_champ_select_snapshot()
+        champ_id, action = self._champion_to_lock("pick", champs, snapshot)
         if not champ_id:
             self.logger.info("Dodging Champion select. Desired champion unavailable")
             return
-        champ_select = self.get_champ_select_info()
-        data = {"championId": champ_id}
-        for action in champ_select["actions"]:
-            for action_cell in action:
-                if action_cell["actorCellId"] == champ_select['localPlayerCellId'] and not action_cell["completed"] \
-                        and action_cell["type"] == "pick":  # Will pick only if player's turn
-                    self.logger.info(f"Picking {ChampionIds(champ_id).name}")
-                    self.patch(url=f"/lol-champ-select/v1/session/actions/{action_cell["id"]}", data=data)
-                    self.confirm_champion(phase_id=action_cell["id"])
+        if action:  # Will pick only if player's turn
+            self.logger.info(f"Picking {ChampionIds(champ_id).name}")
+            self._lock_in(action, champ_id, snapshot)
+
+    def decline_trade(self, trade_id: int) -> None:
+        """
+        Decline a champion trade offered by another player
+        :param trade_id: id of the trade
+        """
+        self.logger.info("Declining champion trade")
+        self.post(f"/lol-champ-select/v1/session/trades/{trade_id}/decline")
+
+    def get_game_result(self) -> Optional[str]:
+        """
+        Get the result of the last game from the end of game stats
+        :return: Win or Lose, None if no stats are available
+        """
+        response = self.get("/lol-end-of-game/v1/eog-stats-block")
+        return self._game_result(decode(response)) if response.ok else None
 
     def skip_end_of_game(self) -> None:
         """Skip end of game screen"""
@@ -0,0 +1,155 @@
+from base64 import b64encode
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from api.champ_select import ChampSelectSnapshot, LockInTimer, ChampSelectStateMachine
+from api.client_events import ClientEventListener
+from api.credentials import ClientCredentials
+from api.models import ChampSelectSession, ChampSelectAction
+from common.constants import ChampionIds
+
+# Where get_phase takes the phase from
+PHASE_FROM_EVENTS = "events"  # wait for the next subscribed event
+PHASE_SEED = "seed"  # subscribed but no phase known since (re)connecting, request it once
+PHASE_POLL = "poll"  # not subscribed, request it after a delay
+
+
+class ClientBase:
+    """
+    Request independent part of ClientAPI and AsyncClientAPI: credentials, event subscription, champion select
+    bookkeeping and reading LCU answers. Mixed into a RequestAPI or AsyncRequestAPI, which provides set_connection
+    """
+
+    def __init__(self, domain: str, port: str, password: str):
+        """
+        :param domain: client host
+        :param port: client port from lockfile
+        :param password: client password from lockfile
+        """
+        self.domain = domain
+        self.port = port
+        self.username = "riot"
+        self.password = password
+        self.headers = self._auth_headers(password)
+        self.events: Optional[ClientEventListener] = None
+        self._events_version = 0
+        self.lock_in_timer = LockInTimer()
+        self.champ_select = ChampSelectStateMachine()
+        self.on_phase: Optional[Callable[[str], None]] = None  # called with every phase get_phase returns
+
+    def _auth_headers(self, password: str) -> Dict[str, str]:
+        return {
+            "Authorization":
+                f"Basic {b64encode(bytes(f'{self.username}:{password}', 'utf-8')).decode('ascii')}"
+        }
+
+    def update_credentials(self, credentials: ClientCredentials) -> None:
+        """
+        Swap port and password of the live session after the client restarted
+        :param credentials: new client credentials
+        """
+        self.port = credentials.port
+        self.password = credentials.password
+        self.set_connection(f"{credentials.protocol}://{self.domain}:{credentials.port}",
+                            self._auth_headers(credentials.password))
+        if self.events:
+            # Called from the credential watcher thread, connects in the background. get_phase polls till
+            # connected and then requests the phase once to seed it
+            self.events.stop()
+            self._new_listener()
+            self.events.start(timeout=0)
+
+    def _new_listener(self) -> ClientEventListener:
+        """
+        Replace the event listener with one on current credentials, not started yet
+        :return: ClientEventListener object
+        """
+        self.events = ClientEventListener(port=self.port, password=self.password, domain=self.domain,
+                                          protocol="wss" if self.base_url.startswith("https") else "ws")
+        self._events_version = -1  # versions of a new listener start over, next get_phase returns at once
+        return self.events
+
+    def _phase_source(self) -> str:
+        """
+        Where get_phase takes the phase from
+        :return: PHASE_FROM_EVENTS, PHASE_SEED or PHASE_POLL
+        """
+        if self.events and self.events.connected.is_set():
+            # Reconnected, events only carry changes, so the phase missed while disconnected is requested once
+            return PHASE_FROM_EVENTS if self.events.phase is not None else PHASE_SEED
+        return PHASE_POLL
+
+    def _phase_read(self, phase: str, source: str) -> str:
+        """
+        Handle a phase get_phase read
+        :param phase: client phase
+        :param source: where it came from, a requested phase seeds the event listener
+        :return: phase
+        """
+        if source == PHASE_SEED:
+            self.events.seed_phase(phase)
+        self.logger.info(f"Current phase: {phase}")
+        if self.on_phase:
+            self.on_phase(phase)
+        return phase
+
+    def _dodge_seconds(self, search_state: Dict[str, Any]) -> int:
+        """
+        :param search_state: matchmaking search state
+        :return: seconds of dodge penalty left, 0 if none
+        """
+        errors = search_state["errors"]
+        if not errors:
+            return 0
+        dodge_timer = int(errors[0]["penaltyTimeRemaining"])
+        self.logger.info(f"Dodge Timer. Time Remaining: {dodge_timer}")
+        return dodge_timer
+
+    def _champ_select_snapshot(self, session: ChampSelectSession, pickable: Iterable[int],
+                               bannable: Iterable[int]) -> ChampSelectSnapshot:
+        """
+        Build the snapshot of one tick and time the turns in it
+        :return: ChampSelectSnapshot object
+        """
+        snapshot = ChampSelectSnapshot(session=session, pickable=frozenset(pickable), bannable=frozenset(bannable))
+        self.lock_in_timer.observe(snapshot)
+        return snapshot
+
+    @staticmethod
+    def _champion_to_lock(action_type: str, champs: List[ChampionIds],
+                          snapshot: ChampSelectSnapshot) -> Tuple[Optional[int], Optional[ChampSelectAction]]:
+        """
+        Find the first available champion and the local player's action to lock it in with
+        :param action_type: pick or ban
+        :param champs: champions in order of priority
+        :param snapshot: champion select snapshot of current tick
+        :return: champion id, None if none is available, and action, None if it is not the player's turn
+        """
+        available = snapshot.bannable if action_type == "ban" else snapshot.pickable
+        champ_id = next((champ.value for champ in champs if champ.value in available), None)
+        return champ_id, snapshot.pending_action(action_type) if champ_id else None
+
+    def _lock_in_done(self, action: ChampSelectAction, snapshot: ChampSelectSnapshot, locked_in: bool) -> bool:
+        """
+        Record the outcome of selecting and completing a champion
+        :param action: local player's action in progress
+        :param snapshot: snapshot the action was taken from
+        :param locked_in: whether both writes succeeded
+        :return: locked_in, a turn not locked in is emitted again next tick
+        """
+        if not locked_in:
+            self.logger.warning(f"Locking in {action.type} failed. Retrying next tick")
+            return False
+        self.champ_select.locked_in(action)
+        self.lock_in_timer.locked_in(action, snapshot)
+        return True
+
+    @staticmethod
+    def _game_result(eog_stats: Dict[str, Any]) -> Optional[str]:
+        """
+        :param eog_stats: end of game stats block
+        :return: Win or Lose, None if the player's team is missing
+        """
+        team = next((team for team in eog_stats.get("teams", []) if team.get("isPlayerTeam")), None)
+        if team is None:
+            return None
+        return "Win" if team.get("isWinningTeam") else "Lose"
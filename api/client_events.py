@@ -0,0 +1,175 @@
+import json
+import logging
+import queue
+import ssl
+import threading
+from base64 import b64encode
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from common.constants import ClientEvents
+
+if TYPE_CHECKING:
+    import websocket
+
+EventCallback = Callable[[Any], None]
+
+
+class ClientEventListener:
+    """Subscribes to League Client events over the LCU WAMP WebSocket"""
+
+    WAMP_SUBSCRIBE = 5
+    WAMP_EVENT = 8
+
+    def __init__(self, port: str, password: str, domain: str = "127.0.0.1", protocol: str = "wss",
+                 events: Tuple[ClientEvents, ...] = (ClientEvents.GAMEFLOW_PHASE, ClientEvents.CHAMP_SELECT_SESSION),
+                 reconnect_delay: float = 5.0):
+        """
+        :param port: client port from lockfile
+        :param password: client password from lockfile
+        :param domain: client host
+        :param protocol: wss for the League Client, ws for a local stand-in server
+        :param events: events to subscribe to
+        :param reconnect_delay: time to wait before reconnecting a closed WebSocket
+        """
+        self.logger = logging.getLogger(__name__)
+        self.url = f"{protocol}://{domain}:{port}/"
+        self.events = events
+        self.reconnect_delay = reconnect_delay
+        self.connected = threading.Event()
+        self.phase: Optional[str] = None
+        self.session: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self._header = [f"Authorization: Basic {b64encode(bytes(f'riot:{password}', 'utf-8')).decode('ascii')}"]
+        self._condition = threading.Condition()
+        self._callbacks: Dict[ClientEvents, List[EventCallback]] = defaultdict(list)
+        self._queue: "queue.Queue[Tuple[ClientEvents, Any]]" = queue.Queue(maxsize=256)
+        self._app: Optional["websocket.WebSocketApp"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def on(self, event: ClientEvents, callback: EventCallback) -> None:
+        """
+        Register a callback for an event, called from the listener thread
+        :param event: event to listen to
+        :param callback: called with event data, None if resource got deleted
+        """
+        self._callbacks[event].append(callback)
+
+    def start(self, timeout: float = 5) -> bool:
+        """
+        Connect and subscribe in a background thread
+        :param timeout: time to wait for connection
+        :return: True if connected, False otherwise
+        """
+        import websocket  # only imported once a bot subscribes
+        self.logger.info(f"Subscribing to client events on {self.url}")
+        self._app = websocket.WebSocketApp(self.url, header=self._header, on_open=self._on_open,
+                                           on_message=self._on_message, on_close=self._on_close,
+                                           on_error=self._on_error)
+        sslopt = {"cert_reqs": ssl.CERT_NONE} if self.url.startswith("wss") else None
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(sslopt,), daemon=True, name="lcu-events")
+        self._thread.start()
+        return self.connected.wait(timeout)
+
+    def _run(self, sslopt: Optional[Dict[str, Any]]) -> None:
+        # run_forever's own reconnect skips on_close, it returns here instead so stale state is dropped first
+        while not self._stopped.is_set():
+            self._app.run_forever(sslopt=sslopt)
+            self._stopped.wait(self.reconnect_delay)
+
+    def stop(self) -> None:
+        """Close the WebSocket"""
+        self._stopped.set()
+        if self._app:
+            self._app.close()
+        self.connected.clear()
+
+    def _on_open(self, app: "websocket.WebSocketApp") -> None:
+        # Called on every reconnect, subscriptions do not outlive their socket
+        try:
+            for event in self.events:
+                app.send(json.dumps([self.WAMP_SUBSCRIBE, event.value]))
+        except Exception as err:
+            self.logger.debug(f"Client events subscribe failed {err}")
+            return
+        self.connected.set()
+        self.logger.info("Subscribed to client events")
+
+    def _on_close(self, app: "websocket.WebSocketApp", status_code: Optional[int], message: Optional[str]) -> None:
+        self._disconnected(f"closed {status_code} {message}")
+
+    def _on_error(self, app: "websocket.WebSocketApp", error: Exception) -> None:
+        # Only the socket reports errors here, message handling and callbacks catch their own
+        self._disconnected(f"error {error}")
+
+    def _disconnected(self, reason: str) -> None:
+        """Drop state that went stale while disconnected, it is seeded again once reconnected"""
+        self.connected.clear()
+        with self._condition:
+            self.phase = None
+            self.session = None
+            self.version += 1  # wake waiters so they fall back to a request
+            self._condition.notify_all()
+        self.logger.info(f"Client events {reason}")
+
+    def _on_message(self, app: "websocket.WebSocketApp", message: str) -> None:
+        if not message:
+            return
+        try:
+            payload = json.loads(message)
+            if payload[0] != self.WAMP_EVENT:
+                return
+            event = ClientEvents(payload[1])
+            data = None if payload[2]["eventType"] == "Delete" else payload[2]["data"]
+        except (ValueError, KeyError, IndexError, TypeError) as err:
+            self.logger.debug(f"Ignoring client event {message[:200]}. Error {err}")
+            return
+        with self._condition:
+            if event == ClientEvents.GAMEFLOW_PHASE:
+                self.phase = data
+            elif event == ClientEvents.CHAMP_SELECT_SESSION:
+                self.session = data
+            self.version += 1
+            self._condition.notify_all()
+        if self._queue.full():
+            self._queue.get_nowait()  # drop oldest change if nobody is iterating
+        self._queue.put_nowait((event, data))
+        for callback in self._callbacks[event]:
+            try:
+                callback(data)
+            except Exception:
+                self.logger.exception(f"Client event callback for {event.name} failed")
+
+    def seed_phase(self, phase: str) -> None:
+        """
+        Set phase known from a regular request if no event arrived since subscribing or reconnecting
+        :param phase: current client phase
+        """
+        with self._condition:
+            if self.phase is None:
+                self.phase = phase
+
+    def wait_for_change(self, since_version: int, timeout: float) -> int:
+        """
+        Block till any subscribed event arrives after given version
+        :param since_version: last version seen by caller
+        :param timeout: maximum time to wait
+        :return: current version
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.version > since_version, timeout=timeout)
+            return self.version
+
+    def changes(self, timeout: Optional[float] = None) -> Iterator[Tuple[ClientEvents, Any]]:
+        """
+        Blocking iterator over received events
+        :param timeout: stop iterating if no event arrives in given time, never stops if None
+        :return: iterator of (event, data)
+        """
+        while True:
+            try:
+                yield self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return
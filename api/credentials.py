@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+import psutil
+from requests import RequestException
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ClientCredentials:
+    """Dataclass containing League Client connection details"""
+    port: str
+    password: str
+    protocol: str = "https"
+    pid: Optional[str] = None
+
+
+def read_lockfile(lock_file_path: Path) -> Optional[ClientCredentials]:
+    """
+    Read client credentials from lockfile
+    :param lock_file_path: path of lockfile
+    :return: ClientCredentials if lockfile exists and is complete, None otherwise
+    """
+    try:
+        with open(lock_file_path, 'r') as lockfile:
+            data = lockfile.readline().strip().split(":")
+    except OSError:
+        return None
+    if len(data) < 5:
+        return None  # Client is still writing it
+    return ClientCredentials(port=data[2], password=data[3], protocol=data[4], pid=data[1])
+
+
+def find_credentials_from_process(process_name: str = "LeagueClientUx.exe") -> Optional[ClientCredentials]:
+    """
+    Read client credentials from the command line of the client process
+    :param process_name: name of client ux process
+    :return: ClientCredentials if client is running, None otherwise
+    """
+    for process in psutil.process_iter(["name", "cmdline"]):
+        if process.info["name"] != process_name or not process.info["cmdline"]:
+            continue
+        arguments = dict(argument.lstrip("-").split("=", 1) for argument in process.info["cmdline"]
+                         if argument.startswith("--") and "=" in argument)
+        if "app-port" in arguments and "remoting-auth-token" in arguments:
+            return ClientCredentials(port=arguments["app-port"], password=arguments["remoting-auth-token"],
+                                     pid=str(process.pid))
+    return None
+
+
+class CredentialWatcher:
+    """Watches the lockfile and swaps credentials of a live ClientAPI when the League Client restarts"""
+
+    def __init__(self, client, lock_file_path: Path, credentials: ClientCredentials, interval: float = 1.0):
+        """
+        :param client: ClientAPI to update
+        :param lock_file_path: path of lockfile
+        :param credentials: credentials client currently uses
+        :param interval: seconds between lockfile checks
+        """
+        self.client = client
+        self.lock_file_path = Path(lock_file_path)
+        self.credentials = credentials
+        self.interval = interval
+        self.last_recovery_seconds: Optional[float] = None
+        self.changed = threading.Event()
+        self._stat = self._lockfile_stat()
+        self._stop = threading.Event()
+
+    def _lockfile_stat(self) -> Optional[Tuple[float, int]]:
+        try:
+            stat = self.lock_file_path.stat()
+            return stat.st_mtime, stat.st_size
+        except OSError:
+            return None
+
+    def start(self) -> None:
+        """Check for changes in a background thread"""
+        threading.Thread(target=self._run, daemon=True, name="credential-watcher").start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as err:
+                logger.debug(f"Credential check failed {err}")
+
+    def check(self) -> bool:
+        """
+        Swap credentials if lockfile changed, or if it is gone and the client process runs with new ones
+        :return: True if credentials changed, False otherwise
+        """
+        stat = self._lockfile_stat()
+        if stat is not None and stat == self._stat:
+            return False
+        self._stat = stat
+        credentials = read_lockfile(self.lock_file_path) if stat else find_credentials_from_process()
+        if credentials is None or credentials == self.credentials:
+            return False
+        detected_at = time.monotonic()
+        logger.info(f"Client credentials changed. Reconnecting on port {credentials.port}")
+        self.credentials = credentials
+        self.client.update_credentials(credentials)
+        self.changed.set()
+        self._measure_recovery(detected_at)
+        return True
+
+    def _measure_recovery(self, detected_at: float, timeout: float = 60) -> None:
+        """
+        Wait till client answers on new credentials and log the time it took
+        :param detected_at: time change was detected
+        :param timeout: maximum time to wait
+        """
+        while time.monotonic() - detected_at < timeout:
+            try:
+                if self.client.get("/lol-login/v1/session").ok:
+                    self.last_recovery_seconds = time.monotonic() - detected_at
+                    logger.info(f"Client reconnected {self.last_recovery_seconds:.2f} s after credentials changed")
+                    return
+            except RequestException:
+                pass
+            time.sleep(0.5)
+        logger.info("Client did not answer on new credentials")
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """
+        Block till credentials change
+        :param timeout: maximum time to wait
+        :return: True if changed, False otherwise
+        """
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
@@ -0,0 +1,69 @@
+# https://developer.riotgames.com/docs/lol#game-client-api_live-client-data-api
+import logging
+from collections import defaultdict
+from typing import Dict, List, Callable, Any
+
+from common.constants import GameEvents
+
+EventHandler = Callable[[Dict[str, Any]], None]
+
+
+class EventCursor:
+    """
+    Remembers the last handled game event and dispatches only newer events to their handlers. Fed the events of each
+    /allgamedata snapshot, they arrive with the rest of the game state in one request per tick
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.last_event_id = -1
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+
+    def on(self, event: GameEvents, handler: EventHandler) -> None:
+        """
+        Register a handler for an event type
+        :param event: event type to handle
+        :param handler: called once with every new event of given type
+        """
+        self._handlers[event.value].append(handler)
+
+    def reset(self) -> None:
+        """Forget handled events, event ids start over every game"""
+        self.last_event_id = -1
+
+    def _new_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Find events newer than the cursor without walking the whole list
+        :param events: events ordered by EventID
+        :return: events not handled yet
+        """
+        if not events:
+            return []
+        if events[-1]["EventID"] < self.last_event_id:
+            self.logger.debug("Event ids went back. New game detected, resetting cursor")
+            self.reset()
+        start = self.last_event_id + 1 - events[0]["EventID"]
+        if start <= 0:
+            return events
+        if start < len(events) and events[start]["EventID"] == self.last_event_id + 1:
+            return events[start:]
+        if events[-1]["EventID"] == self.last_event_id:
+            return []
+        # Ids are not contiguous, walk back from the newest event
+        index = len(events)
+        while index > 0 and events[index - 1]["EventID"] > self.last_event_id:
+            index -= 1
+        return events[index:]
+
+    def feed(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Dispatch events the cursor has not seen yet
+        :param events: events ordered by EventID, either the full list or only the newest ones
+        :return: amount of events dispatched
+        """
+        new_events = self._new_events(events)
+        for event in new_events:
+            self.last_event_id = event["EventID"]
+            for handler in self._handlers.get(event["EventName"], ()):
+                handler(event)
+        return len(new_events)
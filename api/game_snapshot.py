@@ -0,0 +1,142 @@
+# https://developer.riotgames.com/docs/lol#game-client-api_live-client-data-api
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+
+import requests
+
+from common import clock
+from api.models import ActivePlayer, Player, Item, Ability, strip_tag
+from common.json_backend import decode
+from common.request_api import RequestAPI
+
+
+class GameSnapshot:
+    """Cached snapshot of /liveclientdata/allgamedata shared by all in game reads"""
+
+    def __init__(self, request_api: RequestAPI, ttl: float = 0.25):
+        """
+        :param request_api: RequestAPI pointed at the Live Client Data API
+        :param ttl: seconds a fetched snapshot is served before it is fetched again
+        """
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self._request_api = request_api
+        self._data: Optional[Dict[str, Any]] = None
+        # Models built from _data on first read, dropped on every fetch
+        self._active_player: Optional[ActivePlayer] = None
+        self._players: Optional[Tuple[Player, ...]] = None
+        self._items: Dict[str, Tuple[Item, ...]] = {}
+        self._fetched_at = 0.0
+        self.fetches = 0
+        self.reads = 0
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot so the next read fetches fresh data, e.g. after an input action"""
+        self._fetched_at = 0.0
+
+    def is_stale(self) -> bool:
+        """
+        Check whether cached snapshot is older than the ttl
+        :return: True if stale, False otherwise
+        """
+        return clock.monotonic() - self._fetched_at > self.ttl
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a new snapshot from the game
+        :return: all game data, None if game is not serving data yet
+        """
+        self.logger.debug("Fetching all game data")
+        self.fetches += 1
+        try:
+            response = self._request_api.get(url="/liveclientdata/allgamedata")
+            self._data = decode(response) if response.ok else None
+        except requests.ConnectionError as err:  # not listening yet during the loading screen
+            self.logger.debug(f"Game data unavailable. Error {err}")
+            self._data = None
+        self._active_player = None
+        self._players = None
+        self._items = {}
+        self._fetched_at = clock.monotonic()
+        return self._data
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the current snapshot, fetching it only if stale
+        :return: all game data, None if game is not serving data yet
+        """
+        self.reads += 1
+        if self.is_stale():
+            return self.refresh()
+        return self._data
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Replaces /liveclientdata/eventdata"""
+        data = self.get()
+        return data["events"].get("Events", []) if data else []
+
+    def last_events(self) -> List[Dict[str, Any]]:
+        """Events of the last fetched snapshot without fetching, e.g. once the game exited"""
+        return self._data["events"].get("Events", []) if self._data else []
+
+    def _build_active_player(self, data: Dict[str, Any]) -> ActivePlayer:
+        if self._active_player is None:
+            self._active_player = ActivePlayer.from_json(data["activePlayer"])
+        return self._active_player
+
+    def active_player(self) -> Optional[ActivePlayer]:
+        """Replaces /liveclientdata/activeplayer"""
+        data = self.get()
+        return self._build_active_player(data) if data else None
+
+    def active_player_abilities(self) -> Optional[Dict[str, Ability]]:
+        """Replaces /liveclientdata/activeplayerabilities"""
+        data = self.get()
+        return self._build_active_player(data).abilities if data else None
+
+    def all_players(self) -> Tuple[Player, ...]:
+        """Replaces /liveclientdata/playerlist"""
+        data = self.get()
+        if not data:
+            return ()
+        if self._players is None:
+            self._players = tuple(Player.from_json(player) for player in data["allPlayers"])
+        return self._players
+
+    def _player_items(self, data: Dict[str, Any], summoner_name: str) -> Tuple[Item, ...]:
+        if summoner_name not in self._items:
+            player = next((player for player in data["allPlayers"]
+                           if strip_tag(player["summonerName"]) == summoner_name), None)
+            self._items[summoner_name] = tuple(Item.from_json(item) for item in player["items"]) if player else ()
+        return self._items[summoner_name]
+
+    def player_items(self, summoner_name: str) -> Tuple[Item, ...]:
+        """
+        Replaces /liveclientdata/playeritems
+        :param summoner_name: summoner name without tag
+        :return: items of given player
+        """
+        data = self.get()
+        return self._player_items(data, summoner_name) if data else ()
+
+    def inventory(self, summoner_name: str) -> Optional[Tuple[float, Tuple[Item, ...]]]:
+        """
+        Gold of the active player and items of a player read from the same fetch
+        :param summoner_name: summoner name without tag
+        :return: gold and items, None if game is not serving data yet
+        """
+        data = self.get()
+        if not data:
+            return None
+        return self._build_active_player(data).current_gold, self._player_items(data, summoner_name)
+
+    def end_tick(self) -> int:
+        """
+        Log and reset read counters for the finished tick
+        :return: amount of requests saved compared to one request per read
+        """
+        saved = self.reads - self.fetches
+        self.logger.debug(f"Game snapshot served {self.reads} reads with {self.fetches} requests. Saved {saved}")
+        self.reads = 0
+        self.fetches = 0
+        return saved
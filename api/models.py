@@ -0,0 +1,146 @@
+from typing import Dict, Any, Optional, Tuple
+
+
+def strip_tag(name: str) -> str:
+    """
+    Drop the Riot ID tag the Live Client appends to summoner names, so names of all endpoints compare equal
+    :param name: summoner name, with or without #tag
+    :return: summoner name without tag
+    """
+    return name.split("#")[0]
+
+
+class Immutable:
+    """Slotted model whose fields are only set on creation, instances are shared between threads as they are"""
+
+    __slots__ = ()
+
+    def _init(self, **fields: Any) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable, can't set {name}")
+
+
+class ChampSelectAction:
+    """Pick or ban action of a champion select session"""
+
+    __slots__ = ("id", "actor_cell_id", "champion_id", "type", "completed", "is_in_progress")
+
+    def __init__(self, id: int, actor_cell_id: int, champion_id: int, type: str, completed: bool,
+                 is_in_progress: bool):
+        self.id = id
+        self.actor_cell_id = actor_cell_id
+        self.champion_id = champion_id
+        self.type = type
+        self.completed = completed
+        self.is_in_progress = is_in_progress
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ChampSelectAction":
+        return cls(id=data["id"], actor_cell_id=data["actorCellId"], champion_id=data.get("championId", 0),
+                   type=data["type"], completed=data["completed"], is_in_progress=data.get("isInProgress", False))
+
+
+class ChampSelectTrade:
+    """Champion trade of a champion select session"""
+
+    __slots__ = ("id", "cell_id", "state")
+
+    def __init__(self, id: int, cell_id: int, state: str):
+        self.id = id
+        self.cell_id = cell_id
+        self.state = state
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ChampSelectTrade":
+        return cls(id=data["id"], cell_id=data.get("cellId", -1), state=data.get("state", ""))
+
+
+class ChampSelectSession:
+    """Fields of /lol-champ-select/v1/session the bots use"""
+
+    __slots__ = ("local_player_cell_id", "phase", "actions", "trades")
+
+    def __init__(self, local_player_cell_id: Optional[int], phase: Optional[str],
+                 actions: Tuple[Tuple[ChampSelectAction, ...], ...], trades: Tuple[ChampSelectTrade, ...] = ()):
+        self.local_player_cell_id = local_player_cell_id
+        self.phase = phase
+        self.actions = actions
+        self.trades = trades
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ChampSelectSession":
+        return cls(local_player_cell_id=data.get("localPlayerCellId"),
+                   phase=data.get("timer", {}).get("phase"),
+                   actions=tuple(tuple(ChampSelectAction.from_json(action) for action in turn)
+                                 for turn in data.get("actions", [])),
+                   trades=tuple(ChampSelectTrade.from_json(trade) for trade in data.get("trades", [])))
+
+
+class Ability(Immutable):
+    """Ability of the active player"""
+
+    __slots__ = ("display_name", "level")
+
+    def __init__(self, display_name: str, level: int):
+        self._init(display_name=display_name, level=level)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Ability":
+        return cls(display_name=data.get("displayName", ""), level=data.get("abilityLevel", 0))
+
+
+class ActivePlayer:
+    """Fields of /liveclientdata/activeplayer the bots use"""
+
+    __slots__ = ("summoner_name", "current_gold", "max_health", "current_health", "level", "abilities")
+
+    def __init__(self, summoner_name: str, current_gold: float, max_health: float, current_health: float,
+                 level: int, abilities: Dict[str, Ability]):
+        self.summoner_name = summoner_name
+        self.current_gold = current_gold
+        self.max_health = max_health
+        self.current_health = current_health
+        self.level = level
+        self.abilities = abilities
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ActivePlayer":
+        stats = data["championStats"]
+        return cls(summoner_name=strip_tag(data["summonerName"]),
+                   current_gold=data["currentGold"], max_health=stats["maxHealth"],
+                   current_health=stats["currentHealth"], level=data.get("level", 0),
+                   abilities={key: Ability.from_json(ability) for key, ability in data.get("abilities", {}).items()})
+
+
+class Item(Immutable):
+    """Item in a player's inventory"""
+
+    __slots__ = ("item_id", "display_name", "slot", "count")
+
+    def __init__(self, item_id: int, display_name: str, slot: int, count: int):
+        self._init(item_id=item_id, display_name=display_name, slot=slot, count=count)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Item":
+        return cls(item_id=data["itemID"], display_name=data["displayName"], slot=data.get("slot", 0),
+                   count=data.get("count", 1))
+
+
+class Player:
+    """Entry of /liveclientdata/playerlist, items are read separately through GameSnapshot.player_items"""
+
+    __slots__ = ("summoner_name", "team", "is_dead", "respawn_timer")
+
+    def __init__(self, summoner_name: str, team: str, is_dead: bool, respawn_timer: float):
+        self.summoner_name = summoner_name
+        self.team = team
+        self.is_dead = is_dead
+        self.respawn_timer = respawn_timer
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Player":
+        return cls(summoner_name=strip_tag(data["summonerName"]), team=data["team"], is_dead=data["isDead"],
+                   respawn_timer=data["respawnTimer"])
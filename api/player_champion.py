@@ -1,74 +1,256 @@
 # https://developer.riotgames.com/docs/lol#game-client-api_live-client-data-api
 import logging
 import random
-from time import sleep
-from typing import Dict, Tuple, List
+import threading
+from pathlib import Path
+from typing import Dict, Sequence, List, Any, Optional, Callable, TYPE_CHECKING
 
-from common.constants import MapLocationRatios, Items
+from api.game_events import EventCursor
+from api.game_snapshot import GameSnapshot
+from api.state_poller import StatePoller, PlayerState
+from api.models import Ability, strip_tag
+from common import clock
+from common.capture import CaptureRecorder
+from common.constants import MapLocationRatios, Items, GameEvents
+from common.input_backends import InputBackend
+from common.item_catalog import ItemCatalog, load_catalog
+from common.purchase_planner import PurchasePlanner, INVENTORY_SLOTS
 from common.request_api import RequestAPI
-from common.utils import is_process_running
-from common.window_manager import WindowManager
+from common.scheduler import TickScheduler
+from common.telemetry import TelemetryRecorder, DEATH, PURCHASE, ITEM, RETREAT
+from common.transport import TransportConfig
+from common.utils import get_process_tracker
+from common.window_manager import WindowManager, InputMacro
+
+if TYPE_CHECKING:
+    from common.minimap import MinimapAnalyzer, MinimapObservation
 
 
 class PlayerChampion:
     """Class that handles player champion in game"""
 
-    def __init__(self):
+    def __init__(self, snapshot_ttl: float = 0.25, scheduler: Optional[TickScheduler] = None,
+                 live_client_port: str = "2999", live_client_protocol: str = "https",
+                 recorder: Optional[CaptureRecorder] = None, input_backend: Optional[InputBackend] = None,
+                 warm_up: bool = True, item_catalog: Optional[ItemCatalog] = None,
+                 state_poll_interval: Optional[float] = None, minimap: Optional["MinimapAnalyzer"] = None,
+                 telemetry: Optional[TelemetryRecorder] = None, install_path: Optional[Path] = None):
         self.logger = logging.getLogger(__name__)
         self.window_name = "League of Legends (TM) Client"
         self.process_name = "League of Legends.exe"
         self.current_gold = 0
         self.max_hp = 0
         self.current_hp = 0
-        self.item = 0
+        self.level = 0
         self.game_in_progress = False
         self.side = None
         self.summoner_name = None
         self.is_alive = False
-        self._window_manager = WindowManager(self.window_name)
-        self._request_api = RequestAPI("https", "127.0.0.1", "2999")
+        self.respawn_timer = 0.0
+        self.on_game_end: Optional[Callable[[], None]] = None
+        self.scheduler = scheduler or TickScheduler()
+        # Found by the pid of the tracked game, several installs on one machine run games with the same title
+        self._window_manager = WindowManager(self.window_name, backend=input_backend, pid=lambda: self._process.pid)
+        # Polled every tick while game runs, a slow answer is better skipped than waited on
+        self._request_api = RequestAPI(live_client_protocol, "127.0.0.1", live_client_port, recorder=recorder,
+                                       name="live_client", transport=TransportConfig(timeout=(1.0, 3.0)))
+        self.warm_up = warm_up
+        self._warm_up_started = False
+        self._snapshot = GameSnapshot(self._request_api, ttl=snapshot_ttl)
+        # Poller fetches over its own connection, actions only read the state it publishes
+        self._poller = StatePoller(GameSnapshot(
+            RequestAPI(live_client_protocol, "127.0.0.1", live_client_port, recorder=recorder, name="live_client",
+                       transport=TransportConfig(timeout=(1.0, 3.0)))), interval=state_poll_interval) \
+            if state_poll_interval else None
+        self._applied_state: Optional[PlayerState] = None
+        self._input_sent = False
+        self._purchase_sent_at = float("-inf")
+        self.minimap = minimap
+        self.telemetry = telemetry
+        self._event_cursor = EventCursor()
+        self._purchase_planner = PurchasePlanner(item_catalog or load_catalog())
+        self._event_cursor.on(GameEvents.GAME_START, self._on_game_start)
+        self._event_cursor.on(GameEvents.GAME_END, self._on_game_end)
+        self._event_cursor.on(GameEvents.CHAMPION_KILL, self._on_champion_kill)
+        self.game_exited = threading.Event()
+        self._exit_pending = threading.Event()
+        self._process = get_process_tracker(self.process_name, install_path=install_path)
+        self._process.add_exit_callback(self._on_game_exit)
+
+    def _on_game_exit(self) -> None:
+        """Called from the process tracker thread once the game process exits, the bot thread applies the exit"""
+        self.logger.info("Game process exited")
+        self._exit_pending.set()
+        self.game_exited.set()
+
+    def apply_game_exit(self) -> bool:
+        """
+        Finish the game whose process exited. Runs on the bot thread, the only one feeding the event cursor
+        :return: True if an exit was pending, False otherwise
+        """
+        if not self._exit_pending.is_set():
+            return False
+        self._exit_pending.clear()
+        # Events fetched but not dispatched yet, e.g. GameEnd when the bot read state less often than the game exits
+        state = self._poller.state if self._poller else None
+        self._event_cursor.feed(list(state.events) if state else self._snapshot.last_events())
+        self.game_in_progress = False
+        self.is_alive = False
+        self.side = None
+        self._event_cursor.reset()  # next game starts its event ids over
+        self._snapshot.invalidate()
+        self._warm_up_started = False
+        if self._poller:
+            self._poller.stop()
+        self._applied_state = None
+        if self.minimap:
+            self.minimap.reset()
+        if self.telemetry:
+            self.telemetry.end_game()  # no GameEnd event, e.g. the game crashed
+        return True
+
+    def is_game_running(self) -> bool:
+        """
+        Check if game process is running without scanning all processes
+        :return: True if running, False otherwise
+        """
+        self.apply_game_exit()
+        if self._process.is_running():
+            self.game_exited.clear()
+            if self._poller:
+                self._poller.start()
+            if self.warm_up and not self._warm_up_started:
+                self._warm_up_started = True
+                threading.Thread(target=self._warm_up_live_client, daemon=True, name="live-client-warm-up").start()
+            return True
+        return False
+
+    def _warm_up_live_client(self, timeout: float = 180, interval: float = 1.0) -> None:
+        """
+        Open the Live Client API connection during the loading screen so the first in game read skips its setup
+        :param timeout: maximum time to wait for the API to listen
+        :param interval: time between attempts
+        """
+        deadline = clock.monotonic() + timeout
+        while not self.game_exited.is_set() and clock.monotonic() < deadline:
+            if self._request_api.warm_up("/liveclientdata/gamestats"):
+                self.logger.debug("Live Client API connection warmed up")
+                return
+            clock.sleep(interval)
+
+    def close_game(self) -> None:
+        """Kill game process if it is still running"""
+        self._process.terminate()
+
+    def state_age(self) -> Optional[float]:
+        """
+        Age of the game state actions act on
+        :return: seconds since the state was fetched, None if no state was published yet or poller is off
+        """
+        state = self._poller.state if self._poller else None
+        return state.age() if state else None
+
+    def invalidate_state(self) -> None:
+        """Have the next read see fresh game data, e.g. after an input action"""
+        self._snapshot.invalidate()
+        if self._poller:
+            self._poller.request_refresh()
+
+    def start_tick(self) -> None:
+        """Start a gameplay tick, its first read fetches fresh game data if the previous tick sent input"""
+        if self._input_sent:
+            self._input_sent = False
+            self.invalidate_state()
 
     def update_player_data(self) -> None:
         """Update all object attributes with data from game if game not ended"""
+        if self._poller:
+            if self.is_game_running():
+                self._apply_state(self._poller.state)
+            return
         self.set_game_events_data()
         if self.game_in_progress:
             self.set_active_player_data()
             self.set_player_state()
 
+    def _apply_state(self, state: Optional[PlayerState]) -> None:
+        """
+        Update object attributes from a state published by the poller, without a request
+        :param state: latest state, None if none was published yet
+        """
+        if state is None or state is self._applied_state:
+            return
+        self._applied_state = state
+        self._event_cursor.feed(list(state.events))
+        if not self.game_in_progress:
+            return
+        self.summoner_name = state.summoner_name
+        self.current_gold = state.gold
+        self.max_hp = state.max_hp
+        self.current_hp = state.current_hp
+        self.level = state.level
+        self.side = state.side
+        self.is_alive = state.is_alive
+        self.respawn_timer = state.respawn_timer
+        if not self.is_alive:
+            self.scheduler.cancel("retreat")
+            self.scheduler.cancel("recall")
+
     def set_active_player_data(self) -> None:
         """Set summoner_name"""
         self.logger.debug("Setting player summoner name")
-        if is_process_running(self.process_name):
-            data = self._request_api.get(url="/liveclientdata/activeplayer").json()
-            self.summoner_name = data["summonerName"].split("#")[0]  # it includes tag
-            self.current_gold = data["currentGold"]
-            self.max_hp = data["championStats"]["maxHealth"]
-            self.current_hp = data["championStats"]["currentHealth"]
+        if self.is_game_running():
+            data = self._snapshot.active_player()
+            if not data:
+                return
+            self.summoner_name = data.summoner_name
+            self.current_gold = data.current_gold
+            self.max_hp = data.max_health
+            self.current_hp = data.current_health
+            self.level = data.level
 
     def set_game_events_data(self) -> None:
         """Set object attributes with data from game events"""
-        if is_process_running(self.process_name):
+        if self.is_game_running():
             self.logger.debug("Setting game state")
-            events = self._request_api.get(url="/liveclientdata/eventdata").json()
-            if events.get("Events"):
-                for event in events.get("Events"):
-                    if event["EventName"] == "GameEnd":
-                        self.game_in_progress = False
-                        self.side = None
-                        return  # game ended no reason to update anything
-                    if event["EventName"] == "GameStart":
-                        self.game_in_progress = True
+            self._event_cursor.feed(self._snapshot.events())
+
+    def _on_game_start(self, event: Dict[str, Any]) -> None:
+        """Handle GameStart event"""
+        self.logger.info("Game started")
+        self.game_in_progress = True
+        if self.telemetry:
+            self.telemetry.start_game()
+
+    def _on_game_end(self, event: Dict[str, Any]) -> None:
+        """Handle GameEnd event"""
+        self.logger.info(f"Game ended. Result {event.get('Result')}")
+        self.game_in_progress = False
+        self.side = None
+        if self.telemetry:
+            self.telemetry.end_game(event.get("Result"))
+        if self.on_game_end:
+            self.on_game_end()
+
+    def _on_champion_kill(self, event: Dict[str, Any]) -> None:
+        """Handle ChampionKill event"""
+        if self.summoner_name and strip_tag(event["VictimName"]) == self.summoner_name:
+            self.logger.info(f"Killed by {event['KillerName']}")
+            if self.telemetry:
+                self.telemetry.event(DEATH, event["KillerName"])
 
     def set_player_state(self) -> None:
         """Set player champion state"""
         self.logger.debug("Setting player state")
-        if is_process_running(self.process_name):
-            player_list = self._request_api.get("/liveclientdata/playerlist").json()
-            for player in player_list:
-                if player["summonerName"] == self.summoner_name:
-                    self.side = player["team"]
-                    self.is_alive = not player["isDead"]
-                    sleep(player["respawnTimer"])  # will sleep if player is dead
+        if self.is_game_running():
+            for player in self._snapshot.all_players():
+                if player.summoner_name == self.summoner_name:
+                    self.side = player.team
+                    self.is_alive = not player.is_dead
+                    self.respawn_timer = player.respawn_timer  # actions wait through is_alive, no sleep
+                    if not self.is_alive:
+                        self.scheduler.cancel("retreat")
+                        self.scheduler.cancel("recall")
 
     def get_current_items(self) -> List[str]:
         """
@@ -76,26 +258,63 @@ class PlayerChampion:
         :return: current items
         """
         if self.side and self.game_in_progress:
-            response = self._request_api.get(f"/liveclientdata/playeritems?summonerName={self.summoner_name}").json()
-            current_items = [item["displayName"] for item in response]
+            items = self._applied_state.items if self._poller and self._applied_state else \
+                self._snapshot.player_items(self.summoner_name)
+            current_items = [item.display_name for item in items]
             # Support item upgrades itself causes confusion
             if current_items and current_items[0] == "Runic Compass":
                 current_items[0] = Items.World_Atlas.name
             self.logger.info(f"Current items {current_items}")
             return current_items
 
-    def get_player_abilities(self) -> Dict:
+    def get_player_abilities(self) -> Dict[str, Ability]:
         """
         Get player abilities
-        :return: Dict containing all abilities information
+        :return: ability key (Q, W, E, R, Passive) to Ability
         """
         if self.side and self.game_in_progress:
-            return self._request_api.get(url="/liveclientdata/activeplayerabilities").json()
+            if self._poller:
+                return dict(self._applied_state.abilities) if self._applied_state else None
+            return self._snapshot.active_player_abilities()
+
+    def end_tick(self) -> int:
+        """
+        Close the current gameplay tick of the game snapshot
+        :return: amount of Live Client Data requests saved by the snapshot this tick
+        """
+        return self._snapshot.end_tick()
+
+    def observe_minimap(self) -> Optional["MinimapObservation"]:
+        """
+        Get champion icons and camera box seen on the minimap
+        :return: latest observation, None if minimap vision is off or the minimap could not be grabbed
+        """
+        return self.minimap.observe(self._window_manager) if self.minimap else None
+
+    def is_outnumbered(self, radius: float = 0.15) -> bool:
+        """
+        Check whether more enemies than allies are around the player on the minimap
+        :param radius: fraction of the minimap size around the camera center
+        :return: True if outnumbered, False otherwise or if minimap vision is off
+        """
+        observation = self.observe_minimap()
+        position = observation.position if observation else None
+        if position is None:
+            return False
+        allies, enemies = observation.nearby(position, radius)
+        return enemies > allies + 1  # the player's own icon has no ally border
 
     def go_to_enemy_nexus(self) -> None:
-        """Go to the enemy nexus if alive"""
+        """Go to the enemy nexus if alive, group up with the nearest ally instead if outnumbered"""
         self.update_player_data()
         if self.side and self.is_alive and self.game_in_progress:
+            if self.is_outnumbered():
+                observation = self.observe_minimap()
+                ally = observation.nearest_ally(observation.position)
+                if ally:
+                    self.logger.info("Outnumbered. Going to nearest ally")
+                    self._window_manager.right_click(ratio=self.minimap.window_ratio(ally))
+                    return
             self.logger.info("Go to enemy nexus")
             self._window_manager.right_click(ratio=MapLocationRatios[self.side].value)
 
@@ -108,10 +327,8 @@ class PlayerChampion:
         self.update_player_data()
         if self.side and self.is_alive and self.game_in_progress:
             self.logger.info(f"Going to ally champion {ally}")
-            self._window_manager.hold_key(ally)
-            self._window_manager.right_click(ratio=MapLocationRatios.CENTER.value)
-            sleep(1)
-            self._window_manager.release(ally)
+            self._window_manager.run_macro(InputMacro().hold(ally).right_click(MapLocationRatios.CENTER.value))
+            self.scheduler.call_later(1, lambda: self._window_manager.release(ally), name=f"release_{ally}")
 
     def lock_on_ally(self, ally: str):
         """
@@ -123,6 +340,7 @@ class PlayerChampion:
             self.logger.info(f"Locking on ally champion {ally}")
             self._window_manager.press_key(ally)
             self._window_manager.hold_key(ally)
+            self._input_sent = True  # attaching changes abilities, read again next tick
 
     def go_to_center(self):
         """Going to center of screen"""
@@ -147,6 +365,7 @@ class PlayerChampion:
         if self.side and self.is_alive and self.game_in_progress:
             self.logger.info(f"Upgrading ability {ability}")
             self._window_manager.press_key(f"ctrl+{ability}")
+            self._input_sent = True
 
     def use_spell(self, spell: str) -> None:
         """
@@ -157,6 +376,7 @@ class PlayerChampion:
         if self.side and self.is_alive and self.game_in_progress:
             self.logger.info(f"Using ability {spell}")
             self._window_manager.press_key(spell)
+            self._input_sent = True
 
     def lock_camera(self) -> None:
         """Lock camera on champion if alive"""
@@ -166,47 +386,70 @@ class PlayerChampion:
 
     def write_in_chat(self, msg: str) -> None:
         """Write a message in game chat"""
-        self._window_manager.press_key("enter")
-        self._window_manager.write(msg)
-        self._window_manager.press_key("enter")
-        sleep(1)
+        self._window_manager.run_macro(InputMacro().key("enter").text(msg).key("enter"))
 
-    def buy_items(self, item_path: Tuple[Items]) -> True:
+    def buy_items(self, item_path: Sequence[Items]) -> bool:
         """
-        Buy a random not already bought item from item path if enough gold
-        :param item_path: list of Items to build
-        :return: True bought item successfully, False otherwise
+        Buy every affordable item and component along the item path in one shop visit
+        :param item_path: finished items to build in order, owned ones are skipped
+        :return: True if purchases were sent, False otherwise
         """
-        item_to_buy = item_path[self.item]
-        prev_gold = self.current_gold
+        if self.scheduler.is_pending("verify_purchase"):
+            return False  # inventory of previous purchases not read yet
         self.update_player_data()
-        if self.side and self.game_in_progress and self.current_gold > item_to_buy.value:
-            if item_to_buy.name in self.get_current_items():
-                self.item += 1
-                return False
-            self.logger.info(f"Buying item {item_to_buy.name}")
-            self._window_manager.press_key("p")
-            self._window_manager.press_key("ctrl+l")
-            self._window_manager.write(item_to_buy.name)
-            self._window_manager.press_key("enter")
-            self._window_manager.press_key("p")
-            sleep(1)
-            self.update_player_data()
-            if prev_gold > self.current_gold:
-                self.item += 1
-                return True
-        return False
+        if not (self.side and self.game_in_progress):
+            return False
+        if self._poller:
+            # Gold and items have to reflect the previous purchase, wait for a state fetched after it
+            state = self._poller.wait_for_newer(self._purchase_sent_at)
+            inventory = (state.gold, state.items) if state else None
+        else:
+            inventory = self._snapshot.inventory(self.summoner_name)
+        if not inventory:
+            return False
+        gold, items = inventory
+        purchases = self._purchase_planner.plan([item.value for item in item_path],
+                                                [item.item_id for item in items if item.slot < INVENTORY_SLOTS], gold)
+        if not purchases:
+            return False
+        macro = InputMacro().key("p")
+        for purchase in purchases:
+            self.logger.info(f"Buying item {purchase.item.name} for {purchase.cost} gold")
+            macro.key("ctrl+l").text(purchase.item.name).key("enter")
+            if self.telemetry:
+                self.telemetry.event(PURCHASE, purchase.item.name)
+                if purchase.item.components and purchase.item.id in {item.value for item in item_path}:
+                    self.telemetry.event(ITEM, purchase.item.name)
+        self._window_manager.run_macro(macro.key("p"))
+        self._purchase_sent_at = clock.monotonic()
+        # Next plan starts from a fresh inventory once the shop applied the purchases
+        self.scheduler.call_later(1, self.invalidate_state, name="verify_purchase")
+        return True
 
     def tactical_retreat(self, hp_to_retreat: int) -> None:
         """
-        Retreats and recalls
+        Retreats and recalls, also when outnumbered on the minimap
         :param hp_to_retreat: minimal fraction of max_hp to start retreating at
         """
+        if self.is_retreating():
+            return
         self.update_player_data()
         if self.is_alive and self.side and self.game_in_progress and \
-                self.current_hp / self.max_hp <= hp_to_retreat:
+                (self.current_hp / self.max_hp <= hp_to_retreat or self.is_outnumbered()):
             own_nexus = MapLocationRatios.CHAOS.value if self.side == "ORDER" else MapLocationRatios.ORDER.value
             self._window_manager.right_click(ratio=own_nexus)
-            sleep(5)  # time to retreat
-            self.use_spell("b")
-            sleep(12)  # recall time + heal up
+            self.scheduler.call_later(5, self._recall, name="retreat")  # time to retreat
+            if self.telemetry:
+                self.telemetry.event(RETREAT)
+
+    def _recall(self) -> None:
+        """Recall once retreated, the recall completes on a later tick"""
+        self.use_spell("b")
+        self.scheduler.wait("recall", 12)  # recall time + heal up
+
+    def is_retreating(self) -> bool:
+        """
+        Check if a retreat or recall started by tactical_retreat is still pending
+        :return: True if retreating, False otherwise
+        """
+        return self.scheduler.is_pending("retreat") or self.scheduler.is_pending("recall")
@@ -0,0 +1,160 @@
+# https://developer.riotgames.com/docs/lol#game-client-api_live-client-data-api
+import logging
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Tuple, Optional, Any, Mapping
+
+from requests import RequestException
+
+from api.game_snapshot import GameSnapshot
+from api.models import Item, Ability
+from common import clock
+
+
+def freeze(value: Any) -> Any:
+    """
+    Make a read only copy of decoded json
+    :param value: json value
+    :return: dicts as read only mappings and lists as tuples, all the way down
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class PlayerState:
+    """Player champion state read from one /liveclientdata/allgamedata fetch, never changes once published.
+    Items and abilities are immutable models, events read only mappings"""
+    taken_at: float  # clock.monotonic() the fetch was sent at, inputs sent before it are reflected
+    summoner_name: str
+    gold: float
+    max_hp: float
+    current_hp: float
+    level: int
+    is_alive: bool
+    respawn_timer: float
+    side: Optional[str]
+    items: Tuple[Item, ...]
+    abilities: Mapping[str, Ability]
+    events: Tuple[Mapping[str, Any], ...]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GameSnapshot, taken_at: float) -> Optional["PlayerState"]:
+        """
+        Build a state from a freshly fetched snapshot
+        :param snapshot: snapshot holding the fetch
+        :param taken_at: time the fetch was sent at
+        :return: PlayerState object, None if game is not serving data yet
+        """
+        active_player = snapshot.active_player()
+        if active_player is None:
+            return None
+        name = active_player.summoner_name
+        player = next((player for player in snapshot.all_players() if player.summoner_name == name), None)
+        return cls(taken_at=taken_at, summoner_name=name, gold=active_player.current_gold,
+                   max_hp=active_player.max_health, current_hp=active_player.current_health,
+                   level=active_player.level, is_alive=not player.is_dead if player else False,
+                   respawn_timer=player.respawn_timer if player else 0.0, side=player.team if player else None,
+                   items=snapshot.player_items(name), abilities=MappingProxyType(dict(active_player.abilities)),
+                   events=freeze(snapshot.events()))
+
+    def age(self) -> float:
+        """
+        Time since the state was fetched
+        :return: seconds
+        """
+        return clock.monotonic() - self.taken_at
+
+
+class StatePoller:
+    """Refreshes the player champion state on a background thread, readers get the latest PlayerState at once"""
+
+    def __init__(self, snapshot: GameSnapshot, interval: float = 0.25):
+        """
+        :param snapshot: snapshot used by the poller thread only, over its own RequestAPI
+        :param interval: seconds between fetches, shortened by request_refresh
+        """
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.polls = 0
+        self._snapshot = snapshot
+        self._state: Optional[PlayerState] = None
+        self._published = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> Optional[PlayerState]:
+        """Latest published state, None before the first successful fetch. Never blocks"""
+        return self._state
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Poll in a background thread, e.g. once the game process started"""
+        if self.is_running() and not self._stop.is_set():
+            return
+        self._stop = threading.Event()  # a stopped thread still finishing its fetch keeps its own event
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True, name="state-poller")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and drop the published state, e.g. once the game process exited"""
+        self._stop.set()
+        self._wake.set()
+        with self._published:
+            self._state = None
+            self._published.notify_all()
+
+    def request_refresh(self) -> None:
+        """Fetch now instead of at the next interval, e.g. after an input changed the game"""
+        self._wake.set()
+
+    def poll(self, stop: Optional[threading.Event] = None) -> Optional[PlayerState]:
+        """
+        Fetch and publish one state
+        :param stop: stop event of the polling thread, the state is not published once it is set
+        :return: fetched state, None if game is not serving data yet
+        """
+        taken_at = clock.monotonic()
+        self._snapshot.refresh()
+        state = PlayerState.from_snapshot(self._snapshot, taken_at)
+        self.polls += 1
+        if state is not None:
+            with self._published:
+                if stop is None or not stop.is_set():
+                    self._state = state
+                self._published.notify_all()
+        return state
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self._wake.clear()
+            try:
+                self.poll(stop)
+            except (RequestException, KeyError, TypeError, ValueError) as err:
+                self.logger.debug(f"Game state poll failed {err}")
+            self._wake.wait(self.interval)
+
+    def wait_for_newer(self, after: float, timeout: float = 2.0) -> Optional[PlayerState]:
+        """
+        Block till a state fetched after given time is published, for actions that have to see their own effect
+        :param after: clock.monotonic() the action was sent at
+        :param timeout: maximum time to wait
+        :return: state fetched after given time, None if none arrived in time or poller stopped
+        """
+        state = self._state
+        if state is not None and state.taken_at > after:
+            return state
+        self.request_refresh()
+        with self._published:
+            self._published.wait_for(lambda: self._stop.is_set() or (
+                self._state is not None and self._state.taken_at > after), timeout=timeout)
+            state = self._state
+        return state if state is not None and state.taken_at > after else None
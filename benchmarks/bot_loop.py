@@ -0,0 +1,314 @@
+"""
+Measure the cost of one loop iteration of every bot handler against a local mock LCU and Live Client API
+and a RecordingBackend, reporting HTTP calls, process scans, input events and wall time per tick.
+Sleeps are recorded and skipped unless --real-sleeps, their time is reported apart from work time. The bot's clock jumps
+over skipped sleeps, so scheduled actions and throttles come due as if slept. A handler that sends no request and no
+input in the measured ticks fails the run.
+Run with: python -m benchmarks.bot_loop --bot yuumi --ticks 50 --output bot_loop.json
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional
+from unittest import mock
+
+import psutil
+
+from benchmarks.champ_select_latency import CHAMP_SELECT_ROUTES
+from benchmarks.mock_server import MockServer
+from bot import BOTS, load_bot
+from common import clock
+from common.constants import ClientPhases
+from common.input_backends import RecordingBackend
+from common.utils import get_process_tracker
+from config import BotConfig
+
+SUMMONER_NAME = "Benchmark"
+
+CLIENT_ROUTES = {
+    ("GET", "/lol-login/v1/session"): {"state": "SUCCEEDED"},
+    ("POST", "/lol-login/v1/delete-rso-on-close"): {},
+    ("POST", "/lol-lobby/v2/lobby"): {},
+    ("PUT", "/lol-lobby/v2/lobby/members/localMember/position-preferences"): {},
+    ("GET", "/lol-lobby/v2/lobby/matchmaking/search-state"): {"errors": []},
+    ("GET", "/lol-lobby/v2/lobby"): {"canStartActivity": True},
+    ("POST", "/lol-lobby/v2/lobby/matchmaking/search"): {},
+    ("POST", "/lol-matchmaking/v1/ready-check/accept"): {},
+    ("POST", "/lol-end-of-game/v1/state/dismiss-stats"): {},
+    ("POST", "/lol-gameflow/v1/reconnect"): {},
+    **CHAMP_SELECT_ROUTES,
+}
+
+LIVE_CLIENT_ROUTES = {
+    ("GET", "/liveclientdata/allgamedata"): {
+        "activePlayer": {
+            "summonerName": f"{SUMMONER_NAME}#EUW",
+            "currentGold": 5000.0,
+            "championStats": {"maxHealth": 1000.0, "currentHealth": 900.0},
+            "abilities": {"W": {"displayName": "You and Me!"}},
+        },
+        "allPlayers": [{"summonerName": f"{SUMMONER_NAME}#EUW", "team": "ORDER", "isDead": False,
+                        "respawnTimer": 0.0, "items": []}],
+        "events": {"Events": [{"EventID": 0, "EventName": "GameStart", "EventTime": 0.05}]},
+    },
+}
+
+# Handler to the phases the mock client reports while it runs and the method called once per loop iteration
+HANDLERS = {
+    "handle_client": ([ClientPhases.NONE.value, ClientPhases.LOBBY.value, ClientPhases.READY_CHECK.value,
+                       ClientPhases.END_OF_GAME.value], "client.get_phase"),
+    "handle_champion_select": ([ClientPhases.CHAMP_SELECT.value], "client.get_phase"),
+    "handle_gameplay": ([ClientPhases.IN_GAME.value], "start_tick"),
+}
+
+
+class StopBenchmark(Exception):
+    """Raised from the tick boundary to leave a handler loop once enough ticks were measured"""
+
+
+@dataclass
+class Tick:
+    """Dataclass containing cost of one handler loop iteration"""
+    wall: float = 0.0
+    slept: float = 0.0
+    sleep_requested: float = 0.0
+    sleeps: int = 0
+    http_calls: int = 0
+    process_scans: int = 0
+    input_events: int = 0
+
+
+@dataclass
+class Probe:
+    """Counts sleeps, process scans, requests and inputs of the benchmark thread"""
+    servers: List[MockServer]
+    backend: RecordingBackend
+    real_sleeps: bool = False
+    sleeps: int = 0
+    sleep_requested: float = 0.0
+    slept: float = 0.0
+    skipped: float = 0.0
+    process_scans: int = 0
+    thread: threading.Thread = field(default_factory=threading.current_thread)
+
+    def sleep(self, real_sleep: Callable[[float], None], seconds: float) -> None:
+        if threading.current_thread() is not self.thread:
+            return real_sleep(seconds)  # process tracker and pool threads keep their timing
+        self.sleeps += 1
+        self.sleep_requested += seconds
+        if self.real_sleeps:
+            start = time.perf_counter()
+            real_sleep(seconds)
+            self.slept += time.perf_counter() - start
+        else:
+            self.skipped += max(seconds, 0.0)
+
+    def process_iter(self, real_process_iter: Callable, *args, **kwargs):
+        self.process_scans += 1
+        return real_process_iter(*args, **kwargs)
+
+    def counters(self) -> Tick:
+        return Tick(wall=time.perf_counter(), slept=self.slept, sleep_requested=self.sleep_requested,
+                    sleeps=self.sleeps, http_calls=sum(server.request_count for server in self.servers),
+                    process_scans=self.process_scans, input_events=len(self.backend.input_calls()))
+
+    @contextlib.contextmanager
+    def patched(self):
+        """Route sleeps, the bot's clock and process table scans through the probe"""
+        real_sleep, real_process_iter = time.sleep, psutil.process_iter
+        sleep = lambda seconds: self.sleep(real_sleep, seconds)  # noqa: E731
+        previous_clock = clock.use_clock(ProbeClock(self, real_sleep))
+        try:
+            with mock.patch.object(time, "sleep", sleep), \
+                    mock.patch.object(psutil, "process_iter",
+                                      lambda *args, **kwargs: self.process_iter(real_process_iter, *args, **kwargs)):
+                yield
+        finally:
+            clock.use_clock(previous_clock)
+
+    """Real clock moved forward by every sleep the probe skipped, bot timers and throttles come due as if slept"""
+class ProbeClock(clock.Clock):
+    """Real clock moved forward by every sleep the probe skipped, timers and throttles of the bot come due as if slept"""
+
+    def __init__(self, probe: Probe, real_sleep: Callable[[float], None]):
+        self.probe = probe
+        self._real_sleep = real_sleep
+
+    def time(self) -> float:
+        return super().time() + self.probe.skipped
+
+    def monotonic(self) -> float:
+        return super().monotonic() + self.probe.skipped
+
+    def sleep(self, seconds: float) -> None:
+        self.probe.sleep(self._real_sleep, seconds)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """
+    Nearest rank percentile
+    :param samples: values
+    :param fraction: 0.5 for median, 0.99 for p99
+    :return: value at percentile
+    """
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def summarize(bot_name: str, handler: str, ticks: List[Tick]) -> Dict[str, Any]:
+    """
+    Summarize measured ticks of a handler
+    :param bot_name: bot name from bot.BOTS
+    :param handler: handler name
+    :param ticks: measured ticks
+    :return: per tick averages and wall time percentiles in milliseconds
+    """
+    wall = [tick.wall * 1000 for tick in ticks]
+    work = [(tick.wall - tick.slept) * 1000 for tick in ticks]
+
+    def mean(attribute: str) -> float:
+        return round(statistics.fmean(getattr(tick, attribute) for tick in ticks), 3)
+
+    return {
+        "bot": bot_name,
+        "handler": handler,
+        "ticks": len(ticks),
+        "http_calls_per_tick": mean("http_calls"),
+        "process_scans_per_tick": mean("process_scans"),
+        "input_events_per_tick": mean("input_events"),
+        "sleeps_per_tick": mean("sleeps"),
+        "sleep_requested_ms_per_tick": round(statistics.fmean(tick.sleep_requested for tick in ticks) * 1000, 3),
+        "wall_ms": {"p50": round(percentile(wall, 0.5), 3), "p99": round(percentile(wall, 0.99), 3)},
+        "work_ms": {"p50": round(percentile(work, 0.5), 3), "p99": round(percentile(work, 0.99), 3)},
+    }
+
+
+def run_handler(bot, probe: Probe, lcu: MockServer, handler: str, ticks: int, warmup: int) -> List[Tick]:
+    """
+    Run a handler of a bot till enough loop iterations were measured
+    :param bot: bot instance
+    :param probe: probe counting the bot's work
+    :param lcu: mock LCU to report the handler's phases from
+    :param handler: handler name from HANDLERS
+    :param ticks: iterations to measure
+    :param warmup: iterations run first and not measured
+    :return: measured ticks
+    """
+    phases, boundary = HANDLERS[handler]
+    phase_cycle = itertools.cycle(phases)
+    lcu.routes[("GET", "/lol-gameflow/v1/gameflow-phase")] = lambda body: next(phase_cycle)
+    owner_name, method_name = boundary.rsplit(".", 1) if "." in boundary else ("", boundary)
+    owner = getattr(bot, owner_name) if owner_name else bot
+    original = getattr(owner, method_name)
+    measured: List[Tick] = []
+    started: Optional[Tick] = None
+
+    def tick_boundary(*args, **kwargs):
+        nonlocal started
+        now = probe.counters()
+        if started is not None:
+            measured.append(Tick(**{name: getattr(now, name) - getattr(started, name)
+                                    for name in Tick.__dataclass_fields__}))
+        if len(measured) >= ticks + warmup:
+            raise StopBenchmark()
+        started = probe.counters()
+        return original(*args, **kwargs)
+
+    with mock.patch.object(owner, method_name, tick_boundary):
+        try:
+            getattr(bot, handler)()
+        except StopBenchmark:
+            pass
+    return measured[warmup:]
+
+
+def write_client_files(directory: Path, lcu_port: int) -> None:
+    """
+    Write the lockfile and game cfg BotConfig reads
+    :param directory: directory standing in for the League install
+    :param lcu_port: port of mock LCU
+    """
+    (directory / "Config").mkdir()
+    (directory / "Config" / "game.cfg").write_text("[General]\n[HUD]\n[ItemShop]\n")
+    (directory / "lockfile").write_text(f"LeagueClient:0:{lcu_port}:benchmark:http")
+
+
+def benchmark_bot(bot_name: str, ticks: int, warmup: int, real_sleeps: bool, live_client_latency: float = 0.0,
+                  state_poll_interval: Optional[float] = None, telemetry: bool = False) -> List[Dict[str, Any]]:
+    """
+    Measure every handler of a bot
+    :param bot_name: bot name from bot.BOTS
+    :param ticks: iterations to measure per handler
+    :param warmup: iterations per handler not measured
+    :param real_sleeps: execute sleeps instead of only recording them
+    :param live_client_latency: seconds every Live Client API response is delayed by
+    :param state_poll_interval: poll game state on a background thread at this interval, inline if None
+    :param telemetry: record telemetry of the measured ticks to a temporary SQLite file
+    :return: summary per handler
+    """
+    lcu = MockServer(dict(CLIENT_ROUTES))
+    live_client = MockServer(dict(LIVE_CLIENT_ROUTES), latency=live_client_latency)
+    backend = RecordingBackend()
+    probe = Probe(servers=[lcu, live_client], backend=backend, real_sleeps=real_sleeps)
+    results = []
+    with tempfile.TemporaryDirectory() as directory, probe.patched():
+        write_client_files(Path(directory), lcu.start())
+        config = BotConfig(lol_base_path=Path(directory), live_client_port=str(live_client.start()),
+                           live_client_protocol="http", watch_lockfile=False, use_client_events=False,
+                           bot_name=bot_name, state_poll_interval=state_poll_interval,
+                           telemetry_path=Path(directory) / "telemetry.db" if telemetry else None)
+        bot = load_bot(bot_name)(config=config, input_backend=backend)
+        # Track this benchmark process in place of the game so gameplay handlers see a running game
+        bot.player_champion._process = get_process_tracker(psutil.Process().name())
+        if bot.player_champion._poller and bot.player_champion.is_game_running():
+            # Ticks before the first published state skip every action, they would only measure doing nothing
+            if bot.player_champion._poller.wait_for_newer(float("-inf"), timeout=10) is None:
+                raise RuntimeError("State poller published no state")
+        for handler in HANDLERS:
+            measured = run_handler(bot, probe, lcu, handler, ticks, warmup)
+            if not any(tick.http_calls or tick.input_events for tick in measured):
+                raise RuntimeError(f"{bot_name}.{handler} sent no request and no input in {len(measured)} ticks")
+            results.append(summarize(bot_name, handler, measured))
+        if bot.telemetry:
+            bot.telemetry.close()
+            results[-1]["telemetry_rows_written"] = bot.telemetry.written
+    lcu.stop()
+    live_client.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bot", choices=list(BOTS), action="append", help="bot to measure, every bot if omitted")
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--real-sleeps", action="store_true", help="sleep for real instead of only recording")
+    parser.add_argument("--live-client-latency", type=float, default=0.0, help="ms added to Live Client responses")
+    parser.add_argument("--state-poll-interval", type=float, help="poll game state in the background every n s")
+    parser.add_argument("--telemetry", action="store_true", help="record telemetry while measuring")
+    parser.add_argument("--output", type=Path, help="write json results to this file, stdout if omitted")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    results = [result for bot_name in args.bot or list(BOTS)
+               for result in benchmark_bot(bot_name, args.ticks, args.warmup, args.real_sleeps,
+                                           args.live_client_latency / 1000, args.state_poll_interval,
+                                           args.telemetry)]
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare champion select tick latency of the sync and async clients against a local mock LCU
+Run with: python -m benchmarks.champ_select_latency
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List, Callable, Tuple
+
+from api.async_client import AsyncClientAPI, SyncClientAPI
+from api.client import ClientAPI
+from benchmarks.mock_server import MockServer
+from common.constants import ChampionIds
+
+CHAMP_SELECT_ROUTES = {
+    ("GET", "/lol-champ-select/v1/session"): {
+        "localPlayerCellId": 0,
+        "timer": {"phase": "BAN_PICK"},
+        "actions": [[{"id": 1, "actorCellId": 0, "completed": True, "type": "ban"}],
+                    [{"id": 2, "actorCellId": 0, "completed": False, "type": "pick",
+                      "isInProgress": True}]],
+    },
+    ("GET", "/lol-champ-select/v1/pickable-champion-ids"): [ChampionIds.YUUMI.value, ChampionIds.NUNU.value],
+    ("GET", "/lol-champ-select/v1/bannable-champion-ids"): [ChampionIds.LUX.value],
+    ("PATCH", "/lol-champ-select/v1/session/actions/1"): {},
+    ("PATCH", "/lol-champ-select/v1/session/actions/2"): {},
+    ("POST", "/lol-champ-select/v1/session/actions/1/complete"): {},
+    ("POST", "/lol-champ-select/v1/session/actions/2/complete"): {},
+}
+
+
+def summarize(name: str, samples: List[float], lock_in_times: List[float]) -> dict:
+    """
+    Summarize tick latencies
+    :param name: client name
+    :param samples: tick latencies in seconds
+    :param lock_in_times: seconds from pick turn start to lock in
+    :return: summary in milliseconds
+    """
+    samples = sorted(samples)
+    return {
+        "client": name,
+        "ticks": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p90_ms": round(samples[int(len(samples) * 0.9) - 1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "lock_in_p50_ms": round(statistics.median(lock_in_times) * 1000, 3),
+    }
+
+
+def measure(tick: Callable[[], None], ticks: int) -> List[float]:
+    samples = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        tick()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def sync_tick(client) -> None:
+    """One champion select loop of a bot"""
+    snapshot = client.get_champ_select_snapshot()
+    client.ban_champion(champs=[ChampionIds.LUX], snapshot=snapshot)
+    client.pick_champion(champs=[ChampionIds.YUUMI], snapshot=snapshot)
+
+
+async def async_tick(client: AsyncClientAPI) -> None:
+    """Same loop on the async client"""
+    snapshot = await client.get_champ_select_snapshot()
+    await asyncio.gather(client.ban_champion(champs=[ChampionIds.LUX], snapshot=snapshot),
+                         client.pick_champion(champs=[ChampionIds.YUUMI], snapshot=snapshot))
+
+
+async def measure_async(port: str, ticks: int) -> Tuple[List[float], List[float]]:
+    client = AsyncClientAPI("http", "127.0.0.1", port, "password")
+    samples = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        await async_tick(client)
+        samples.append(time.perf_counter() - start)
+    await client.close()
+    return samples, client.lock_in_timer.lock_in_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="mock server latency per request in seconds")
+    args = parser.parse_args()
+
+    server = MockServer(CHAMP_SELECT_ROUTES, latency=args.latency)
+    port = str(server.start())
+    sync_client = ClientAPI("http", "127.0.0.1", port, "password")
+    facade = SyncClientAPI("http", "127.0.0.1", port, "password")
+    async_samples, async_lock_ins = asyncio.run(measure_async(port, args.ticks))
+    results = [
+        summarize("sync", measure(lambda: sync_tick(sync_client), args.ticks), sync_client.lock_in_timer.lock_in_times),
+        summarize("async-facade", measure(lambda: sync_tick(facade), args.ticks), facade.lock_in_timer.lock_in_times),
+        summarize("async", async_samples, async_lock_ins),
+    ]
+    facade.loop_thread.run(facade.client.close())
+    server.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Replay a sequence of champion select sessions to a bot and check that it issues every write exactly once.
+Sessions are read from a capture recorded with BotConfig.capture_path, or a built-in draft if omitted.
+Each poll of /lol-champ-select/v1/session serves the next recorded session, the phase leaves champion select
+after the last one. Exits with status 1 if an action, the summoner spells or a trade was written more than once
+or never. With --fail-first-write the first selection of every ban and pick fails, the bot has to lock it in on a
+later poll of the same turn.
+Run with: python -m benchmarks.champ_select_replay --capture capture.jsonl.gz
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from benchmarks.bot_loop import CLIENT_ROUTES, LIVE_CLIENT_ROUTES, Probe, write_client_files
+from benchmarks.mock_server import MockServer, ErrorResponse
+from bot import BOTS, load_bot
+from common.capture import read_capture
+from common.constants import ClientPhases, ChampionIds
+from common.input_backends import RecordingBackend
+from config import BotConfig
+
+SESSION_URL = "/lol-champ-select/v1/session"
+
+
+def _action(id: int, actor_cell_id: int, type: str, completed: bool = False, in_progress: bool = False,
+            champion_id: int = 0) -> Dict[str, Any]:
+    return {"id": id, "actorCellId": actor_cell_id, "type": type, "completed": completed,
+            "isInProgress": in_progress, "championId": champion_id}
+
+
+def _session(phase: str, actions: List[List[Dict[str, Any]]],
+             trades: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    return {"localPlayerCellId": 0, "timer": {"phase": phase}, "actions": actions, "trades": trades or []}
+
+
+def synthetic_sessions() -> List[Dict[str, Any]]:
+    """
+    Draft where every state is polled more than once: local ban, other ban, local pick, other pick, trade offer
+    :return: session bodies in polled order
+    """
+    planning = [_action(1, 0, "ban"), _action(2, 5, "ban")]
+    ban_turn = [_action(1, 0, "ban", in_progress=True), _action(2, 5, "ban")]
+    banned = [_action(1, 0, "ban", completed=True, champion_id=ChampionIds.LUX.value),
+              _action(2, 5, "ban", in_progress=True)]
+    bans_done = [_action(1, 0, "ban", completed=True), _action(2, 5, "ban", completed=True)]
+    pick_turn = [_action(3, 0, "pick", in_progress=True)]
+    picked = [_action(3, 0, "pick", completed=True)]
+    other_pick = [_action(4, 5, "pick", in_progress=True)]
+    trade = {"id": 7, "cellId": 1, "state": "RECEIVED"}
+    return [
+        _session("PLANNING", [planning]),
+        _session("BAN_PICK", [ban_turn]),
+        _session("BAN_PICK", [ban_turn]),
+        _session("BAN_PICK", [banned]),
+        _session("BAN_PICK", [bans_done, pick_turn]),
+        _session("BAN_PICK", [bans_done, pick_turn]),
+        _session("BAN_PICK", [bans_done, picked, other_pick]),
+        _session("BAN_PICK", [bans_done, other_pick, picked]),  # client reordered turns
+        _session("FINALIZATION", [bans_done, picked]),
+        _session("FINALIZATION", [bans_done, picked], [trade]),
+        _session("FINALIZATION", [bans_done, picked], [trade]),
+        _session("FINALIZATION", [bans_done, picked], [dict(trade, state="CANCELLED")]),
+    ]
+
+
+def load_sessions(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read the champion select sessions of a capture
+    :param path: capture file
+    :return: session bodies in recorded order
+    """
+    return [json.loads(record["response"]) for record in read_capture(path)
+            if record.get("method") == "GET" and record.get("url") == SESSION_URL and record.get("status") == 200]
+
+
+class SessionReplay:
+    """Mock LCU routes serving one session per poll and recording the writes of the bot"""
+
+    def __init__(self, sessions: List[Dict[str, Any]], fail_first_write: bool = False):
+        """
+        :param sessions: session bodies in polled order
+        :param fail_first_write: answer the first champion selection of every action with an error status
+        """
+        self.sessions = sessions
+        self.fail_first_write = fail_first_write
+        self.polls = 0
+        self.writes: Counter = Counter()  # successful writes only
+        self.failed: Counter = Counter()
+
+    def phase(self, body) -> str:
+        return ClientPhases.CHAMP_SELECT.value if self.polls < len(self.sessions) else "GameStart"
+
+    def session(self, body) -> Dict[str, Any]:
+        session = self.sessions[min(self.polls, len(self.sessions) - 1)]
+        self.polls += 1
+        return session
+
+    def write(self, method: str, url: str):
+        def record(body):
+            failing = method == "PATCH" and "/actions/" in url
+            if self.fail_first_write and failing and not self.failed[(method, url)]:
+                self.failed[(method, url)] += 1
+                return ErrorResponse(500)
+            self.writes[(method, url)] += 1
+            return {}
+
+        return record
+
+    def routes(self) -> Dict:
+        champion_ids = [champ.value for champ in ChampionIds]
+        routes = {
+            ("GET", "/lol-gameflow/v1/gameflow-phase"): self.phase,
+            ("GET", SESSION_URL): self.session,
+            ("GET", "/lol-champ-select/v1/pickable-champion-ids"): champion_ids,
+            ("GET", "/lol-champ-select/v1/bannable-champion-ids"): champion_ids,
+        }
+        urls = {("PATCH", f"{SESSION_URL}/my-selection"), ("POST", f"{SESSION_URL}/my-selection/reroll")}
+        for session in self.sessions:
+            for turn in session.get("actions", []):
+                for action in turn:
+                    urls.add(("PATCH", f"{SESSION_URL}/actions/{action['id']}"))
+                    urls.add(("POST", f"{SESSION_URL}/actions/{action['id']}/complete"))
+            for trade in session.get("trades", []):
+                urls.add(("POST", f"{SESSION_URL}/trades/{trade['id']}/decline"))
+        routes.update({(method, url): self.write(method, url) for method, url in urls})
+        return routes
+
+    def expected_writes(self) -> Counter:
+        """
+        Writes a bot has to issue: one ban or pick per turn of the local player, spells once, every offer declined
+        :return: count per (method, url), all 1
+        """
+        expected = Counter()
+        for session in self.sessions:
+            cell_id = session.get("localPlayerCellId")
+            for turn in session.get("actions", []):
+                for action in turn:
+                    if action["actorCellId"] == cell_id and action.get("isInProgress") and not action["completed"]:
+                        expected[("PATCH", f"{SESSION_URL}/actions/{action['id']}")] = 1
+                        expected[("POST", f"{SESSION_URL}/actions/{action['id']}/complete")] = 1
+            for trade in session.get("trades", []):
+                if trade.get("state") == "RECEIVED":
+                    expected[("POST", f"{SESSION_URL}/trades/{trade['id']}/decline")] = 1
+            if session.get("timer", {}).get("phase") == "FINALIZATION":
+                expected[("PATCH", f"{SESSION_URL}/my-selection")] = 1
+                expected[("POST", f"{SESSION_URL}/my-selection/reroll")] = 1
+        return expected
+
+
+def replay(bot_name: str, sessions: List[Dict[str, Any]], fail_first_write: bool = False) -> List[str]:
+    """
+    Run the champion select handler of a bot over the sessions
+    :param bot_name: bot name from bot.BOTS
+    :param sessions: session bodies in polled order
+    :param fail_first_write: fail the first champion selection of every action
+    :return: problems found, empty if every write was issued once
+    """
+    session_replay = SessionReplay(sessions, fail_first_write=fail_first_write)
+    lcu = MockServer({**CLIENT_ROUTES, **session_replay.routes()})
+    live_client = MockServer(dict(LIVE_CLIENT_ROUTES))
+    backend = RecordingBackend()
+    probe = Probe(servers=[lcu, live_client], backend=backend)  # skips get_phase's polling delay
+    with tempfile.TemporaryDirectory() as directory, probe.patched():
+        write_client_files(Path(directory), lcu.start())
+        config = BotConfig(lol_base_path=Path(directory), live_client_port=str(live_client.start()),
+                           live_client_protocol="http", watch_lockfile=False, use_client_events=False,
+                           bot_name=bot_name)
+        load_bot(bot_name)(config=config, input_backend=backend).handle_champion_select()
+    lcu.stop()
+    live_client.stop()
+    # Every champion is pickable and bannable, so each expected write has to be issued exactly once
+    problems = []
+    expected = session_replay.expected_writes()
+    for (method, url), count in sorted(session_replay.writes.items()):
+        if count > 1:
+            problems.append(f"{bot_name}: {method} {url} issued {count} times")
+        elif (method, url) not in expected:
+            problems.append(f"{bot_name}: {method} {url} issued out of turn")
+    for (method, url) in sorted(set(expected) - set(session_replay.writes)):
+        problems.append(f"{bot_name}: {method} {url} never issued")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capture", type=Path, help="capture file to read sessions from, built-in draft if omitted")
+    parser.add_argument("--bot", choices=list(BOTS), action="append", help="bot to replay to, every bot if omitted")
+    parser.add_argument("--fail-first-write", action="store_true",
+                        help="fail the first champion selection of every ban and pick")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    sessions = load_sessions(args.capture) if args.capture else synthetic_sessions()
+    if not sessions:
+        sys.exit(f"No champion select sessions in {args.capture}")
+    problems = [problem for bot_name in args.bot or list(BOTS)
+                for problem in replay(bot_name, sessions, fail_first_write=args.fail_first_write)]
+    for problem in problems:
+        print(problem)
+    print(f"Replayed {len(sessions)} sessions, {len(problems)} problems")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
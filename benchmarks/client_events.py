@@ -0,0 +1,265 @@
+"""
+Check the client event subscription against a local stand-in for the League Client, serving the REST routes and the
+WAMP WebSocket on one port as the client does. Checks that get_phase returns published phase changes at once,
+changes() yields events in order, malformed events and failing callbacks keep the subscription, and that after the
+WebSocket drops get_phase serves the current phase, not the one from before, and events arrive again once reconnected
+or once the client restarted on a new port.
+Exits with status 1 if a check failed.
+Run with: python -m benchmarks.client_events --client sync --client async
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Any, Callable, List, Tuple, Optional
+
+import aiohttp
+from aiohttp import web
+
+from api.async_client import SyncClientAPI
+from api.client import ClientAPI
+from api.client_events import ClientEventListener
+from api.credentials import ClientCredentials
+from common.async_request_api import EventLoopThread
+from common.constants import ClientEvents, ClientPhases
+
+
+class WampServer:
+    """Local stand-in for the League Client answering REST routes and publishing WAMP events to subscribers"""
+
+    WAMP_SUBSCRIBE = ClientEventListener.WAMP_SUBSCRIBE
+    WAMP_EVENT = ClientEventListener.WAMP_EVENT
+
+    def __init__(self, phase: str = ClientPhases.LOBBY.value):
+        """
+        :param phase: phase answered to /lol-gameflow/v1/gameflow-phase
+        """
+        self.phase = phase
+        self.routes: Dict[Tuple[str, str], Callable[[], Any]] = {
+            ("GET", "/lol-gameflow/v1/gameflow-phase"): lambda: self.phase,
+            ("GET", "/lol-login/v1/session"): lambda: {"state": "SUCCEEDED"},
+            ("POST", "/lol-login/v1/delete-rso-on-close"): lambda: {},
+        }
+        self.connections = 0
+        self.port = 0
+        self._sockets: Dict[web.WebSocketResponse, set] = {}
+        self._loop_thread = EventLoopThread()
+        self._runner: Optional[web.AppRunner] = None
+
+    def start(self) -> int:
+        """
+        Serve on the server's own event loop thread
+        :return: port the server listens on
+        """
+        return self._loop_thread.run(self._start())
+
+    async def _start(self) -> int:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.port
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        if request.path == "/" and request.headers.get("Upgrade", "").lower() == "websocket":
+            return await self._websocket(request)
+        route = self.routes.get((request.method, request.path))
+        if route is None:
+            return web.json_response({"httpStatus": 404}, status=404)
+        return web.json_response(route())
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        socket = web.WebSocketResponse()
+        await socket.prepare(request)
+        self._sockets[socket] = set()
+        self.connections += 1
+        async for message in socket:
+            if message.type == aiohttp.WSMsgType.TEXT:
+                payload = json.loads(message.data)
+                if payload[0] == self.WAMP_SUBSCRIBE:
+                    self._sockets[socket].add(payload[1])
+        self._sockets.pop(socket, None)
+        return socket
+
+    def subscribers(self, event: ClientEvents) -> int:
+        return sum(event.value in topics for topics in list(self._sockets.values()))
+
+    def send_raw(self, message: str) -> None:
+        """Send a message as is to every connected socket"""
+        async def send():
+            for socket in list(self._sockets):
+                await socket.send_str(message)
+        self._loop_thread.run(send())
+
+    def publish(self, event: ClientEvents, data: Any, event_type: str = "Update") -> None:
+        """
+        Publish an event to its subscribers, a phase event also changes the phase answered over REST
+        :param event: event to publish
+        :param data: event data
+        :param event_type: Create, Update or Delete
+        """
+        if event == ClientEvents.GAMEFLOW_PHASE:
+            self.phase = data
+
+        async def send():
+            for socket, topics in list(self._sockets.items()):
+                if event.value in topics:
+                    await socket.send_str(json.dumps(
+                        [self.WAMP_EVENT, event.value, {"data": data, "eventType": event_type, "uri": ""}]))
+        self._loop_thread.run(send())
+
+    def drop_connections(self) -> None:
+        """Close every WebSocket, e.g. the client hiccuped, the server keeps listening for reconnects"""
+        async def close():
+            for socket in list(self._sockets):
+                await socket.close()
+        self._loop_thread.run(close())
+
+    def stop(self) -> None:
+        """Close every WebSocket and stop serving, e.g. the client exited"""
+        self.drop_connections()  # cleanup waits for open handlers otherwise
+        self._loop_thread.run(self._runner.cleanup())
+        self._loop_thread.stop()
+
+
+def _wait(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def check_client(client_type: str, poll_timeout: float = 3.0) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every check against a fresh stand-in server
+    :param client_type: sync for ClientAPI, async for SyncClientAPI over AsyncClientAPI
+    :param poll_timeout: timeout get_phase is called with, as the bots do
+    :return: check name to result with ok and measured milliseconds
+    """
+    server = WampServer()
+    port = str(server.start())
+    client = ClientAPI("http", "127.0.0.1", port, "stand-in") if client_type == "sync" else \
+        SyncClientAPI("http", "127.0.0.1", port, "stand-in")
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def record(name: str, ok: bool, start: float, **details: Any) -> None:
+        results[name] = {"ok": bool(ok), "ms": round((time.monotonic() - start) * 1000, 1), **details}
+
+    def get_phase_after(publish: Callable[[], None], delay: float = 0.2) -> Tuple[str, float]:
+        client.get_phase(timeout=0)  # catch up on changes of earlier checks, only the published one is waited for
+        timer = threading.Timer(delay, publish)
+        timer.start()
+        start = time.monotonic()
+        phase = client.get_phase(timeout=poll_timeout)
+        elapsed = time.monotonic() - start - delay
+        timer.join()
+        return phase, elapsed
+
+    try:
+        start = time.monotonic()
+        subscribed = client.subscribe_events(timeout=5)
+        events: ClientEventListener = client.events
+        record("subscribe", subscribed and _wait(lambda: server.subscribers(ClientEvents.GAMEFLOW_PHASE), 2) and
+               events.phase == ClientPhases.LOBBY.value, start, phase=events.phase)
+        if not subscribed:
+            return results
+        events.reconnect_delay = 0.5
+
+        start = time.monotonic()
+        phase, latency = get_phase_after(lambda: server.publish(ClientEvents.GAMEFLOW_PHASE,
+                                                                ClientPhases.QUEUE.value))
+        record("get_phase_on_event", phase == ClientPhases.QUEUE.value and latency < poll_timeout / 2, start,
+               phase=phase, latency_ms=round(latency * 1000, 1))
+
+        list(events.changes(timeout=0.1))  # drop what earlier checks left queued
+        start = time.monotonic()
+        session = {"localPlayerCellId": 0, "actions": []}
+        server.publish(ClientEvents.GAMEFLOW_PHASE, ClientPhases.CHAMP_SELECT.value)
+        server.publish(ClientEvents.CHAMP_SELECT_SESSION, session)
+        server.publish(ClientEvents.CHAMP_SELECT_SESSION, None, event_type="Delete")
+        received = list(events.changes(timeout=1))
+        expected = [(ClientEvents.GAMEFLOW_PHASE, ClientPhases.CHAMP_SELECT.value),
+                    (ClientEvents.CHAMP_SELECT_SESSION, session), (ClientEvents.CHAMP_SELECT_SESSION, None)]
+        record("changes_in_order", received == expected, start, received=len(received))
+
+        start = time.monotonic()
+        failures: List[Any] = []
+
+        def failing_callback(data: Any) -> None:
+            failures.append(data)
+            raise ValueError("callback failed")
+
+        events.on(ClientEvents.GAMEFLOW_PHASE, failing_callback)
+        server.send_raw("not json")
+        server.send_raw(json.dumps([ClientEventListener.WAMP_EVENT, "OnJsonApiEvent_unknown", {"data": 1}]))
+        server.send_raw(json.dumps([ClientEventListener.WAMP_EVENT, ClientEvents.GAMEFLOW_PHASE.value, {}]))
+        phase, latency = get_phase_after(lambda: server.publish(ClientEvents.GAMEFLOW_PHASE,
+                                                                ClientPhases.READY_CHECK.value))
+        record("bad_events_keep_subscription", phase == ClientPhases.READY_CHECK.value and events.connected.is_set()
+               and failures == [ClientPhases.READY_CHECK.value] and latency < poll_timeout / 2, start, phase=phase)
+
+        # Phase moves on while the socket is down, no event is ever sent for it
+        start = time.monotonic()
+        server.drop_connections()
+        server.phase = ClientPhases.IN_GAME.value
+        dropped = _wait(lambda: not events.connected.is_set(), 2)
+        phase = client.get_phase(timeout=poll_timeout)
+        record("no_stale_phase_while_disconnected", dropped and phase == ClientPhases.IN_GAME.value, start,
+               phase=phase)
+
+        start = time.monotonic()
+        reconnected = events.connected.wait(5) and _wait(lambda: server.subscribers(ClientEvents.GAMEFLOW_PHASE), 2)
+        phase = client.get_phase(timeout=poll_timeout)  # requested once to seed, events carry changes after
+        record("reseeded_after_reconnect", reconnected and server.connections == 2 and
+               phase == ClientPhases.IN_GAME.value and events.phase == ClientPhases.IN_GAME.value, start, phase=phase)
+
+        start = time.monotonic()
+        phase, latency = get_phase_after(lambda: server.publish(ClientEvents.GAMEFLOW_PHASE,
+                                                                ClientPhases.END_OF_GAME.value))
+        record("events_after_reconnect", phase == ClientPhases.END_OF_GAME.value and latency < poll_timeout / 2,
+               start, phase=phase, latency_ms=round(latency * 1000, 1))
+
+        # Client restarted on a new port, the credential watcher swaps credentials
+        start = time.monotonic()
+        server.stop()
+        server = WampServer(phase=ClientPhases.LOBBY.value)
+        client.update_credentials(ClientCredentials(port=str(server.start()), password="stand-in", protocol="http"))
+        resubscribed = _wait(lambda: client.events.connected.is_set() and
+                             server.subscribers(ClientEvents.GAMEFLOW_PHASE), 5)
+        first = time.monotonic()
+        phase = client.get_phase(timeout=poll_timeout)
+        record("resubscribed_after_restart", resubscribed and phase == ClientPhases.LOBBY.value and
+               time.monotonic() - first < poll_timeout / 2, start, phase=phase)
+    finally:
+        if client.events:
+            client.events.stop()
+        if isinstance(client, SyncClientAPI):
+            client.close()
+            client.loop_thread.stop()
+        server.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--client", choices=("sync", "async"), action="append", help="client to check, both if omitted")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    results = {client_type: check_client(client_type) for client_type in args.client or ["sync", "async"]}
+    print(json.dumps(results, indent=2))
+    failed = [f"{client_type}.{name}" for client_type, checks in results.items()
+              for name, result in checks.items() if not result["ok"]]
+    sys.exit(1 if failed or any(len(checks) < 8 for checks in results.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
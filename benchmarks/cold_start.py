@@ -0,0 +1,95 @@
+"""
+Measure cold start of the bots: a fresh interpreter per run imports a bot module, then creates the bot with the
+noop input backend against a local mock client. Fails if a platform input module or another lazily loaded
+dependency got imported on the way.
+Run with: python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from benchmarks.mock_server import MockServer
+from bot import BOTS, load_bot
+from config import BotConfig
+
+# Modules only imported once used: input backends on Win32Backend creation, aiohttp with use_async_client,
+# websocket on subscribe_events and numpy with minimap_vision
+LAZY_MODULES = ("pyautogui", "win32gui", "win32api", "keyboard", "mouse", "aiohttp", "websocket", "numpy")
+
+# Requests BaseBot makes while it is created
+CLIENT_ROUTES = {
+    ("GET", "/lol-login/v1/session"): {"state": "SUCCEEDED"},
+    ("POST", "/lol-login/v1/delete-rso-on-close"): {},
+}
+
+
+def child(bot_name: str) -> Dict[str, Any]:
+    """
+    Import and create a bot in this interpreter
+    :param bot_name: bot name from bot.BOTS
+    :return: import and construction time in ms and lazy modules that were imported
+    """
+    start = time.perf_counter()
+    bot_class = load_bot(bot_name)
+    imported = time.perf_counter()
+
+    lcu = MockServer(CLIENT_ROUTES)
+    with tempfile.TemporaryDirectory() as directory:
+        # Stand in for the League install, see benchmarks.bot_loop.write_client_files
+        (Path(directory) / "Config").mkdir()
+        (Path(directory) / "Config" / "game.cfg").write_text("[General]\n[HUD]\n[ItemShop]\n")
+        (Path(directory) / "lockfile").write_text(f"LeagueClient:0:{lcu.start()}:benchmark:http")
+        config = BotConfig(lol_base_path=Path(directory), watch_lockfile=False, use_client_events=False,
+                           warm_up_live_client=False, input_backend="noop", bot_name=bot_name)
+        construct_start = time.perf_counter()
+        bot_class(config=config)
+        constructed = time.perf_counter()
+    lcu.stop()
+    return {"import_ms": (imported - start) * 1000, "construct_ms": (constructed - construct_start) * 1000,
+            "lazy_modules_loaded": [module for module in LAZY_MODULES if module in sys.modules]}
+
+
+def measure(bot_name: str, runs: int) -> Dict[str, Any]:
+    """
+    Start a fresh interpreter per run
+    :param bot_name: bot name from bot.BOTS
+    :param runs: interpreters to start
+    :return: summary in milliseconds
+    """
+    samples: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.cold_start", "--child", bot_name],
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "bot": bot_name,
+        "runs": runs,
+        **{f"{key}_p50": round(statistics.median(sample[key] for sample in samples), 1)
+           for key in ("import_ms", "construct_ms")},
+        "lazy_modules_loaded": sorted({module for sample in samples for module in sample["lazy_modules_loaded"]}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bot", choices=list(BOTS), action="append", help="bot to measure, every bot if omitted")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=list(BOTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child(args.child)))
+        return
+
+    results = [measure(bot_name, args.runs) for bot_name in args.bot or list(BOTS)]
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if any(result["lazy_modules_loaded"] for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Check the minimap analyzer against screenshot fixtures and measure its throughput on one core.
+Fixtures are .npz files holding a minimap screenshot as "frame" and the expected icon centers as "allies" and
+"enemies" and camera box as "camera", in fractions of the minimap size. Captures of real games in
+benchmarks/fixtures/minimap are checked together with stand-ins rendered on every run from fresh seeds: minimaps drawn
+at twice their size and scaled down, blurred and noised like a screen capture, so borders and the camera box are
+blended pixels. --seed renders the stand-ins of a reported run again. With --rendered, seeded minimaps with flat
+marker colors are checked instead.
+--record grabs minimaps from a running game into .npz files, labeled with what the analyzer found. Correct the
+labels before adding them to the fixtures.
+Exits with status 1 if an icon or the camera box was missed or misplaced, or a frame took longer than --budget-ms.
+Run with: python -m benchmarks.minimap_vision --frames 500
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+from common.constants import ScreenRegionRatios
+from common.minimap import MinimapAnalyzer, MinimapObservation, Point
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures" / "minimap"
+ICON_RADIUS = 11
+BORDER_WIDTH = 2
+# Border shades of the stand-ins, jittered per icon and blended with their surroundings once scaled down
+ALLY_SHADES = ((47, 128, 205), (62, 150, 230), (28, 118, 196), (70, 160, 240))
+ENEMY_SHADES = ((205, 52, 46), (226, 38, 55), (190, 60, 58), (240, 70, 70))
+
+
+def _draw_icon(frame: np.ndarray, center: Tuple[int, int], border: Tuple[int, int, int],
+               rng: np.random.Generator) -> None:
+    ys, xs = np.ogrid[:frame.shape[0], :frame.shape[1]]
+    distance = np.sqrt((xs - center[0]) ** 2 + (ys - center[1]) ** 2)
+    portrait = distance < ICON_RADIUS - BORDER_WIDTH
+    frame[portrait] = rng.integers(40, 160, size=(int(portrait.sum()), 3))
+    frame[(distance >= ICON_RADIUS - BORDER_WIDTH) & (distance < ICON_RADIUS)] = border
+
+
+def render_minimap(seed: int, size: int = 200, allies: int = 4, enemies: int = 3) -> Dict[str, Any]:
+    """
+    Render a minimap with known icon and camera positions
+    :param seed: random seed, the same seed renders the same minimap
+    :param size: minimap width and height in pixels
+    :param allies: ally icons drawn
+    :param enemies: enemy icons drawn
+    :return: fixture dict with frame, allies, enemies and camera
+    """
+    rng = np.random.default_rng(seed)
+    frame = np.empty((size, size, 3), dtype=np.uint8)
+    frame[..., 0] = rng.integers(25, 80, size=(size, size))
+    frame[..., 1] = rng.integers(60, 120, size=(size, size))
+    frame[..., 2] = rng.integers(25, 70, size=(size, size))
+    ys, xs = np.ogrid[:size, :size]
+    frame[np.abs(xs - ys) < size // 20] = (20, 60, 95)  # river, darker than ally borders
+
+    # Icons keep a radius of room to each other, overlapping icons are found as one
+    centers: List[Tuple[int, int]] = []
+    while len(centers) < allies + enemies:
+        center = tuple(int(value) for value in rng.integers(ICON_RADIUS, size - ICON_RADIUS, size=2))
+        if all((center[0] - x) ** 2 + (center[1] - y) ** 2 > (3 * ICON_RADIUS) ** 2 for x, y in centers):
+            centers.append(center)
+    for index, center in enumerate(centers):
+        _draw_icon(frame, center, (30, 150, 230) if index < allies else (220, 40, 40), rng)
+
+    width, height = int(size * 0.3), int(size * 0.22)
+    left, top = (int(value) for value in rng.integers(0, size - width, size=2))
+    frame[top, left:left + width] = frame[top + height, left:left + width] = 255
+    frame[top:top + height + 1, left] = frame[top:top + height + 1, left + width] = 255
+    return {
+        "frame": frame,
+        "allies": np.array(centers[:allies], dtype=float) / size,
+        "enemies": np.array(centers[allies:], dtype=float) / size,
+        "camera": np.array([left, top, left + width, top + height], dtype=float) / size,
+    }
+
+
+def _smooth_noise(rng: np.random.Generator, size: int, cells: int, low: float, high: float) -> np.ndarray:
+    # Bilinear upsampling of a coarse random grid, terrain and portraits vary smoothly
+    grid = rng.uniform(low, high, size=(cells + 1, cells + 1))
+    coords = np.linspace(0, cells, size)
+    index = np.minimum(coords.astype(int), cells - 1)
+    weight = coords - index
+    top = grid[index][:, index] * (1 - weight) + grid[index][:, index + 1] * weight
+    bottom = grid[index + 1][:, index] * (1 - weight) + grid[index + 1][:, index + 1] * weight
+    return top * (1 - weight[:, None]) + bottom * weight[:, None]
+
+
+def render_stand_in(seed: int, size: int = 256, allies: int = 4, enemies: int = 4, scale: int = 2) -> Dict[str, Any]:
+    """
+    Render a minimap the way a screen capture shows it: drawn at a larger scale with lanes, river, towers and shaded
+    icon borders, then scaled down, blurred and noised
+    :param seed: random seed, the same seed renders the same minimap
+    :param size: minimap width and height in pixels
+    :param allies: ally icons drawn
+    :param enemies: enemy icons drawn
+    :param scale: factor the minimap is drawn larger by
+    :return: fixture dict with frame, allies, enemies and camera
+    """
+    rng = np.random.default_rng(seed)
+    big = size * scale
+    frame = np.empty((big, big, 3), dtype=float)
+    for channel, (low, high) in enumerate(((25, 75), (55, 115), (25, 65))):
+        frame[..., channel] = _smooth_noise(rng, big, 8, low, high) + rng.normal(0, 6, size=(big, big))
+    ys, xs = np.ogrid[:big, :big]
+    frame[np.abs(xs + ys - big) < big // 18] = (38, 72, 98)  # river
+    margin = big // 12
+    for lane in (np.abs(xs - margin) < 3 * scale, np.abs(ys - margin) < 3 * scale,
+                 np.abs(xs - (big - margin)) < 3 * scale, np.abs(ys - (big - margin)) < 3 * scale,
+                 np.abs(xs - ys) < 3 * scale):
+        frame[np.broadcast_to(lane, (big, big))] = (112, 96, 64)
+    # Towers in team colors, smaller than an icon border
+    for index in range(10):
+        x, y = rng.integers(4 * scale, big - 4 * scale, size=2)
+        frame[y - 2 * scale:y + 2 * scale, x - 2 * scale:x + 2 * scale] = \
+            ALLY_SHADES[0] if index % 2 else ENEMY_SHADES[0]
+
+    radius, border = ICON_RADIUS * scale, int(2.5 * scale)
+    # Icons keep a radius of room to each other like render_minimap, closer icons are found as one
+    centers: List[Tuple[int, int]] = []
+    while len(centers) < allies + enemies:
+        center = tuple(int(value) for value in rng.integers(radius, big - radius, size=2))
+        if all((center[0] - x) ** 2 + (center[1] - y) ** 2 > (3 * radius) ** 2 for x, y in centers):
+            centers.append(center)
+    for index, (x, y) in enumerate(centers):
+        shades = ALLY_SHADES if index < allies else ENEMY_SHADES
+        window = np.s_[y - radius:y + radius + 1, x - radius:x + radius + 1]
+        distance = np.sqrt((xs - x) ** 2 + (ys - y) ** 2)[window]
+        portrait = distance < radius - border
+        patch = _smooth_noise(rng, 2 * radius + 1, 3, 30, 165)
+        for channel in range(3):
+            shade = np.clip(patch * rng.uniform(0.6, 1.1) + rng.normal(0, 10, size=patch.shape), 0, 165)
+            frame[window][..., channel][portrait] = shade[portrait]
+        frame[window][(distance >= radius - border) & (distance < radius)] = \
+            np.array(shades[rng.integers(len(shades))], dtype=float) * rng.uniform(0.9, 1.05)
+
+    width, height = int(big * 0.3), int(big * 0.22)
+    left, top = (int(value) for value in rng.integers(0, big - width, size=2))
+    line = int(1.5 * scale)
+    right, bottom = left + width, top + height
+    for edge in (np.s_[top:top + line, left:right + line], np.s_[bottom:bottom + line, left:right + line],
+                 np.s_[top:bottom + line, left:left + line], np.s_[top:bottom + line, right:right + line]):
+        frame[edge] = frame[edge] * 0.12 + 235 * 0.88
+
+    small = frame.reshape(size, scale, size, scale, 3).mean(axis=(1, 3))
+    blurred = small.copy()
+    blurred[1:-1, 1:-1] = (small[1:-1, 1:-1] * 4 + small[:-2, 1:-1] + small[2:, 1:-1] + small[1:-1, :-2]
+                           + small[1:-1, 2:]) / 8
+    offset = line / 2
+    return {
+        "frame": np.clip(blurred + rng.normal(0, 3, size=blurred.shape), 0, 255).astype(np.uint8),
+        "allies": np.array(centers[:allies], dtype=float) / big,
+        "enemies": np.array(centers[allies:], dtype=float) / big,
+        "camera": np.array([left + offset, top + offset, right + offset, bottom + offset]) / big,
+    }
+
+
+def render_stand_ins(count: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Render stand-in fixtures
+    :param count: stand-ins to render
+    :param seed: seed of the first stand-in, the others follow it
+    :return: fixture dicts named by their seed
+    """
+    return [dict(render_stand_in(seed + index), name=f"stand-in-{seed + index}") for index in range(count)]
+
+
+def record(directory: Path, count: int, interval: float) -> None:
+    """
+    Grab minimaps of a running game and label them with what the analyzer found
+    :param directory: directory to write .npz files to
+    :param count: minimaps to grab
+    :param interval: seconds between grabs
+    """
+    from common.window_manager import WindowManager  # needs the game window and a platform input backend
+    window_manager = WindowManager("League of Legends (TM) Client")
+    analyzer = MinimapAnalyzer()
+    directory.mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        frame = window_manager.grab(ScreenRegionRatios.MINIMAP.value)
+        if frame is None:
+            sys.exit("Game window not found")
+        observation = analyzer.analyze(frame)
+        np.savez_compressed(directory / f"capture-{int(time.time())}-{index}.npz", frame=frame,
+                            allies=np.array(observation.allies, dtype=float).reshape(-1, 2),
+                            enemies=np.array(observation.enemies, dtype=float).reshape(-1, 2),
+                            camera=np.array(observation.camera or (0, 0, 0, 0), dtype=float))
+        time.sleep(interval)
+
+
+def load_fixtures(directory: Path) -> List[Dict[str, Any]]:
+    """
+    Read stored screenshot fixtures
+    :param directory: directory of .npz fixtures
+    :return: fixture dicts sorted by file name, empty if the directory does not exist
+    """
+    fixtures = []
+    for path in sorted(directory.glob("*.npz")):
+        with np.load(path) as data:
+            fixtures.append({key: data[key] for key in data.files} | {"name": path.name})
+    return fixtures
+
+
+def _matched(found: Tuple[Point, ...], expected: np.ndarray, tolerance: float) -> bool:
+    if len(found) != len(expected):
+        return False
+    return all(min(abs(x - ex) + abs(y - ey) for x, y in found) <= tolerance for ex, ey in expected)
+
+
+def check(analyzer: MinimapAnalyzer, fixture: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare an observation of a fixture with its expected positions
+    :param analyzer: analyzer to check
+    :param fixture: fixture dict
+    :param tolerance: allowed distance, fraction of the minimap size summed over both axes
+    :return: problems found, empty if none
+    """
+    observation: MinimapObservation = analyzer.analyze(fixture["frame"])
+    problems = []
+    for side in ("allies", "enemies"):
+        found = getattr(observation, side)
+        if not _matched(found, fixture[side], tolerance):
+            problems.append(f"{side} expected {np.round(fixture[side], 3).tolist()} "
+                            f"found {[tuple(round(value, 3) for value in icon) for icon in found]}")
+    camera: Optional[Tuple[float, ...]] = observation.camera
+    if camera is None or np.abs(np.array(camera) - fixture["camera"]).max() > tolerance:
+        problems.append(f"camera expected {np.round(fixture['camera'], 3).tolist()} found {camera}")
+    return problems
+
+
+def throughput(analyzer: MinimapAnalyzer, frames: List[np.ndarray], runs: int) -> Dict[str, float]:
+    """
+    Analyze frames one after another
+    :param analyzer: analyzer to measure
+    :param frames: frames analyzed in turn
+    :param runs: frames analyzed in total
+    :return: per frame time percentiles in ms and frames per second
+    """
+    samples = []
+    for index in range(runs):
+        start = time.perf_counter()
+        analyzer.analyze(frames[index % len(frames)])
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)], 3),
+        "frames_per_second": round(1000 / statistics.fmean(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_PATH, help="directory of .npz game captures")
+    parser.add_argument("--stand-ins", type=int, default=8, help="stand-ins rendered and checked with the captures")
+    parser.add_argument("--seed", type=int, help="seed of the first stand-in, random if omitted")
+    parser.add_argument("--rendered", type=int, default=0, help="check this many flat colored renders instead")
+    parser.add_argument("--record", type=Path, help="grab minimaps of a running game to this directory and exit")
+    parser.add_argument("--count", type=int, default=10, help="minimaps grabbed with --record")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between grabs of --record")
+    parser.add_argument("--frames", type=int, default=500, help="frames analyzed per step for throughput")
+    parser.add_argument("--step", type=int, action="append", help="downsampling steps to measure, 1 and 2 if omitted")
+    parser.add_argument("--tolerance", type=float, default=0.03)
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="p99 time per frame of the default step")
+    args = parser.parse_args()
+    if args.record:
+        return record(args.record, args.count, args.interval)
+
+    seed = args.seed if args.seed is not None else int(np.random.default_rng().integers(2 ** 31))
+    captures = [] if args.rendered else load_fixtures(args.fixtures)
+    fixtures = [dict(render_minimap(index), name=f"seed-{index}") for index in range(args.rendered)] if args.rendered \
+        else captures + render_stand_ins(args.stand_ins, seed)
+    if not fixtures:
+        sys.exit(f"No fixtures in {args.fixtures} and no stand-ins")
+    problems = {fixture["name"]: check(MinimapAnalyzer(), fixture, args.tolerance) for fixture in fixtures}
+    problems = {name: found for name, found in problems.items() if found}
+    results = {step: throughput(MinimapAnalyzer(step=step), [fixture["frame"] for fixture in fixtures], args.frames)
+               for step in args.step or [1, 2]}
+    print(json.dumps({"captures": len(captures), "stand_ins": len(fixtures) - len(captures), "seed": seed,
+                      "problems": problems,
+                      "throughput": {f"step_{step}": result for step, result in results.items()}}, indent=2))
+    default_step = MinimapAnalyzer().step
+    over_budget = default_step in results and results[default_step]["p99_ms"] > args.budget_ms
+    sys.exit(1 if problems or over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Tuple, Any, Callable, Union
+
+Route = Union[Any, Callable[[Dict[str, Any]], Any]]
+
+
+class ErrorResponse:
+    """Route result answered with an error status instead of 200"""
+
+    def __init__(self, status: int, payload: Any = None):
+        self.status = status
+        self.payload = payload if payload is not None else {"httpStatus": status}
+
+
+class MockServer:
+    """Local HTTP server answering canned JSON per route, stands in for the LCU or the Live Client API"""
+
+    def __init__(self, routes: Dict[Tuple[str, str], Route], latency: float = 0.0, port: int = 0):
+        """
+        :param routes: (method, path) to response body, or to a callable taking the request body
+        :param latency: seconds every response is delayed by
+        :param port: port to listen on, random free port if 0
+        """
+        self.routes = routes
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            wbufsize = 1 << 16  # headers and body leave in one write
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                with server._lock:
+                    server.request_count += 1
+                route = server.routes.get((self.command, self.path.split("?")[0]))
+                if server.latency:
+                    time.sleep(server.latency)
+                if route is None:
+                    status, payload = 404, {"errorCode": "RPC_ERROR", "httpStatus": 404}
+                else:
+                    status, payload = 200, route(body) if callable(route) else route
+                    if isinstance(payload, ErrorResponse):
+                        status, payload = payload.status, payload.payload
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> int:
+        """
+        Serve in a background thread
+        :return: port the server listens on
+        """
+        threading.Thread(target=self._server.serve_forever, daemon=True, name=f"mock-{self.port}").start()
+        return self.port
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
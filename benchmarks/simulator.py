@@ -0,0 +1,580 @@
+"""
+Plays whole games against a bot headless on a virtual clock: a local server stands in for the LCU and the Live Client
+API, follows a scripted game and answers the bot's requests and shop input the way the client would.
+Sleeps, timers and timeouts of the bot jump the virtual clock forward, a 15 minute game plays in under a minute.
+Run with: python -m benchmarks.simulator --bot yuumi --games 2
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Any
+
+from common import clock
+from common.clock import VirtualClock
+from common.constants import ClientPhases, ChampionIds, GameEvents
+from common.input_backends import NoopBackend
+from common.item_catalog import ItemCatalog, load_catalog
+from common.process_tracker import ProcessTracker
+from common.purchase_planner import PurchasePlanner
+from common.utils import set_process_tracker
+
+logger = logging.getLogger(__name__)
+
+GAME_PROCESS_NAME = "League of Legends.exe"
+SUMMONER_NAME = "Simulated"
+LOCAL_CELL_ID = 0
+OTHER_CELL_ID = 5
+SESSION_URL = "/lol-champ-select/v1/session"
+
+
+@dataclass
+class GameScript:
+    """Dataclass containing timings and events of one simulated game, times in seconds"""
+    queue_time: float = 30.0  # matchmaking till ready check
+    planning_time: float = 5.0  # champion select planning before the first ban
+    turn_time: float = 5.0  # taken by other players per ban or pick
+    turn_limit: float = 30.0  # a local turn not completed by then is missed and completed by the client
+    finalization_time: float = 30.0
+    trade_offer: Optional[float] = 5.0  # into finalization, None for no trade offer
+    loading_time: float = 60.0  # game process runs, Live Client API not up yet
+    duration: float = 900.0  # game time of the GameEnd event
+    exit_delay: float = 5.0  # GameEnd till game process exit
+    starting_gold: float = 500.0
+    gold_per_second: float = 2.0
+    max_health: float = 1000.0
+    damage_per_second: float = 4.0  # lost while alive since the last respawn or recall
+    deaths: Tuple[float, ...] = (300.0, 600.0)  # game times the player dies at
+    respawn_time: float = 30.0
+    recall_time: float = 8.0
+    result: str = "Win"
+
+
+@dataclass
+class SimulationReport:
+    """Dataclass containing the outcome of a simulation"""
+    bot: str
+    games: int = 0
+    virtual_seconds: float = 0.0
+    real_seconds: float = 0.0
+    requests: int = 0
+    purchases: List[str] = field(default_factory=list)
+    failed_purchases: int = 0
+    recalls: int = 0
+    deaths: int = 0
+    missed_turns: int = 0
+    declined_trades: int = 0
+    summoner_spells: int = 0
+
+
+class SimulationFinished(Exception):
+    """Raised from the bot's next sleep once the simulation finished, ends BaseBot.main_loop"""
+
+
+class SimulationClock(VirtualClock):
+    """VirtualClock that stops the bot once the simulation finished or ran out of virtual time"""
+
+    def __init__(self, finished: threading.Event, limit: float):
+        """
+        :param finished: set once the simulation finished
+        :param limit: virtual seconds after which the simulation is stopped
+        """
+        super().__init__()
+        self.finished = finished
+        self.limit = limit
+
+    def sleep(self, seconds: float) -> None:
+        if self.monotonic() >= self.limit:
+            self.finished.set()
+        if self.finished.is_set():
+            raise SimulationFinished()
+        super().sleep(seconds)
+
+
+class GameSimulator:
+    """Client and game state of a scripted game, advanced by the virtual clock as requests come in"""
+
+    def __init__(self, script: GameScript, games: int, catalog: ItemCatalog, report: SimulationReport):
+        """
+        :param script: timings and events of every game
+        :param games: games to play till the simulation finishes
+        :param catalog: shop the bot's purchases are made in
+        :param report: report updated as the games go on
+        """
+        self.script = script
+        self.games = games
+        self.catalog = catalog
+        self.report = report
+        self.planner = PurchasePlanner(catalog)
+        self.items_by_name = {item.name: item for item in catalog.items.values()}
+        self.finished = threading.Event()
+        self.process = SimulatedProcess(self)
+        self._lock = threading.RLock()
+        self.phase = ClientPhases.NONE.value
+        self.phase_started = 0.0
+        self._new_game()
+
+    def _new_game(self) -> None:
+        self.actions: List[Dict[str, Any]] = [
+            {"id": 1, "actorCellId": LOCAL_CELL_ID, "type": "ban", "championId": 0},
+            {"id": 2, "actorCellId": OTHER_CELL_ID, "type": "ban", "championId": 0},
+            {"id": 3, "actorCellId": LOCAL_CELL_ID, "type": "pick", "championId": 0},
+            {"id": 4, "actorCellId": OTHER_CELL_ID, "type": "pick", "championId": 0},
+        ]
+        self.turn = 0
+        self.turn_started = 0.0
+        self.finalization_started: Optional[float] = None
+        self.trade_state: Optional[str] = None
+        self.game_started: Optional[float] = None  # virtual time of game time 0
+        self.process_running = False
+        self.gold_spent = 0.0
+        self.inventory: List[int] = []
+        self.healed_at = 0.0  # game time health was last full
+        self.recall_at: Optional[float] = None
+        self.attached = False
+        self.duration = self.script.duration  # shortened if the bot kills the game
+        self.exit_delay = self.script.exit_delay
+
+    def _set_phase(self, phase: ClientPhases, at: float) -> None:
+        logger.debug(f"Simulated phase {phase.value} at {at:.1f}")
+        self.phase = phase.value
+        self.phase_started = at
+
+    def game_time(self) -> float:
+        return clock.monotonic() - self.game_started if self.game_started is not None else 0.0
+
+    def advance(self) -> None:
+        """Apply every scripted change due by the current virtual time"""
+        with self._lock:
+            now = clock.monotonic()
+            script = self.script
+            if self.phase == ClientPhases.QUEUE.value and now >= self.phase_started + script.queue_time:
+                self._set_phase(ClientPhases.READY_CHECK, self.phase_started + script.queue_time)
+            if self.phase == ClientPhases.CHAMP_SELECT.value:
+                self._advance_champ_select(now)
+            if self.phase == "GameStart" and now >= self.phase_started + script.loading_time:
+                self.game_started = self.phase_started + script.loading_time
+                self._set_phase(ClientPhases.IN_GAME, self.game_started)
+            if self.game_started is not None:
+                self._advance_game(now - self.game_started)
+
+    def _advance_champ_select(self, now: float) -> None:
+        script = self.script
+        while self.turn < len(self.actions) and now >= self.turn_started:
+            action = self.actions[self.turn]
+            if action["actorCellId"] == LOCAL_CELL_ID:
+                if now < self.turn_started + script.turn_limit:
+                    return
+                logger.info(f"Simulated {action['type']} turn missed")
+                self.report.missed_turns += 1
+                self._complete_turn(self.turn_started + script.turn_limit)
+            elif now >= self.turn_started + script.turn_time:
+                self._complete_turn(self.turn_started + script.turn_time)
+            else:
+                return
+        if self.finalization_started is None:
+            self.finalization_started = self.turn_started
+        if script.trade_offer is not None and self.trade_state is None and \
+                now >= self.finalization_started + script.trade_offer:
+            self.trade_state = "RECEIVED"
+        if now >= self.finalization_started + script.finalization_time:
+            self.trade_state = None
+            self._set_phase_game_start(self.finalization_started + script.finalization_time)
+
+    def _set_phase_game_start(self, at: float) -> None:
+        self.phase = "GameStart"  # loading screen, not in ClientPhases as the bots only wait it out
+        self.phase_started = at
+        self.process_running = True
+
+    def _complete_turn(self, at: float) -> None:
+        self.actions[self.turn]["completed"] = True
+        self.turn += 1
+        self.turn_started = at
+
+    def _advance_game(self, game_time: float) -> None:
+        script = self.script
+        if self.recall_at is not None and game_time >= self.recall_at + script.recall_time:
+            if self._dead_at(self.recall_at, game_time) is None:
+                self.healed_at = self.recall_at + script.recall_time
+                self.report.recalls += 1
+            self.recall_at = None
+        if self.process_running and game_time >= self.duration + self.exit_delay:
+            self.process_running = False
+            self.game_started = None
+            self._set_phase(ClientPhases.END_OF_GAME, clock.monotonic())
+            self.report.deaths += len([death for death in script.deaths if death < self.duration])
+            self.process.exited()
+
+    def _dead_at(self, start: float, end: float) -> Optional[float]:
+        """
+        :return: respawn time of a death between start and end, None if alive throughout
+        """
+        for death in self.script.deaths:
+            if start <= death + self.script.respawn_time and death <= end:
+                return death + self.script.respawn_time
+        return None
+
+    def _events(self, game_time: float) -> List[Dict[str, Any]]:
+        script = self.script
+        events = [(0.0, {"EventName": GameEvents.GAME_START.value})]
+        events += [(death, {"EventName": GameEvents.CHAMPION_KILL.value, "VictimName": f"{SUMMONER_NAME}#SIM",
+                            "KillerName": "Enemy"}) for death in script.deaths if death < self.duration]
+        events.append((self.duration, {"EventName": GameEvents.GAME_END.value, "Result": script.result}))
+        return [dict(event, EventID=index, EventTime=at)
+                for index, (at, event) in enumerate(sorted(events, key=lambda entry: entry[0])) if at <= game_time]
+
+    def _health(self, game_time: float) -> Tuple[float, bool, float]:
+        """
+        :return: current health, whether dead and respawn timer
+        """
+        respawn = self._dead_at(game_time, game_time)
+        if respawn is not None:
+            return 0.0, True, respawn - game_time
+        healed_at = max([self.healed_at] + [death + self.script.respawn_time for death in self.script.deaths
+                                            if death + self.script.respawn_time <= game_time])
+        health = self.script.max_health - self.script.damage_per_second * (game_time - healed_at)
+        return max(health, 1.0), False, 0.0
+
+    def gold(self) -> float:
+        return self.script.starting_gold + self.script.gold_per_second * self.game_time() - self.gold_spent
+
+    def all_game_data(self) -> Dict[str, Any]:
+        game_time = self.game_time()
+        health, dead, respawn_timer = self._health(game_time)
+        if dead:
+            self.attached = False
+        items = [{"itemID": item_id, "displayName": self.catalog[item_id].name, "slot": slot}
+                 for slot, item_id in enumerate(self.inventory)]
+        return {
+            "activePlayer": {
+                "summonerName": f"{SUMMONER_NAME}#SIM",
+                "currentGold": self.gold(),
+                "championStats": {"maxHealth": self.script.max_health, "currentHealth": health},
+                "abilities": {"W": {"displayName": "Change of Plan" if self.attached else "You and Me!"}},
+            },
+            "allPlayers": [{"summonerName": f"{SUMMONER_NAME}#SIM", "team": "ORDER", "isDead": dead,
+                            "respawnTimer": respawn_timer, "items": items}],
+            "events": {"Events": self._events(game_time)},
+        }
+
+    def champ_select_session(self) -> Dict[str, Any]:
+        actions = [dict(action, completed=action.get("completed", False), isInProgress=index == self.turn)
+                   for index, action in enumerate(self.actions)]
+        return {
+            "localPlayerCellId": LOCAL_CELL_ID,
+            "timer": {"phase": "PLANNING" if self.turn == 0 and clock.monotonic() < self.turn_started else
+                      "BAN_PICK" if self.turn < len(self.actions) else "FINALIZATION"},
+            "actions": [actions[:2], actions[2:]],
+            "trades": [{"id": 1, "cellId": 1, "state": self.trade_state}] if self.trade_state else [],
+        }
+
+    def handle(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        """
+        Answer a request of the bot
+        :param method: http method
+        :param path: path without query
+        :param body: decoded json body, None if empty
+        :return: status and json payload
+        """
+        self.advance()
+        with self._lock:
+            self.report.requests += 1
+            now = clock.monotonic()
+            in_game = self.game_started is not None and self.phase == ClientPhases.IN_GAME.value
+            if path.startswith("/liveclientdata/"):
+                if not in_game:
+                    return 404, {"errorCode": "RESOURCE_NOT_FOUND", "httpStatus": 404}
+                if path == "/liveclientdata/allgamedata":
+                    return 200, self.all_game_data()
+                return 200, {"gameTime": self.game_time()}
+            if (method, path) == ("GET", "/lol-login/v1/session"):
+                return 200, {"state": "SUCCEEDED"}
+            if (method, path) == ("GET", "/lol-gameflow/v1/gameflow-phase"):
+                return 200, self.phase
+            if (method, path) == ("GET", "/lol-end-of-game/v1/eog-stats-block"):
+                if self.phase != ClientPhases.END_OF_GAME.value:
+                    return 404, {"errorCode": "RPC_ERROR", "httpStatus": 404}
+                won = self.script.result == "Win"
+                return 200, {"teams": [{"isPlayerTeam": True, "isWinningTeam": won},
+                                       {"isPlayerTeam": False, "isWinningTeam": not won}]}
+            if (method, path) == ("GET", "/lol-lobby/v2/lobby"):
+                return 200, {"canStartActivity": self.phase == ClientPhases.LOBBY.value}
+            if (method, path) == ("GET", "/lol-lobby/v2/lobby/matchmaking/search-state"):
+                return 200, {"errors": []}
+            if (method, path) == ("POST", "/lol-lobby/v2/lobby") and self.phase == ClientPhases.NONE.value:
+                self._set_phase(ClientPhases.LOBBY, now)
+            elif (method, path) == ("POST", "/lol-lobby/v2/lobby/matchmaking/search") and \
+                    self.phase == ClientPhases.LOBBY.value:
+                self._set_phase(ClientPhases.QUEUE, now)
+            elif (method, path) == ("POST", "/lol-matchmaking/v1/ready-check/accept") and \
+                    self.phase == ClientPhases.READY_CHECK.value:
+                self._set_phase(ClientPhases.CHAMP_SELECT, now)
+                self.turn_started = now + self.script.planning_time
+            elif (method, path) == ("POST", "/lol-end-of-game/v1/state/dismiss-stats") and \
+                    self.phase == ClientPhases.END_OF_GAME.value:
+                self.report.games += 1
+                logger.info(f"Simulated game {self.report.games} of {self.games} done")
+                self._new_game()
+                self._set_phase(ClientPhases.NONE, now)
+                if self.report.games >= self.games:
+                    self.finished.set()
+            elif path.startswith("/lol-champ-select/"):
+                return self._handle_champ_select(method, path, body)
+            return 200, {}
+
+    def _handle_champ_select(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        if self.phase != ClientPhases.CHAMP_SELECT.value:
+            return 404, {"errorCode": "RPC_ERROR", "httpStatus": 404, "message": "No active delegate"}
+        if path in ("/lol-champ-select/v1/pickable-champion-ids", "/lol-champ-select/v1/bannable-champion-ids"):
+            return 200, [champ.value for champ in ChampionIds]
+        if method == "GET" and path == SESSION_URL:
+            return 200, self.champ_select_session()
+        if path == f"{SESSION_URL}/my-selection" and method == "PATCH":
+            self.report.summoner_spells += 1
+            return 200, {}
+        if path.startswith(f"{SESSION_URL}/trades/") and path.endswith("/decline") and self.trade_state:
+            self.trade_state = "DECLINED"
+            self.report.declined_trades += 1
+            return 200, {}
+        if path.startswith(f"{SESSION_URL}/actions/") and self.turn < len(self.actions):
+            action = self.actions[self.turn]
+            action_id = int(path.split("/")[5])
+            if action_id != action["id"] or action["actorCellId"] != LOCAL_CELL_ID:
+                return 400, {"errorCode": "RPC_ERROR", "httpStatus": 400, "message": "Not your turn"}
+            if method == "PATCH":
+                action["championId"] = (body or {}).get("championId", 0)
+            elif path.endswith("/complete") and action["championId"]:
+                self._complete_turn(clock.monotonic())
+            return 200, {}
+        return 200, {}
+
+    def buy(self, name: str) -> bool:
+        """
+        Buy an item by its shop name, owned components are merged into it
+        :param name: name typed in the shop search
+        :return: True if bought, False if unknown or not affordable
+        """
+        with self._lock:
+            item = self.items_by_name.get(name)
+            purchases = self.planner.plan([item.id], self.inventory, self.gold()) if item else []
+            if self.game_started is None or not purchases or purchases[-1].item.id != item.id or len(purchases) > 1:
+                logger.info(f"Simulated purchase of {name} failed")
+                self.report.failed_purchases += 1
+                return False
+            for consumed in purchases[0].consumed:
+                self.inventory.remove(consumed)
+            self.inventory.append(item.id)
+            self.gold_spent += purchases[0].cost
+            self.report.purchases.append(name)
+            return True
+
+    def press(self, key: str) -> None:
+        """Apply a game key press of the bot"""
+        with self._lock:
+            if self.game_started is None:
+                return
+            if key == "w":
+                self.attached = not self.attached
+            elif key == "b" and self.recall_at is None:
+                self.recall_at = self.game_time()
+                self.attached = False
+
+    def kill_game(self) -> None:
+        with self._lock:
+            if self.process_running:
+                logger.info("Simulated game killed by the bot")
+                self.duration = min(self.duration, self.game_time())
+                self.exit_delay = 0.0
+        self.advance()
+
+
+class SimulatedProcess(ProcessTracker):
+    """Tracker of the simulated game process, runs from loading screen till the game exits"""
+
+    def __init__(self, simulator: GameSimulator):
+        super().__init__(GAME_PROCESS_NAME)
+        self.simulator = simulator
+
+    def find(self, force: bool = False):
+        return None
+
+    def is_running(self) -> bool:
+        self.simulator.advance()
+        return self.simulator.process_running
+
+    def terminate(self) -> None:
+        self.simulator.kill_game()
+
+    def exited(self) -> None:
+        """Fire exit callbacks as the real tracker does once the process exited"""
+        logger.info(f"Process {self.process_name} exited")
+        for callback in self._exit_callbacks:
+            callback()
+
+
+class SimulatedInput(NoopBackend):
+    """Input backend playing the bot's keys into the simulated game: shop search and enter buy, w and b act"""
+
+    def __init__(self, simulator: GameSimulator):
+        super().__init__()
+        self.simulator = simulator
+        self._typed: Optional[str] = None
+
+    def write(self, text: str, delay: float = 0) -> None:
+        self._typed = text
+
+    def press_and_release(self, key: str) -> None:
+        if key == "enter" and self._typed:
+            self.simulator.buy(self._typed)
+        elif key in ("w", "b"):
+            self.simulator.press(key)
+        self._typed = None
+
+
+class SimulationServer:
+    """Local HTTP server answering the LCU and Live Client API requests of the bot from a GameSimulator"""
+
+    def __init__(self, simulator: GameSimulator, port: int = 0):
+        """
+        :param simulator: simulated client and game
+        :param port: port to listen on, random free port if 0
+        """
+        self.simulator = simulator
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            wbufsize = 1 << 16  # headers and body leave in one write
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload = server.simulator.handle(self.command, self.path.split("?")[0], body)
+                content = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> int:
+        """
+        Serve in a background thread
+        :return: port the server listens on
+        """
+        threading.Thread(target=self._server.serve_forever, daemon=True, name=f"simulator-{self.port}").start()
+        return self.port
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def simulate(bot_name: str, script: Optional[GameScript] = None, games: int = 1, timeout: float = 300.0,
+             virtual_limit: Optional[float] = None, telemetry_path: Optional[Path] = None,
+             use_async_client: bool = False) -> SimulationReport:
+    """
+    Play games with a bot against the simulator
+    :param bot_name: bot name from bot.BOTS
+    :param script: timings and events of every game, default GameScript if None
+    :param games: games to play
+    :param timeout: real seconds to wait for the games
+    :param virtual_limit: virtual seconds to stop at, twice the scripted length of the games if None
+    :param telemetry_path: record the bot's telemetry to this SQLite file, not recorded if None
+    :param use_async_client: run the bot on the asyncio client, see BotConfig.use_async_client
+    :return: SimulationReport object
+    """
+    from bot import load_bot  # the bots import this module's dependencies, not the other way round
+    from config import BotConfig
+
+    script = script or GameScript()
+    report = SimulationReport(bot=bot_name)
+    simulator = GameSimulator(script, games, load_catalog(), report)
+    game_length = script.queue_time + script.planning_time + script.turn_limit * 4 + script.finalization_time + \
+        script.loading_time + script.duration + script.exit_delay
+    virtual_clock = SimulationClock(simulator.finished, virtual_limit or game_length * games * 2)
+    previous_clock = clock.use_clock(virtual_clock)
+    previous_tracker = set_process_tracker(GAME_PROCESS_NAME, simulator.process)
+    server = SimulationServer(simulator)
+    errors: List[BaseException] = []
+
+    def run(bot) -> None:
+        try:
+            bot.main_loop()
+        except SimulationFinished:
+            pass
+        except BaseException as err:  # reported to the caller
+            errors.append(err)
+            simulator.finished.set()
+
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            (Path(directory) / "Config").mkdir()
+            (Path(directory) / "Config" / "game.cfg").write_text("[General]\n[HUD]\n[ItemShop]\n")
+            port = server.start()
+            (Path(directory) / "lockfile").write_text(f"LeagueClient:0:{port}:simulator:http")
+            config = BotConfig(lol_base_path=Path(directory), live_client_port=str(port), live_client_protocol="http",
+                               watch_lockfile=False, use_client_events=False, warm_up_live_client=False,
+                               bot_name=bot_name, telemetry_path=telemetry_path, use_async_client=use_async_client)
+            bot = load_bot(bot_name)(config=config, input_backend=SimulatedInput(simulator))
+            thread = threading.Thread(target=run, args=(bot,), daemon=True, name="simulated-bot")
+            thread.start()
+            simulator.finished.wait(timeout)
+            simulator.finished.set()
+            thread.join(timeout=10)
+            if bot.telemetry:
+                bot.telemetry.close()
+    finally:
+        report.real_seconds = round(time.perf_counter() - start, 3)
+        report.virtual_seconds = round(virtual_clock.monotonic(), 1)
+        server.stop()
+        clock.use_clock(previous_clock)
+        set_process_tracker(GAME_PROCESS_NAME, previous_tracker)
+    if errors:
+        raise errors[0]
+    return report
+
+
+def main():
+    from bot import BOTS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bot", choices=list(BOTS), default="yuumi")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=GameScript.duration, help="game time of every game")
+    parser.add_argument("--timeout", type=float, default=300.0, help="real seconds to wait for the games")
+    parser.add_argument("--telemetry", type=Path, help="record telemetry to this SQLite file, see common.telemetry")
+    parser.add_argument("--async-client", action="store_true", help="run the bot on the asyncio client")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    report = simulate(args.bot, GameScript(duration=args.duration), games=args.games, timeout=args.timeout,
+                      telemetry_path=args.telemetry, use_async_client=args.async_client)
+    print(json.dumps(asdict(report), indent=2))
+    sys.exit(0 if report.games == args.games and not report.missed_turns else 1)
+
+
+if __name__ == '__main__':
+    main()
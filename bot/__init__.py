@@ -0,0 +1,17 @@
+import importlib
+
+# Bot name to "module:class", modules are only imported when the bot is requested
+BOTS = {
+    "yuumi": "bot.yuumi:YuumiBot",
+    "disco_nunu": "bot.disco_nunu:DiscoNunu",
+}
+
+
+def load_bot(name: str) -> type:
+    """
+    Import the module of a bot by name and return its class
+    :param name: bot name from BOTS
+    :return: bot class
+    """
+    module_name, class_name = BOTS[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
@@ -1,22 +1,86 @@
+import atexit
 import logging
+import time
 from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any
+
+from requests import RequestException
 
 from api.client import ClientAPI
+from api.credentials import CredentialWatcher, ClientCredentials
 from api.player_champion import PlayerChampion
+from common.bot_stats import BotStats
+from common.capture import CaptureRecorder
+from common.input_backends import InputBackend, create_backend
+from common.item_catalog import load_catalog, DEFAULT_CATALOG_PATH
+from common.metrics import METRICS, MetricsServer
+from common.retry_policy import is_connection_error
+from common.scheduler import TickScheduler
+from common.telemetry import TelemetryRecorder
 from config import BotConfig
 
 
 class BaseBot(ABC):
     """Base Class contains all bot behaviour"""
 
-    def __init__(self):
+    def __init__(self, config: Optional[BotConfig] = None, input_backend: Optional[InputBackend] = None):
+        """
+        :param config: bot configuration, default BotConfig if None
+        :param input_backend: backend sending game input, created from BotConfig.input_backend if None
+        """
         self.logger = logging.getLogger(__name__)
         self.local_host = "127.0.0.1"
-        self.config = BotConfig()
-        self.client = ClientAPI(self.config.protocol, self.local_host, self.config.port, self.config.password)
-        self.player_champion = PlayerChampion()
+        self.config = config or BotConfig()
+        self.stats = BotStats()
+        self.metrics = METRICS
+        self.metrics_server = MetricsServer(self.metrics, port=self.config.metrics_port) \
+            if self.config.metrics_port else None
+        if self.metrics_server:
+            self.metrics_server.start()
+        self._tick_started = time.monotonic()
+        self.recorder = CaptureRecorder(self.config.capture_path) if self.config.capture_path else None
+        if self.recorder:
+            self.recorder.start()
+        self.telemetry = TelemetryRecorder(self.config.telemetry_path, self.config.bot_name) \
+            if self.config.telemetry_path else None
+        if self.telemetry:
+            self.telemetry.start()
+        atexit.register(self.close)  # main_loop never returns, finish capture and telemetry files on exit
+        if self.config.use_async_client:
+            from api.async_client import SyncClientAPI  # aiohttp is slow to import and only needed here
+            self.client = SyncClientAPI(self.config.protocol, self.local_host, self.config.port, self.config.password,
+                                        recorder=self.recorder)
+        else:
+            self.client = ClientAPI(self.config.protocol, self.local_host, self.config.port, self.config.password,
+                                    recorder=self.recorder)
+        self.scheduler = TickScheduler()
+        minimap = None
+        if self.config.minimap_vision:
+            from common.minimap import MinimapAnalyzer  # numpy is slow to import and only needed here
+            minimap = MinimapAnalyzer(min_interval=self.config.minimap_interval)
+        self.player_champion = PlayerChampion(snapshot_ttl=self.config.live_client_snapshot_ttl,
+                                              scheduler=self.scheduler, live_client_port=self.config.live_client_port,
+                                              live_client_protocol=self.config.live_client_protocol,
+                                              recorder=self.recorder,
+                                              input_backend=input_backend or create_backend(self.config.input_backend),
+                                              warm_up=self.config.warm_up_live_client,
+                                              item_catalog=load_catalog(
+                                                  self.config.item_catalog_path or DEFAULT_CATALOG_PATH),
+                                              state_poll_interval=self.config.state_poll_interval,
+                                              minimap=minimap, telemetry=self.telemetry,
+                                              install_path=self.config.lock_file_path.parent)
+        self.player_champion.on_game_end = self._on_game_end
+        if self.telemetry:
+            self.client.on_phase = self.telemetry.phase
+        self.credential_watcher = CredentialWatcher(
+            self.client, self.config.lock_file_path,
+            ClientCredentials(port=self.config.port, password=self.config.password, protocol=self.config.protocol,
+                              pid=self.config.pid))
+        if self.config.watch_lockfile:
+            self.credential_watcher.start()
         self.client.connect()
-        self.is_banned = False
+        if self.config.use_client_events:
+            self.client.subscribe_events()
 
     @abstractmethod
     def handle_client(self) -> None:
@@ -33,9 +97,67 @@ class BaseBot(ABC):
         """Handles gameplay once inside a summoners rift game"""
         pass
 
+    def close(self) -> None:
+        """Write pending capture records and telemetry rows and stop their writer threads"""
+        if self.recorder:
+            self.recorder.close()
+        if self.telemetry:
+            self.telemetry.close()
+
+    def _on_game_end(self) -> None:
+        self.stats.games_played += 1
+
+    def record_game_result(self) -> None:
+        """Take the result of a game whose GameEnd event was never read from the end of game stats of the client"""
+        self.player_champion.apply_game_exit()
+        if self.telemetry and self.telemetry.result_missing:
+            self.telemetry.record_result(self.client.get_game_result())
+
+    def start_tick(self) -> None:
+        """Apply a game exit, run due scheduled actions and start timing a gameplay tick"""
+        self.player_champion.apply_game_exit()
+        self.scheduler.run_pending()
+        self.player_champion.start_tick()
+        self._tick_started = time.monotonic()
+
+    def end_tick(self) -> None:
+        """Finish timing a gameplay tick"""
+        self.player_champion.end_tick()
+        seconds = time.monotonic() - self._tick_started
+        self.stats.record_tick(seconds)
+        state_age = self.player_champion.state_age()
+        if state_age is not None:
+            self.stats.record_state_age(state_age)
+        self.metrics.observe_phase(self.config.bot_name, "gameplay_tick", seconds)
+        if self.telemetry:
+            champion = self.player_champion
+            self.telemetry.sample(champion.current_gold, champion.current_hp, champion.max_hp, champion.level,
+                                  champion.is_alive, seconds, state_age)
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Get health and throughput of the bot
+        :return: dict of stats
+        """
+        return self.stats.as_dict()
+
     def main_loop(self):
         """Main loop includes all bot behaviour should be executed in script"""
         while True:
-            self.handle_client()
-            self.handle_champion_select()
-            self.handle_gameplay()
+            for handler in (self.handle_client, self.handle_champion_select, self.handle_gameplay):
+                start = time.monotonic()
+                try:
+                    handler()
+                except RequestException as err:
+                    if not is_connection_error(err, self.client.base_url):
+                        # e.g. a timeout or error status, start over from the current phase
+                        self.logger.warning(f"Request failed. Error {err}")
+                        break
+                    # Client restarted, resume from current phase once credentials are swapped
+                    self.logger.info(f"Lost connection to Client. Error {err}. Waiting for Client")
+                    self.credential_watcher.wait_for_change(timeout=30)
+                    break
+                finally:
+                    seconds = time.monotonic() - start
+                    self.stats.record_phase(handler.__name__, seconds)
+                    self.metrics.observe_phase(self.config.bot_name, handler.__name__, seconds)
@@ -1,10 +1,9 @@
 import logging
-from time import sleep
 
 from api.client import ClientAPI
 from api.player_champion import PlayerChampion
 from bot.base_bot import BaseBot
-from common.constants import LobbyTypes, Positions, ClientPhases, ChampionIds, ChampSelectPhases, \
+from common.constants import LobbyTypes, Positions, ClientPhases, ChampionIds, ChampSelectTransitions, \
     SummonerSpells
 from config import BotConfig
 
@@ -14,7 +13,6 @@ class DiscoNunu(BaseBot):
 
     def handle_client(self) -> None:
         """Handles lobby creation, searching for game, accepting match and reconnect to game"""
-        self.is_banned = False
         while True:
             phase = self.client.get_phase()
             if phase == ClientPhases.NONE.value:
@@ -25,6 +23,7 @@ class DiscoNunu(BaseBot):
             elif phase == ClientPhases.READY_CHECK.value:
                 self.client.accept_match()
             elif phase == ClientPhases.END_OF_GAME.value:
+                self.record_game_result()
                 self.client.skip_end_of_game()
             elif phase == ClientPhases.RECONNECT.value:
                 self.client.reconnect()
@@ -32,26 +31,36 @@ class DiscoNunu(BaseBot):
                 return
 
     def handle_champion_select(self) -> None:
-        """Handles champion select"""
+        """Handles champion select, every write is issued when its transition arrives, turns till locked in"""
+        self.client.champ_select.reset()
         while True:
             if self.client.get_phase() != ClientPhases.CHAMP_SELECT.value:
                 return
-            if self.client.get_champ_select_info()["timer"]["phase"] == ChampSelectPhases.FINALIZATION.value:
-                self.client.select_summoner_spells(spell1=SummonerSpells.GHOST, spell2=SummonerSpells.CLEANSE)
-                self.logger.info("Champion Select completed. Waiting for game to start.")
-                return
-            elif self.client.get_champ_select_info()["timer"]["phase"] == ChampSelectPhases.BAN_PICK.value:
-                if not self.is_banned:
-                    self.is_banned = self.client.ban_champion(champs=[ChampionIds.LUX])
-                self.client.pick_champion(champs=[ChampionIds.NUNU, ChampionIds.DRAVEN])
+            for transition in self.client.update_champ_select():
+                if transition.event == ChampSelectTransitions.BAN_TURN_STARTED:
+                    self.client.ban_champion(champs=[ChampionIds.LUX], snapshot=transition.snapshot)
+                elif transition.event == ChampSelectTransitions.PICK_TURN_STARTED:
+                    self.client.pick_champion(champs=[ChampionIds.NUNU, ChampionIds.DRAVEN],
+                                              snapshot=transition.snapshot)
+                elif transition.event == ChampSelectTransitions.TRADE_OFFERED:
+                    self.client.decline_trade(transition.trade.id)  # Keep the picked champion
+                elif transition.event == ChampSelectTransitions.FINALIZATION_ENTERED:
+                    self.client.select_summoner_spells(spell1=SummonerSpells.GHOST, spell2=SummonerSpells.CLEANSE)
+                    self.logger.info("Champion Select completed. Waiting for game to start.")
 
     def handle_gameplay(self):
         """Handles gameplay once inside a summoners rift game"""
         while True:
-            if self.client.get_phase() != ClientPhases.IN_GAME.value:
+            self.start_tick()
+            # Process liveness is cached and updated by the exit callback, phase is only asked once game is gone
+            if (not self.player_champion.is_game_running()
+                    and self.client.get_phase() != ClientPhases.IN_GAME.value):
+                self.scheduler.clear()
                 break
-            self.player_champion.lock_camera()
-            self.player_champion.go_to_enemy_nexus()
-            self.player_champion.use_spell("d")
-            self.player_champion.use_spell("f")
-            sleep(5)  # Avoid spam
+            if self.scheduler.throttle("disco", 5):  # Avoid spam without blocking the loop
+                self.player_champion.lock_camera()
+                self.player_champion.go_to_enemy_nexus()
+                self.player_champion.use_spell("d")
+                self.player_champion.use_spell("f")
+            self.end_tick()
+            self.scheduler.idle(self.config.gameplay_tick_interval)
@@ -1,17 +1,19 @@
-from time import sleep
+from typing import Optional
 
 from bot.base_bot import BaseBot
-from common.constants import ClientPhases, LobbyTypes, Positions, ChampSelectPhases, SummonerSpells, ChampionIds, Items
-from common.utils import is_process_running, run_process
+from common.constants import ClientPhases, LobbyTypes, Positions, ChampSelectTransitions, SummonerSpells, ChampionIds, \
+    Items
+from common.input_backends import InputBackend
+from config import BotConfig
 
 
 class YuumiBot(BaseBot):
     """Class contains all bot behaviour for DiscoNunu"""
 
-    def __init__(self):
-        super().__init__()
-        self.build_path = (Items.World_Atlas, Items.Faerie_Charm, Items.Amplifying_Tome, Items.Moonstone_Renewer,
-                           Items.Amplifying_Tome, Items.Ardent_Censer, Items.Amplifying_Tome,
+    def __init__(self, config: Optional[BotConfig] = None, input_backend: Optional[InputBackend] = None):
+        super().__init__(config=config, input_backend=input_backend)
+        # Finished items only, components are bought on the way by the purchase planner
+        self.build_path = (Items.World_Atlas, Items.Moonstone_Renewer, Items.Ardent_Censer,
                            Items.Staff_of_Flowing_Water, Items.Morellonomicon)
         self.best_friend = "f5"
 
@@ -21,11 +23,10 @@ class YuumiBot(BaseBot):
         :return: True if attached, False otherwise
         """
         if self.player_champion.is_alive and self.player_champion.side and self.player_champion.game_in_progress:
-            return self.player_champion.get_player_abilities()["W"]["displayName"] == "Change of Plan"
+            return self.player_champion.get_player_abilities()["W"].display_name == "Change of Plan"
 
     def handle_client(self) -> None:
         """Handles lobby creation, searching for game, accepting match and reconnect to game"""
-        self.is_banned = False
         while True:
             phase = self.client.get_phase()
             if phase == ClientPhases.NONE.value:
@@ -36,6 +37,7 @@ class YuumiBot(BaseBot):
             elif phase == ClientPhases.READY_CHECK.value:
                 self.client.accept_match()
             elif phase == ClientPhases.END_OF_GAME.value:
+                self.record_game_result()
                 self.client.skip_end_of_game()
             elif phase == ClientPhases.RECONNECT.value:
                 self.client.reconnect()
@@ -43,38 +45,43 @@ class YuumiBot(BaseBot):
                 return
 
     def handle_champion_select(self) -> None:
-        """Handles champion select"""
+        """Handles champion select, every write is issued when its transition arrives, turns till locked in"""
+        self.client.champ_select.reset()
         while True:
             if self.client.get_phase() != ClientPhases.CHAMP_SELECT.value:
                 return
-            if self.client.get_champ_select_info()["timer"]["phase"] == ChampSelectPhases.FINALIZATION.value:
-                self.client.select_summoner_spells(spell1=SummonerSpells.HEAL, spell2=SummonerSpells.GHOST)
-                self.logger.info("Champion Select completed. Waiting for game to start.")
-                return
-            elif self.client.get_champ_select_info()["timer"]["phase"] == ChampSelectPhases.BAN_PICK.value:
-                if not self.is_banned:
-                    self.is_banned = self.client.ban_champion(champs=[ChampionIds.LUX])
-                self.client.pick_champion(champs=[ChampionIds.YUUMI])
+            for transition in self.client.update_champ_select():
+                if transition.event == ChampSelectTransitions.BAN_TURN_STARTED:
+                    self.client.ban_champion(champs=[ChampionIds.LUX], snapshot=transition.snapshot)
+                elif transition.event == ChampSelectTransitions.PICK_TURN_STARTED:
+                    self.client.pick_champion(champs=[ChampionIds.YUUMI], snapshot=transition.snapshot)
+                elif transition.event == ChampSelectTransitions.TRADE_OFFERED:
+                    self.client.decline_trade(transition.trade.id)  # Keep the picked champion
+                elif transition.event == ChampSelectTransitions.FINALIZATION_ENTERED:
+                    self.client.select_summoner_spells(spell1=SummonerSpells.HEAL, spell2=SummonerSpells.GHOST)
+                    self.logger.info("Champion Select completed. Waiting for game to start.")
 
     def handle_gameplay(self):
         """Handles gameplay once inside a summoners rift game"""
         while True:
-            if (self.client.get_phase() != ClientPhases.IN_GAME.value
-                    and not is_process_running(self.player_champion.process_name)):
-                run_process(process_name="taskkill", args=f'/IM "{self.player_champion.process_name}" /F')
+            self.start_tick()
+            # Process liveness is cached and updated by the exit callback, phase is only asked once game is gone
+            if (not self.player_champion.is_game_running()
+                    and self.client.get_phase() != ClientPhases.IN_GAME.value):
+                self.player_champion.close_game()
                 self.player_champion.release_ally(self.best_friend)
+                self.scheduler.clear()
                 break
             self.player_champion.lock_on_ally(self.best_friend)
             if not self.is_attached():
                 self.player_champion.tactical_retreat(0.7)
-                for _ in range(2):  # Can buy multiple items if enough gold
+                if not self.player_champion.is_retreating():  # Moving would cancel the recall
                     self.player_champion.buy_items(self.build_path)
-
-                self.player_champion.lock_on_ally(self.best_friend)
-                self.player_champion.go_to_center()
-                if not self.is_attached():  # Ensures Yuumi doesn't detach because game remembers w presses
-                    self.player_champion.use_spell("w")
-                self.player_champion.use_spell("f")
+                    self.player_champion.lock_on_ally(self.best_friend)
+                    self.player_champion.go_to_center()
+                    if not self.is_attached():  # Ensures Yuumi doesn't detach because game remembers w presses
+                        self.player_champion.use_spell("w")
+                    self.player_champion.use_spell("f")
             else:
                 self.player_champion.use_spell("e")
                 self.player_champion.use_spell("r")
@@ -83,3 +90,5 @@ class YuumiBot(BaseBot):
             self.player_champion.upgrade_ability("e")
             self.player_champion.upgrade_ability("w")
             self.player_champion.upgrade_ability("q")
+            self.end_tick()
+            self.scheduler.idle(self.config.gameplay_tick_interval)
@@ -0,0 +1,311 @@
+import asyncio
+import dataclasses
+import logging
+import threading
+import time
+from functools import partial
+from typing import Optional, Dict, Any, Callable, Awaitable, Coroutine
+
+import aiohttp
+import requests
+from requests import HTTPError
+
+from common import clock
+from common.capture import CaptureRecorder
+from common.json_backend import decode
+from common.metrics import METRICS, MetricsRegistry
+from common.retry_policy import RetryPolicy, CircuitBreaker, CircuitOpenError
+from common.transport import TransportConfig, Timeout
+
+
+class AsyncResponse:
+    """Fully read response exposing the parts of requests.Response the bots use"""
+
+    __slots__ = ("url", "status_code", "headers", "content", "_decoded_json")
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return decode(self)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class EventLoopThread:
+    """Runs one asyncio event loop in a background thread for blocking callers"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="async-requests")
+        self._thread.start()
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine on the loop and block till it finishes
+        :param coroutine: coroutine to run
+        :return: coroutine result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def stop(self) -> None:
+        """Stop the loop"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class AsyncRequestAPI:
+    """Base asyncio requests API class, mirrors RequestAPI"""
+
+    def __init__(self, protocol: str, domain: str, port: str, session: Optional[aiohttp.ClientSession] = None,
+                 pool_size: int = 16, name: str = "api", metrics: MetricsRegistry = METRICS,
+                 retry_policy: Optional[RetryPolicy] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 transport: Optional[TransportConfig] = None, recorder: Optional[CaptureRecorder] = None):
+        """
+        :param session: ClientSession to share its connection pool with other APIs, created on first use if None
+        :param pool_size: maximum connections of own session
+        :param name: api label of request metrics
+        :param metrics: registry request latency, status, size and retries are recorded to
+        :param retry_policy: per endpoint retry rules of *_with_retries calls, default rule for all if None
+        :param circuit_breaker: fails requests fast while the server is down, default CircuitBreaker if None
+        :param transport: per endpoint timeouts, pool size is set by pool_size, default TransportConfig if None
+        :param recorder: records every request and response if set
+        """
+        self.logger = logging.getLogger(__name__)
+        self.recorder = recorder
+        self.name = name
+        self.metrics = metrics
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.transport = transport or TransportConfig()
+        self._connection_lock = threading.Lock()
+        self._connection = (f"{protocol}://{domain}:{port}", {})
+        self.pool_size = pool_size
+        self._session = session
+
+    @property
+    def base_url(self) -> str:
+        return self._connection[0]
+
+    @base_url.setter
+    def base_url(self, base_url: str) -> None:
+        self.set_connection(base_url, self.headers)
+
+    @property
+    def headers(self) -> Dict[str, Any]:
+        return self._connection[1]
+
+    @headers.setter
+    def headers(self, headers: Dict[str, Any]) -> None:
+        self.set_connection(self.base_url, headers)
+
+    def set_connection(self, base_url: str, headers: Dict[str, Any]) -> None:
+        """
+        Swap base url and default headers together so no request sees half of a change
+        :param base_url: protocol, domain and port
+        :param headers: default headers
+        """
+        with self._connection_lock:
+            self._connection = (base_url, headers)
+        self.circuit_breaker.reset()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the ClientSession, it has to be created inside the running event loop
+        :return: aiohttp.ClientSession object
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size, ssl=False))
+        return self._session
+
+    async def close(self) -> None:
+        """Close the ClientSession and its connections"""
+        if self._session is not None:
+            await self._session.close()
+
+    async def _request(self, method: str, url: str, data: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> AsyncResponse:
+        """
+        Do a request and read its body
+        :param method: http method
+        :param url: url to request
+        :param data: data to send with request
+        :param headers: headers to send with request, default headers if None
+        :param timeout: connect and read timeout, endpoint default of transport if None
+        :return: AsyncResponse object
+        """
+        base_url, default_headers = self._connection
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError(f"{base_url} is down. Retry in {self.circuit_breaker.remaining():.1f} s",
+                                   request=requests.Request(method, base_url + url))
+        session = await self.get_session()
+        connect_timeout, read_timeout = timeout or self.transport.timeout_for(url)
+        client_timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        started, start = time.time(), time.perf_counter()
+        try:
+            async with session.request(method, base_url + url, headers=headers or default_headers, json=data,
+                                       timeout=client_timeout) as response:
+                result = AsyncResponse(url=str(response.url), status_code=response.status,
+                                       headers=dict(response.headers), content=await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            self.circuit_breaker.record_failure()
+            self.metrics.observe_request(self.name, method, url, "error", time.perf_counter() - start, 0)
+            # Raised as the errors RequestAPI raises, so callers handle failures of both APIs alike
+            request = requests.Request(method, base_url + url)
+            if isinstance(err, asyncio.TimeoutError):
+                raise requests.Timeout(str(err), request=request) from err
+            if isinstance(err, aiohttp.ClientConnectionError):
+                raise requests.ConnectionError(str(err), request=request) from err
+            raise requests.RequestException(str(err), request=request) from err
+        self.circuit_breaker.record_success()
+        elapsed = time.perf_counter() - start
+        self.metrics.observe_request(self.name, method, url, str(result.status_code), elapsed, len(result.content))
+        if self.recorder:
+            self.recorder.record(origin=base_url, method=method, url=url, request_body=data,
+                                 status=result.status_code, response_body=result.content, started=started,
+                                 elapsed=elapsed)
+        return result
+
+    async def _retry_request(self, request_callback: Callable[[], Awaitable[AsyncResponse]],
+                             retries: Optional[int] = None, initial_delay: Optional[float] = None,
+                             max_delay: Optional[float] = None, method: str = "", url: str = "") -> AsyncResponse:
+        """
+        Method to retry a request following the retry rule of its endpoint. Non retryable errors fail at once
+        :param retries: amount of retries, rule's if None
+        :param initial_delay: starting delay between retries, increases exponentially, rule's if None
+        :param max_delay: maximum delay between retries allowed, rule's if None
+        :param method: http method of request, for retry metrics
+        :param url: url of request, picks the retry rule
+        :return: AsyncResponse object
+        """
+        rule = self.retry_policy.rule_for(url)
+        overrides = {name: value for name, value in (("retries", retries), ("initial_delay", initial_delay),
+                                                     ("max_delay", max_delay)) if value is not None}
+        rule = dataclasses.replace(rule, **overrides) if overrides else rule
+        deadline = clock.monotonic() + rule.deadline
+        error: Optional[Exception] = None
+        for i in range(rule.retries):
+            try:
+                result = await request_callback()
+                if result.ok:
+                    return result
+                if not self.retry_policy.is_retryable(rule, result.status_code):
+                    result.raise_for_status()
+                error = HTTPError(f"{result.status_code} Error for url: {url}", response=result)
+            except (requests.ConnectionError, requests.Timeout) as err:  # raised by _request for aiohttp errors
+                if not rule.retry_connection_errors:
+                    raise
+                error = err
+            backoff = max(self.retry_policy.backoff(rule, i), self.circuit_breaker.remaining())
+            if i == rule.retries - 1 or clock.monotonic() + backoff > deadline:
+                break
+            self.logger.debug(f"Retrying request {i + 1} times in {backoff:.2f} s. Error {error}")
+            self.metrics.observe_retry(self.name, method, url, backoff)
+            await clock.async_sleep(backoff)
+        raise HTTPError(f"Retries exceeded for {url}") from error
+
+    async def get(self, url: str, data: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> AsyncResponse:
+        """
+        Do a get request
+        :param url: url to get
+        :param data: data to send with request
+        :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
+        :return: AsyncResponse object
+        """
+        return await self._request("GET", url, data=data, headers=headers, timeout=timeout)
+
+    async def post(self, url: str, data: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> AsyncResponse:
+        """
+        Do a post request
+        :param url: url to get
+        :param data: data to send with request
+        :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
+        :return: AsyncResponse object
+        """
+        return await self._request("POST", url, data=data, headers=headers, timeout=timeout)
+
+    async def put(self, url: str, data: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> AsyncResponse:
+        """
+        Do a put request
+        :param url: url to get
+        :param data: data to send with request
+        :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
+        :return: AsyncResponse object
+        """
+        return await self._request("PUT", url, data=data, headers=headers, timeout=timeout)
+
+    async def patch(self, url: str, data: Optional[Dict[str, Any]] = None,
+                    headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> AsyncResponse:
+        """
+        Do a patch request
+        :param url: url to get
+        :param data: data to send with request
+        :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
+        :return: AsyncResponse object
+        """
+        return await self._request("PATCH", url, data=data, headers=headers, timeout=timeout)
+
+    async def get_with_retries(self, url: str, data: Optional[Dict[str, Any]] = None,
+                               headers: Optional[Dict[str, Any]] = None, retries: Optional[int] = None,
+                               initial_delay: Optional[float] = None,
+                               max_delay: Optional[float] = None) -> AsyncResponse:
+        """
+        Attempt a get request given amount of time, delay between retries rises exponentially
+        :param url: url to get
+        :param data: data to send with request
+        :param headers: headers to send with request
+        :param retries: amount of retries, endpoint rule's if None
+        :param initial_delay: starting delay between retries, increases exponentially, endpoint rule's if None
+        :param max_delay: maximum delay between retries allowed, endpoint rule's if None
+        :return: AsyncResponse object
+        """
+        return await self._retry_request(
+            request_callback=partial(self.get, url=url, data=data, headers=headers),
+            retries=retries,
+            initial_delay=initial_delay,
+            max_delay=max_delay,
+            method="GET",
+            url=url
+        )
+
+    async def post_with_retries(self, url: str, data: Optional[Dict[str, Any]] = None,
+                                headers: Optional[Dict[str, Any]] = None, retries: Optional[int] = None,
+                                initial_delay: Optional[float] = None,
+                                max_delay: Optional[float] = None) -> AsyncResponse:
+        """
+        Attempt a post request given amount of time, delay between retries rises exponentially
+        :param url: url to get
+        :param data: data to send with request
+        :param headers: headers to send with request
+        :param retries: amount of retries, endpoint rule's if None
+        :param initial_delay: starting delay between retries, increases exponentially, endpoint rule's if None
+        :param max_delay: maximum delay between retries allowed, endpoint rule's if None
+        :return: AsyncResponse object
+        """
+        return await self._retry_request(
+            request_callback=partial(self.post, url=url, data=data, headers=headers),
+            retries=retries,
+            initial_delay=initial_delay,
+            max_delay=max_delay,
+            method="POST",
+            url=url
+        )
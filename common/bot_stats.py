@@ -0,0 +1,63 @@
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Any
+
+
+@dataclass
+class BotStats:
+    """Dataclass containing throughput and loop latency of a bot"""
+    started_at: float = field(default_factory=time.time)
+    games_played: int = 0
+    ticks: int = 0
+    tick_seconds: float = 0.0
+    max_tick_seconds: float = 0.0
+    state_age_seconds: float = 0.0  # age of the polled game state at the end of the last tick
+    max_state_age_seconds: float = 0.0
+    phase_seconds: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+    def record_tick(self, seconds: float) -> None:
+        """
+        Record duration of one gameplay tick
+        :param seconds: tick duration
+        """
+        self.ticks += 1
+        self.tick_seconds += seconds
+        self.max_tick_seconds = max(self.max_tick_seconds, seconds)
+
+    def record_state_age(self, seconds: float) -> None:
+        """
+        Record how old the game state a tick acted on was
+        :param seconds: state age
+        """
+        self.state_age_seconds = seconds
+        self.max_state_age_seconds = max(self.max_state_age_seconds, seconds)
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        """
+        Record time spent in a bot handler
+        :param phase: handler name
+        :param seconds: time spent
+        """
+        self.phase_seconds[phase] += seconds
+
+    def games_per_hour(self) -> float:
+        hours = (time.time() - self.started_at) / 3600
+        return self.games_played / hours if hours else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Summary that can be sent between processes
+        :return: dict of stats
+        """
+        return {
+            "uptime": time.time() - self.started_at,
+            "games_played": self.games_played,
+            "games_per_hour": self.games_per_hour(),
+            "ticks": self.ticks,
+            "avg_tick_seconds": self.tick_seconds / self.ticks if self.ticks else 0.0,
+            "max_tick_seconds": self.max_tick_seconds,
+            "state_age_seconds": self.state_age_seconds,
+            "max_state_age_seconds": self.max_state_age_seconds,
+            "phase_seconds": dict(self.phase_seconds),
+        }
@@ -0,0 +1,104 @@
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureRecorder:
+    """Streams request/response records to an append-only gzip JSON lines file from a background thread"""
+
+    def __init__(self, path: Path, max_queue: int = 10000, flush_interval: float = 1.0):
+        """
+        :param path: capture file, appended to if it exists
+        :param max_queue: records waiting to be written, newer records are dropped if the writer falls behind
+        :param flush_interval: seconds between writes to disk, a killed bot loses at most this long of records
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="capture-writer")
+        self._thread.start()
+        self.logger.info(f"Capturing requests to {self.path}")
+
+    def close(self) -> None:
+        """Write pending records and stop the writer thread, does nothing if it is not running"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+
+    def record(self, origin: str, method: str, url: str, request_body: Optional[Dict[str, Any]], status: int,
+               response_body: bytes, started: float, elapsed: float) -> None:
+        """
+        Queue a request for writing, never blocks the caller
+        :param origin: protocol, domain and port the request went to
+        :param method: http method
+        :param url: path and query
+        :param request_body: json sent with request
+        :param status: response status code
+        :param response_body: raw response body
+        :param started: time.time() the request started
+        :param elapsed: seconds the request took
+        """
+        try:
+            self._queue.put_nowait({"ts": started, "origin": origin, "method": method, "url": url,
+                                    "request": request_body, "status": status, "elapsed": elapsed,
+                                    "response": response_body})  # decoded on writer thread
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        # Every write appends a complete gzip member, gzip readers treat them as one stream. A member left open till
+        # close would be cut off without its end of stream marker if the bot is killed
+        lines: List[str] = []
+        last_write = time.monotonic()
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                record = {}
+            if record:
+                record["response"] = record["response"].decode("utf-8", "replace")
+                lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+            if record is None or time.monotonic() - last_write >= self.flush_interval:
+                if lines:
+                    with gzip.open(self.path, "at", encoding="utf-8") as capture:
+                        capture.writelines(lines)
+                    lines = []
+                last_write = time.monotonic()
+            if record is None:
+                break
+        if self.dropped:
+            self.logger.info(f"Capture dropped {self.dropped} records")
+
+
+def read_capture(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Read records of a capture file
+    :param path: capture file
+    :return: iterator of records in recorded order
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as capture:
+        try:
+            for line in capture:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return  # last line of a capture that was cut off
+        except (EOFError, gzip.BadGzipFile, zlib.error) as err:
+            # Last gzip member of a bot killed while writing it, records before it are complete
+            logger.warning(f"Capture {path} is cut off, reading stops at the cut. Error {err}")
@@ -0,0 +1,88 @@
+import threading
+import time as _time
+
+
+class Clock:
+    """Time source of everything the bot waits on: sleeps, timeouts, timers and caches. Real time by default"""
+
+    def time(self) -> float:
+        return _time.time()
+
+    def monotonic(self) -> float:
+        return _time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        _time.sleep(seconds)
+
+    async def async_sleep(self, seconds: float) -> None:
+        import asyncio
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock that jumps forward on sleep instead of waiting, plays minutes of bot time in milliseconds"""
+
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        """
+        :param start: monotonic time to start at
+        :param epoch: wall time at start
+        """
+        self._now = start
+        self._epoch = epoch - start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._epoch + self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    async def async_sleep(self, seconds: float) -> None:
+        import asyncio
+        self.sleep(seconds)
+        await asyncio.sleep(0)  # still yield to the event loop like a real sleep
+
+    def advance(self, seconds: float) -> None:
+        """
+        Move time forward, every thread sees the jump
+        :param seconds: seconds to move by, negative ones are ignored
+        """
+        with self._lock:
+            self._now += max(seconds, 0.0)
+
+
+_clock: Clock = Clock()
+
+
+def use_clock(clock: Clock) -> Clock:
+    """
+    Select the clock time, monotonic and sleep go to
+    :param clock: Clock or VirtualClock
+    :return: previously selected clock, to restore it
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def time() -> float:
+    """Wall time in seconds of the selected clock"""
+    return _clock.time()
+
+
+def monotonic() -> float:
+    """Monotonic time in seconds of the selected clock"""
+    return _clock.monotonic()
+
+
+def sleep(seconds: float) -> None:
+    """Sleep on the selected clock"""
+    _clock.sleep(seconds)
+
+
+async def async_sleep(seconds: float) -> None:
+    """Sleep on the selected clock without blocking the event loop"""
+    await _clock.async_sleep(seconds)
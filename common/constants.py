@@ -35,12 +35,45 @@ class ClientPhases(Enum):
     RECONNECT = "Reconnect"
 
 
+class ClientEvents(Enum):
+    """Enum containing League Client WebSocket events"""
+    GAMEFLOW_PHASE = "OnJsonApiEvent_lol-gameflow_v1_gameflow-phase"
+    CHAMP_SELECT_SESSION = "OnJsonApiEvent_lol-champ-select_v1_session"
+
+
 class ChampSelectPhases(Enum):
     """Enum containing all champion select phases"""
     BAN_PICK = "BAN_PICK"
     FINALIZATION = "FINALIZATION"
 
 
+class ChampSelectTransitions(Enum):
+    """Enum containing champion select changes emitted by ChampSelectStateMachine"""
+    BAN_TURN_STARTED = "BanTurnStarted"
+    PICK_TURN_STARTED = "PickTurnStarted"
+    FINALIZATION_ENTERED = "FinalizationEntered"
+    TRADE_OFFERED = "TradeOffered"
+
+
+class GameEvents(Enum):
+    """Enum containing Live Client Data event names"""
+    GAME_START = "GameStart"
+    MINIONS_SPAWNING = "MinionsSpawning"
+    FIRST_BRICK = "FirstBrick"
+    FIRST_BLOOD = "FirstBlood"
+    TURRET_KILLED = "TurretKilled"
+    INHIB_KILLED = "InhibKilled"
+    INHIB_RESPAWNING_SOON = "InhibRespawningSoon"
+    INHIB_RESPAWNED = "InhibRespawned"
+    DRAGON_KILL = "DragonKill"
+    HERALD_KILL = "HeraldKill"
+    BARON_KILL = "BaronKill"
+    CHAMPION_KILL = "ChampionKill"
+    MULTIKILL = "Multikill"
+    ACE = "Ace"
+    GAME_END = "GameEnd"
+
+
 class ChampionIds(Enum):
     """Enum containing champion ids"""
     NONE = 0
@@ -72,16 +105,21 @@ class MapLocationRatios(Enum):
     SHOP_PURCHASE_ITEM_BUTTON = (0.7019, 0.9450)
 
 
+class ScreenRegionRatios(Enum):
+    """Fraction of LoL window size bounding HUD regions as left, top, right, bottom"""
+    MINIMAP = (0.795, 0.735, 0.995, 0.995)  # with MinimapScale 1.0 in game.cfg
+
+
 class Items(Enum):
-    """Enum containing items with their prices"""
-    Faerie_Charm = 250
-    World_Atlas = 400
-    Dream_Maker = 401
-    Amplifying_Tome = 402
-    Moonstone_Renewer = 2200
-    Ardent_Censer = 2300
-    Staff_of_Flowing_Water = 2301  # Inaccurate prices because same values call wrong members is how Enum works
-    Morellonomicon = 2201
+    """Enum containing items with their ids, costs and components are in common.item_catalog"""
+    Faerie_Charm = 1004
+    Amplifying_Tome = 1052
+    World_Atlas = 3865
+    Dream_Maker = 3870
+    Moonstone_Renewer = 6617
+    Ardent_Censer = 3504
+    Staff_of_Flowing_Water = 6616
+    Morellonomicon = 3165
 
     @DynamicClassAttribute
     def name(self):
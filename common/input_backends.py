@@ -0,0 +1,242 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Tuple, List, Any, Set, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class InputBackend(ABC):
+    """Platform calls WindowManager needs to find a window and send input to it"""
+
+    @abstractmethod
+    def find_window(self, window_name: str, pid: Optional[int] = None) -> int:
+        """
+        Find a top level window by title
+        :param window_name: window title
+        :param pid: only a window of this process, any process if None
+        :return: window handle, 0 if not found
+        """
+        pass
+
+    @abstractmethod
+    def get_window_rect(self, handle: int) -> Tuple[int, int, int, int]:
+        pass
+
+    @abstractmethod
+    def is_window(self, handle: int) -> bool:
+        pass
+
+    @abstractmethod
+    def get_foreground_window(self) -> int:
+        pass
+
+    @abstractmethod
+    def set_foreground_window(self, handle: int) -> None:
+        pass
+
+    @abstractmethod
+    def move_to(self, x: int, y: int) -> None:
+        pass
+
+    @abstractmethod
+    def click(self, button: str) -> None:
+        pass
+
+    @abstractmethod
+    def press_and_release(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def press(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def is_pressed(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def write(self, text: str, delay: float = 0) -> None:
+        pass
+
+    @abstractmethod
+    def screenshot(self, rect: Tuple[int, int, int, int]) -> "np.ndarray":
+        """
+        Grab a region of the screen
+        :param rect: left, top, right, bottom screen coordinates
+        :return: height x width x 3 RGB uint8 array
+        """
+        pass
+
+
+class Win32Backend(InputBackend):
+    """Windows backend on win32gui, keyboard, mouse and pyautogui"""
+
+    def __init__(self):
+        # Imported here so the rest of the bot can be imported on machines without them
+        import keyboard
+        import mouse
+        import pyautogui
+        import win32gui
+        import win32process
+        self._keyboard = keyboard
+        self._mouse = mouse
+        self._pyautogui = pyautogui
+        self._win32gui = win32gui
+        self._win32process = win32process
+
+    def find_window(self, window_name: str, pid: Optional[int] = None) -> int:
+        if pid is None:
+            return self._win32gui.FindWindow(None, window_name)
+        handles = []
+
+        def match(handle: int, _) -> bool:
+            if self._win32gui.GetWindowText(handle) == window_name \
+                    and self._win32process.GetWindowThreadProcessId(handle)[1] == pid:
+                handles.append(handle)
+            return True
+
+        self._win32gui.EnumWindows(match, None)
+        return handles[0] if handles else 0
+
+    def get_window_rect(self, handle: int) -> Tuple[int, int, int, int]:
+        return tuple(self._win32gui.GetWindowRect(handle))
+
+    def is_window(self, handle: int) -> bool:
+        return bool(self._win32gui.IsWindow(handle))
+
+    def get_foreground_window(self) -> int:
+        return self._win32gui.GetForegroundWindow()
+
+    def set_foreground_window(self, handle: int) -> None:
+        self._win32gui.SetForegroundWindow(handle)
+
+    def move_to(self, x: int, y: int) -> None:
+        self._pyautogui.moveTo(x=x, y=y)
+
+    def click(self, button: str) -> None:
+        self._mouse.click(button)
+
+    def press_and_release(self, key: str) -> None:
+        self._keyboard.press_and_release(key)
+
+    def press(self, key: str) -> None:
+        self._keyboard.press(key)
+
+    def release(self, key: str) -> None:
+        self._keyboard.release(key)
+
+    def is_pressed(self, key: str) -> bool:
+        return self._keyboard.is_pressed(key)
+
+    def write(self, text: str, delay: float = 0) -> None:
+        self._keyboard.write(text, delay=delay)
+
+    def screenshot(self, rect: Tuple[int, int, int, int]) -> "np.ndarray":
+        import numpy as np
+        left, top, right, bottom = rect
+        return np.asarray(self._pyautogui.screenshot(region=(left, top, right - left, bottom - top)).convert("RGB"))
+
+
+class RecordingBackend(InputBackend):
+    """Backend that sends nothing and records every call with its time, usable on any platform"""
+
+    def __init__(self, rect: Tuple[int, int, int, int] = (0, 0, 1024, 768), handle: int = 1):
+        """
+        :param rect: rect of the pretend window
+        :param handle: handle of the pretend window
+        """
+        self.rect = rect
+        self.handle = handle
+        self.screen: Optional["np.ndarray"] = None  # pretend screen screenshots are cut from, black if None
+        self.foreground = 0
+        self.calls: List[Tuple[float, str, Tuple[Any, ...]]] = []
+        self._pressed: Set[str] = set()
+
+    def _record(self, name: str, *args) -> None:
+        self.calls.append((time.perf_counter(), name, args))
+
+    def input_calls(self) -> List[Tuple[float, str, Tuple[Any, ...]]]:
+        """
+        Get recorded calls that send input, window queries excluded
+        :return: list of (time, call name, args)
+        """
+        return [call for call in self.calls if call[1] in ("move_to", "click", "press_and_release", "press",
+                                                           "release", "write")]
+
+    def find_window(self, window_name: str, pid: Optional[int] = None) -> int:
+        self._record("find_window", window_name, pid)
+        return self.handle
+
+    def get_window_rect(self, handle: int) -> Tuple[int, int, int, int]:
+        self._record("get_window_rect", handle)
+        return self.rect
+
+    def is_window(self, handle: int) -> bool:
+        return handle == self.handle
+
+    def get_foreground_window(self) -> int:
+        return self.foreground
+
+    def set_foreground_window(self, handle: int) -> None:
+        self._record("set_foreground_window", handle)
+        self.foreground = handle
+
+    def move_to(self, x: int, y: int) -> None:
+        self._record("move_to", x, y)
+
+    def click(self, button: str) -> None:
+        self._record("click", button)
+
+    def press_and_release(self, key: str) -> None:
+        self._record("press_and_release", key)
+
+    def press(self, key: str) -> None:
+        self._record("press", key)
+        self._pressed.add(key)
+
+    def release(self, key: str) -> None:
+        self._record("release", key)
+        self._pressed.discard(key)
+
+    def is_pressed(self, key: str) -> bool:
+        return key in self._pressed
+
+    def write(self, text: str, delay: float = 0) -> None:
+        self._record("write", text)
+
+    def screenshot(self, rect: Tuple[int, int, int, int]) -> "np.ndarray":
+        import numpy as np
+        self._record("screenshot", rect)
+        left, top, right, bottom = rect
+        if self.screen is None:
+            return np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+        return self.screen[top:bottom, left:right]
+
+
+class NoopBackend(RecordingBackend):
+    """Backend that sends and keeps nothing, runs the decision logic headless on any platform"""
+
+    def _record(self, name: str, *args) -> None:
+        pass
+
+
+# Backend name to class, Win32Backend imports the platform modules only when created
+INPUT_BACKENDS = {
+    "win32": Win32Backend,
+    "noop": NoopBackend,
+    "recording": RecordingBackend,
+}
+
+
+def create_backend(name: str) -> InputBackend:
+    """
+    Create an input backend by name
+    :param name: backend name from INPUT_BACKENDS
+    :return: InputBackend object
+    """
+    return INPUT_BACKENDS[name]()
@@ -0,0 +1,78 @@
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Tuple, Optional, Any
+
+from common.json_backend import loads
+
+logger = logging.getLogger(__name__)
+
+# Data Dragon item.json trimmed to the items the bots build
+DEFAULT_CATALOG_PATH = Path(__file__).parent / "data" / "items.json"
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+    """Dataclass containing the shop data of an item"""
+    id: int
+    name: str
+    total_cost: int
+    combine_cost: int  # gold paid on top of the components
+    components: Tuple[int, ...] = ()
+    purchasable: bool = True
+    upgrade_of: Optional[int] = None  # item this one evolves from without a purchase, e.g. support item quests
+
+
+class ItemCatalog:
+    """Item ids, costs and component trees of the shop"""
+
+    def __init__(self, items: Dict[int, CatalogItem]):
+        self.items = items
+
+    @classmethod
+    def from_data_dragon(cls, data: Dict[str, Any]) -> "ItemCatalog":
+        """
+        Build a catalog from Data Dragon's item.json
+        :param data: decoded item.json
+        :return: ItemCatalog object
+        """
+        items = {}
+        for item_id, item in data["data"].items():
+            gold = item.get("gold", {})
+            items[int(item_id)] = CatalogItem(
+                id=int(item_id), name=item["name"], total_cost=gold.get("total", 0), combine_cost=gold.get("base", 0),
+                components=tuple(int(component) for component in item.get("from", [])),
+                purchasable=gold.get("purchasable", True),
+                upgrade_of=int(item["specialRecipe"]) if item.get("specialRecipe") else None)
+        return cls(items)
+
+    def __getitem__(self, item_id: int) -> CatalogItem:
+        return self.items[item_id]
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self.items
+
+    def base_item(self, item_id: int) -> int:
+        """
+        Follow upgrades back to the purchased item, e.g. Runic Compass to World Atlas
+        :param item_id: owned item id
+        :return: id of the item that was bought, item_id itself if it was not upgraded or is unknown
+        """
+        item = self.items.get(item_id)
+        while item is not None and item.upgrade_of is not None:
+            item_id = item.upgrade_of
+            item = self.items.get(item_id)
+        return item_id
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path: Path = DEFAULT_CATALOG_PATH) -> ItemCatalog:
+    """
+    Load an item catalog once per path
+    :param path: Data Dragon item.json
+    :return: ItemCatalog object
+    """
+    catalog = ItemCatalog.from_data_dragon(loads(Path(path).read_bytes()))
+    logger.debug(f"Loaded {len(catalog.items)} items from {path}")
+    return catalog
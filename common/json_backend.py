@@ -0,0 +1,50 @@
+import json
+import logging
+from typing import Any, Callable, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+Loads = Callable[[Union[bytes, str]], Any]
+
+# Backend name to loads, filled with the ones importable here, fastest first
+BACKENDS: Dict[str, Loads] = {}
+try:
+    import orjson
+    BACKENDS["orjson"] = orjson.loads
+except ImportError:
+    pass
+BACKENDS["json"] = json.loads
+
+_loads: Loads = next(iter(BACKENDS.values()))
+
+
+def use_backend(name: str) -> None:
+    """
+    Select the JSON backend used by loads and decode
+    :param name: key of BACKENDS, e.g. orjson or json
+    """
+    global _loads
+    _loads = BACKENDS[name]
+    logger.debug(f"Decoding JSON with {name}")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode JSON with the selected backend
+    :param data: raw JSON, bytes are decoded without making a str first
+    :return: decoded value
+    """
+    return _loads(data)
+
+
+def decode(response) -> Any:
+    """
+    Decode the body of a response once, later calls return the same object
+    :param response: requests.Response or AsyncResponse
+    :return: decoded body
+    """
+    try:
+        return response._decoded_json
+    except AttributeError:
+        response._decoded_json = _loads(response.content)
+        return response._decoded_json
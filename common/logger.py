@@ -1,25 +1,153 @@
+import atexit
+import copy
+import gzip
+import json
 import logging
+import os
+import queue
+import shutil
 import sys
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional, Tuple
 
 from config import BotConfig
 
+LOG_FORMAT = "%(asctime)s:%(levelname)s:%(filename)s:%(funcName)s:%(lineno)s:%(message)s"
 
-def configure_logger():
-    """Configures bot logger"""
+_listener: Optional[QueueListener] = None
+
+
+class RepeatFilter(logging.Filter):
+    """Collapses identical messages, e.g. phase polling, to one per interval with a count of the dropped ones"""
+
+    def __init__(self, interval: float = 60.0, max_keys: int = 1024):
+        """
+        :param interval: seconds an identical message is dropped for after it was let through
+        :param max_keys: distinct messages remembered, least recently seen ones are forgotten
+        """
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[Tuple[str, int, str], Tuple[float, int]]" = OrderedDict()  # to (passed at, dropped)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            passed_at, dropped = self._seen.get(key, (None, 0))
+            if passed_at is not None and now - passed_at < self.interval:
+                self._seen[key] = (passed_at, dropped + 1)
+                self._seen.move_to_end(key)
+                return False
+            self._seen[key] = (now, 0)
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+        if dropped:
+            record.msg, record.args = f"{key[2]} (repeated {dropped} more times)", None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "function": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:  # formatted by TracebackQueueHandler on the logging thread
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TracebackQueueHandler(QueueHandler):
+    """Queues records with message and traceback formatted apart, QueueHandler merges the traceback into the message"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None  # tracebacks hold frames, only their text is queued
+        return record
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, destination: str) -> None:
+    """Compress a rotated log file, runs on the listener thread"""
+    with open(source, "rb") as log_file, gzip.open(destination, "wb") as compressed:
+        shutil.copyfileobj(log_file, compressed)
+    os.remove(source)
+
+
+def stop_logger() -> None:
+    """Write queued records and stop the background listener, called at exit"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def configure_logger(log_path: Optional[Path] = None, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                     json_format: bool = False, repeat_interval: float = 60.0) -> None:
+    """
+    Configures bot logger. Records are queued by the calling thread and written by a background listener
+    :param log_path: log file, BotConfig.bot_logs_path if None
+    :param max_bytes: size a log file is rotated and gzipped at
+    :param backup_count: rotated files kept
+    :param json_format: write the log file as JSON lines instead of text
+    :param repeat_interval: seconds identical messages are collapsed for, 0 to keep all
+    """
+    global _listener
+    log_path = Path(log_path or BotConfig.bot_logs_path)
     # Create log files
-    BotConfig.bot_logs_dir_path.mkdir(parents=True, exist_ok=True)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Configure logger
+    # Configure handlers, they run on the listener thread
     steam_handler = logging.StreamHandler(stream=sys.stdout)
-    file_handler = logging.FileHandler(BotConfig.bot_logs_path)
+    file_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.namer = _gzip_namer
+    file_handler.rotator = _gzip_rotator
     steam_handler.setLevel(logging.INFO)
     file_handler.setLevel(logging.DEBUG)
 
-    log_format = logging.Formatter("%(asctime)s:%(levelname)s:%(filename)s:%(funcName)s:%(lineno)s:%(message)s")
+    log_format = logging.Formatter(LOG_FORMAT)
     steam_handler.setFormatter(log_format)
-    file_handler.setFormatter(log_format)
+    file_handler.setFormatter(JsonFormatter() if json_format else log_format)
+
+    # Bot threads only filter and enqueue
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = TracebackQueueHandler(log_queue)
+    if repeat_interval:
+        queue_handler.addFilter(RepeatFilter(repeat_interval))
 
     logger = logging.getLogger()
-    logger.addHandler(steam_handler)
-    logger.addHandler(file_handler)
+    stop_logger()  # configured again, e.g. in a fleet worker
+    for handler in [handler for handler in logger.handlers if isinstance(handler, QueueHandler)]:
+        logger.removeHandler(handler)
+    _listener = QueueListener(log_queue, steam_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(queue_handler)
     logger.setLevel(logging.DEBUG)
+
+
+atexit.register(stop_logger)
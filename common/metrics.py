@@ -0,0 +1,201 @@
+import bisect
+import logging
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Tuple, List, Optional
+
+# Seconds, upper bounds of latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27})(?=/|$)")
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(url: str) -> str:
+    """
+    Turn a requested url into its endpoint template, e.g. /lol-champ-select/v1/session/actions/{id}
+    :param url: path with optional query
+    :return: path with ids replaced
+    """
+    return _ID_SEGMENT.sub("/{id}", url.split("?", 1)[0])
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, not thread safe on its own"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Cumulative bucket counts as Prometheus reports them
+        :return: list of (upper bound, count)
+        """
+        bounds = [str(bucket) for bucket in self.buckets] + ["+Inf"]
+        result, running = [], 0
+        for bound, count in zip(bounds, self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+class MetricsRegistry:
+    """Per endpoint request metrics and per phase loop timings, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = defaultdict(Histogram)
+        self.request_status: Dict[Tuple[str, str, str, str], int] = defaultdict(int)
+        self.request_bytes: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.request_retries: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.retry_backoff_seconds: Dict[Tuple[str, str, str], float] = defaultdict(float)
+        self.phase_latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+
+    def observe_request(self, api: str, method: str, url: str, status: str, seconds: float, size: int) -> None:
+        """
+        Record a finished request
+        :param api: name of the API, e.g. lcu or live_client
+        :param method: http method
+        :param url: requested url, reduced to its endpoint template
+        :param status: status code, or error if no response
+        :param seconds: request duration
+        :param size: response body bytes
+        """
+        key = (api, method, endpoint_template(url))
+        with self._lock:
+            self.request_latency[key].observe(seconds)
+            self.request_status[key + (status,)] += 1
+            self.request_bytes[key] += size
+
+    def observe_retry(self, api: str, method: str, url: str, backoff: float) -> None:
+        """
+        Record a retried request
+        :param api: name of the API
+        :param method: http method
+        :param url: requested url
+        :param backoff: seconds slept before the retry
+        """
+        key = (api, method, endpoint_template(url))
+        with self._lock:
+            self.request_retries[key] += 1
+            self.retry_backoff_seconds[key] += backoff
+
+    def observe_phase(self, bot: str, phase: str, seconds: float) -> None:
+        """
+        Record time spent in a bot loop phase
+        :param bot: bot name
+        :param phase: handler name or gameplay_tick
+        :param seconds: time spent
+        """
+        with self._lock:
+            self.phase_latency[(bot, phase)].observe(seconds)
+
+    def render(self) -> str:
+        """
+        Render all metrics
+        :return: Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            request_labels = ("api", "method", "endpoint")
+            self._render_histogram(lines, "bot_request_duration_seconds", "Request latency per endpoint",
+                                   request_labels, self.request_latency)
+            self._render_counter(lines, "bot_requests_total", "Requests per endpoint and status",
+                                 request_labels + ("status",), self.request_status)
+            self._render_counter(lines, "bot_response_bytes_total", "Response body bytes per endpoint",
+                                 request_labels, self.request_bytes)
+            self._render_counter(lines, "bot_request_retries_total", "Retried requests per endpoint",
+                                 request_labels, self.request_retries)
+            self._render_counter(lines, "bot_retry_backoff_seconds_total", "Seconds slept backing off retries",
+                                 request_labels, self.retry_backoff_seconds)
+            self._render_histogram(lines, "bot_phase_duration_seconds", "Time spent per bot loop phase",
+                                   ("bot", "phase"), self.phase_latency)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in values)
+        return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+    def _render_counter(self, lines: List[str], name: str, help_text: str, label_names: Tuple[str, ...],
+                        values: Dict[Tuple[str, ...], float]) -> None:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for key, value in values.items():
+            lines.append(f"{name}{{{self._labels(label_names, key)}}} {value}")
+
+    def _render_histogram(self, lines: List[str], name: str, help_text: str, label_names: Tuple[str, ...],
+                          histograms: Dict[Tuple[str, ...], Histogram]) -> None:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for key, histogram in histograms.items():
+            labels = self._labels(label_names, key)
+            for bound, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+# Shared by every RequestAPI and bot of the process
+METRICS = MetricsRegistry()
+
+
+class MetricsServer:
+    """Serves a MetricsRegistry on /metrics for Prometheus to scrape"""
+
+    def __init__(self, registry: MetricsRegistry = METRICS, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        :param registry: metrics to serve
+        :param port: port to listen on
+        :param host: interface to listen on, localhost only by default
+        """
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler_class(self) -> type:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                content = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> int:
+        """
+        Serve in a background thread
+        :return: port the server listens on
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="metrics")
+        self._thread.start()
+        self.logger.info(f"Serving metrics on http://{self._server.server_address[0]}:{self.port}/metrics")
+        return self.port
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
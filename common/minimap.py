@@ -0,0 +1,242 @@
+import logging
+from dataclasses import dataclass
+from typing import Tuple, Optional, List
+
+import numpy as np
+
+from common import clock
+from common.constants import ScreenRegionRatios
+from common.window_manager import WindowManager
+
+# Points and boxes are fractions of the minimap size, 0, 0 is its top left corner
+Point = Tuple[float, float]
+
+
+@dataclass(frozen=True)
+class ColorRange:
+    """Inclusive RGB bounds of the pixels of a minimap marker"""
+    low: Tuple[int, int, int]
+    high: Tuple[int, int, int]
+
+    def mask(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Mark pixels inside the bounds
+        :param frame: height x width x 3 RGB uint8 array
+        :return: height x width bool array
+        """
+        mask = (frame[..., 0] >= self.low[0]) & (frame[..., 0] <= self.high[0])
+        for channel in (1, 2):
+            mask &= (frame[..., channel] >= self.low[channel]) & (frame[..., channel] <= self.high[channel])
+        return mask
+
+
+# Champion icon borders and the camera box as drawn on the minimap. Wide enough for the blended pixels of a scaled,
+# anti-aliased capture, a thin camera box line is never pure white there
+ALLY_BORDER = ColorRange(low=(0, 80, 140), high=(110, 215, 255))
+ENEMY_BORDER = ColorRange(low=(150, 0, 0), high=(255, 100, 100))
+CAMERA_BOX = ColorRange(low=(170, 170, 170), high=(255, 255, 255))
+
+
+@dataclass(frozen=True)
+class MinimapObservation:
+    """Champion icons and camera box found on one minimap frame"""
+    allies: Tuple[Point, ...]
+    enemies: Tuple[Point, ...]
+    camera: Optional[Tuple[float, float, float, float]]  # left, top, right, bottom
+    taken_at: float
+
+    @property
+    def position(self) -> Optional[Point]:
+        """Center of the camera box, where the player is while the camera is locked on them"""
+        if self.camera is None:
+            return None
+        return (self.camera[0] + self.camera[2]) / 2, (self.camera[1] + self.camera[3]) / 2
+
+    def nearby(self, point: Point, radius: float) -> Tuple[int, int]:
+        """
+        Count champion icons around a point
+        :param point: minimap point
+        :param radius: fraction of the minimap size
+        :return: allies and enemies within radius
+        """
+        def count(icons: Tuple[Point, ...]) -> int:
+            return sum((x - point[0]) ** 2 + (y - point[1]) ** 2 <= radius ** 2 for x, y in icons)
+        return count(self.allies), count(self.enemies)
+
+    def nearest_ally(self, point: Point) -> Optional[Point]:
+        """
+        :param point: minimap point
+        :return: closest ally icon, None if no ally is seen
+        """
+        return min(self.allies, key=lambda ally: (ally[0] - point[0]) ** 2 + (ally[1] - point[1]) ** 2, default=None)
+
+
+def to_window_ratio(point: Point, region: ScreenRegionRatios = ScreenRegionRatios.MINIMAP) -> Point:
+    """
+    Convert a minimap point to a fraction of the window size, to click it
+    :param point: minimap point
+    :param region: region the point was found in
+    :return: window ratio
+    """
+    left, top, right, bottom = region.value
+    return left + point[0] * (right - left), top + point[1] * (bottom - top)
+
+
+def find_components(mask: np.ndarray, min_pixels: int, cell: int = 3,
+                    max_iterations: int = 32) -> List[Tuple[float, float, int, float]]:
+    """
+    Label 8-connected components on a grid of cells, a cell is marked if any of its pixels is. Cells bridge gaps
+    narrower than a cell, e.g. where the camera box crosses an icon border, and make labeling cheap
+    :param mask: bool array
+    :param min_pixels: components with fewer marked pixels are dropped as noise
+    :param cell: cell width and height in pixels
+    :param max_iterations: propagation steps, bounds the length in cells of a component that is found whole
+    :return: x, y centroid in pixels, marked pixel count and spread of every component, the root mean square
+        distance of its pixels to the centroid. An icon border spreads its radius, a solid blob less
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not rows.size:
+        return []
+    cols = np.flatnonzero(mask.any(axis=0))
+    top, left = rows[0], cols[0]
+    mask = mask[top:rows[-1] + 1, left:cols[-1] + 1]
+    # Pad to whole cells, then mark a cell if any of its pixels is marked
+    height, width = -(-mask.shape[0] // cell), -(-mask.shape[1] // cell)
+    padded_mask = np.zeros((height * cell, width * cell), dtype=bool)
+    padded_mask[:mask.shape[0], :mask.shape[1]] = mask
+    cells = padded_mask.reshape(height, cell, width, cell).any(axis=(1, 3))
+
+    # Every marked cell takes the highest label around it till labels stop changing
+    labels = np.where(cells, np.arange(1, cells.size + 1, dtype=np.int32).reshape(cells.shape), 0)
+    padded = np.zeros((height + 2, width + 2), dtype=np.int32)
+    for _ in range(max_iterations):
+        padded[1:-1, 1:-1] = labels
+        spread = labels.copy()
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                if dy != 1 or dx != 1:
+                    np.maximum(spread, padded[dy:dy + height, dx:dx + width], out=spread)
+        spread *= cells
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+
+    ys, xs = np.nonzero(mask)
+    _, inverse, sizes = np.unique(labels[ys // cell, xs // cell], return_inverse=True, return_counts=True)
+    centers_x = np.bincount(inverse, weights=xs) / sizes + left
+    centers_y = np.bincount(inverse, weights=ys) / sizes + top
+    spreads = np.sqrt(np.bincount(inverse, weights=(xs + left - centers_x[inverse]) ** 2
+                                  + (ys + top - centers_y[inverse]) ** 2) / sizes)
+    return [(float(x), float(y), int(size), float(spread))
+            for x, y, size, spread in zip(centers_x, centers_y, sizes, spreads) if size >= min_pixels]
+
+
+def drop_portraits(components: List[Tuple[float, float, int, float]],
+                   others: List[Tuple[float, float, int, float]]) -> List[Tuple[float, float, int, float]]:
+    """
+    Drop components that are part of a portrait inside the border of an icon of the other team, portraits can hold
+    team colors. Such a blob is solid and centered in the border ring, it spreads less than two thirds of the ring
+    :param components: components of one team's border color from find_components
+    :param others: components of the other team's border color
+    :return: components that are not inside an icon of the other team
+    """
+    return [(x, y, size, spread) for x, y, size, spread in components
+            if not any((x - other_x) ** 2 + (y - other_y) ** 2 < other_spread ** 2 and spread < other_spread * 2 / 3
+                       for other_x, other_y, _, other_spread in others)]
+
+
+def find_box(mask: np.ndarray, min_edge: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Find a rectangle outline from its edges: its columns and rows hold the most marked pixels
+    :param mask: bool array
+    :param min_edge: marked pixels an edge needs at least
+    :return: left, top, right, bottom in pixels, None if no outline was found
+    """
+    col_counts = mask.sum(axis=0)
+    row_counts = mask.sum(axis=1)
+    if col_counts.max(initial=0) < min_edge and row_counts.max(initial=0) < min_edge:
+        return None
+    cols = np.flatnonzero(col_counts >= max(col_counts.max() / 2, 2))
+    rows = np.flatnonzero(row_counts >= max(row_counts.max() / 2, 2))
+    # An edge outside the minimap is missing, the marked extent ends at the border instead
+    marked_cols = np.flatnonzero(col_counts)
+    marked_rows = np.flatnonzero(row_counts)
+    left, right = (cols[0], cols[-1]) if cols[-1] - cols[0] >= min_edge else (marked_cols[0], marked_cols[-1])
+    top, bottom = (rows[0], rows[-1]) if rows[-1] - rows[0] >= min_edge else (marked_rows[0], marked_rows[-1])
+    return int(left), int(top), int(right), int(bottom)
+
+
+class MinimapAnalyzer:
+    """Finds champion icons and the camera box on the minimap with NumPy color masks"""
+
+    def __init__(self, step: int = 2, min_interval: float = 0.25, icon_pixels: int = 24,
+                 region: ScreenRegionRatios = ScreenRegionRatios.MINIMAP):
+        """
+        :param step: every step-th pixel per axis is analyzed, 2 quarters the work
+        :param min_interval: seconds an observation is reused before the minimap is grabbed again
+        :param icon_pixels: border pixels an icon has at least at full resolution
+        :param region: window region of the minimap
+        """
+        self.logger = logging.getLogger(__name__)
+        self.step = step
+        self.min_interval = min_interval
+        self.icon_pixels = icon_pixels
+        self.region = region
+        self.frames = 0
+        self._observation: Optional[MinimapObservation] = None
+
+    def analyze(self, frame: np.ndarray, taken_at: Optional[float] = None) -> MinimapObservation:
+        """
+        Find icons and camera box on a minimap frame
+        :param frame: height x width x 3 RGB uint8 array of the minimap region
+        :param taken_at: time the frame was grabbed, now if None
+        :return: MinimapObservation object
+        """
+        self.frames += 1
+        small = frame[::self.step, ::self.step]  # strided view, nothing is copied
+        height, width = small.shape[:2]
+        min_pixels = max(self.icon_pixels // self.step, 1)
+
+        cell = max(4 // self.step, 1)  # 4 pixels at full size, bridges the camera box crossing an icon
+
+        allies = find_components(ALLY_BORDER.mask(small), min_pixels, cell)
+        enemies = find_components(ENEMY_BORDER.mask(small), min_pixels, cell)
+
+        def icons(components: List[Tuple[float, float, int, float]],
+                  others: List[Tuple[float, float, int, float]]) -> Tuple[Point, ...]:
+            return tuple((x / width, y / height) for x, y, _, _ in drop_portraits(components, others))
+
+        # Camera box lines are a pixel wide and fall between strided pixels, its mask is cheap at full size
+        box = find_box(CAMERA_BOX.mask(frame), min_edge=8)
+        full_height, full_width = frame.shape[:2]
+        camera = (box[0] / full_width, box[1] / full_height, box[2] / full_width, box[3] / full_height) \
+            if box else None
+        return MinimapObservation(allies=icons(allies, enemies), enemies=icons(enemies, allies), camera=camera,
+                                  taken_at=clock.monotonic() if taken_at is None else taken_at)
+
+    def observe(self, window_manager: WindowManager) -> Optional[MinimapObservation]:
+        """
+        Grab and analyze the minimap, frames within min_interval of the last one are skipped
+        :param window_manager: manager of the game window
+        :return: latest observation, None if the minimap could not be grabbed
+        """
+        now = clock.monotonic()
+        if self._observation is not None and now - self._observation.taken_at < self.min_interval:
+            return self._observation
+        frame = window_manager.grab(self.region.value)
+        if frame is None:
+            return self._observation
+        self._observation = self.analyze(frame, taken_at=now)
+        self.logger.debug(f"Minimap {len(self._observation.allies)} allies, {len(self._observation.enemies)} enemies")
+        return self._observation
+
+    def window_ratio(self, point: Point) -> Point:
+        """
+        :param point: minimap point
+        :return: fraction of the window size, to click the point
+        """
+        return to_window_ratio(point, self.region)
+
+    def reset(self) -> None:
+        """Forget the last observation, e.g. once the game ended"""
+        self._observation = None
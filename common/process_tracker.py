@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Callable, List
+
+import psutil
+
+from common import clock
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessTracker:
+    """Tracks a process by name. Scans the process table only while the process is not known"""
+
+    def __init__(self, process_name: str, rescan_interval: float = 2.0, install_path: Optional[Path] = None):
+        """
+        :param process_name: name of process to track
+        :param rescan_interval: minimal time between process table scans while process is not running
+        :param install_path: only track the process if its executable is in this directory, any process of
+            that name if None. Tells apart the games of several installs on one machine
+        """
+        self.process_name = process_name
+        self.rescan_interval = rescan_interval
+        self.install_path = install_path
+        self._process: Optional[psutil.Process] = None
+        self._last_scan = float("-inf")
+        self._exit_callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def add_exit_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback fired from a background thread when the tracked process exits
+        :param callback: method to call
+        """
+        self._exit_callbacks.append(callback)
+
+    def _scan(self) -> Optional[psutil.Process]:
+        """
+        Walk the process table once looking for the process
+        :return: psutil.Process if found, None otherwise
+        """
+        self._last_scan = clock.monotonic()
+        for process in psutil.process_iter(["name", "exe"] if self.install_path else ["name"]):
+            if process.info["name"] == self.process_name and self._is_installed(process.info.get("exe")):
+                return process
+        return None
+
+    def _is_installed(self, exe: Optional[str]) -> bool:
+        """
+        :param exe: executable path of a process, None if access was denied
+        :return: True if executable is in install path or no install path is set, False otherwise
+        """
+        if self.install_path is None:
+            return True
+        if not exe:
+            return False
+        return os.path.normcase(exe).startswith(os.path.join(os.path.normcase(str(self.install_path)), ""))
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Pid of the tracked process, None if not known"""
+        process = self._process
+        return process.pid if process is not None else None
+
+    def find(self, force: bool = False) -> Optional[psutil.Process]:
+        """
+        Find the process, scanning only if rescan interval passed since last scan
+        :param force: scan regardless of rescan interval
+        :return: psutil.Process if running, None otherwise
+        """
+        with self._lock:
+            if self._process is not None:
+                return self._process
+            if not force and clock.monotonic() - self._last_scan < self.rescan_interval:
+                return None
+            process = self._scan()
+            if process is not None:
+                logger.debug(f"Tracking process {self.process_name} with pid {process.pid}")
+                self._process = process
+                threading.Thread(target=self._wait_for_exit, args=(process,), daemon=True,
+                                 name=f"wait-{self.process_name}").start()
+            return process
+
+    def _wait_for_exit(self, process: psutil.Process) -> None:
+        """
+        Block until process exits then fire exit callbacks
+        :param process: process to wait for
+        """
+        try:
+            process.wait()
+        except psutil.Error:
+            pass
+        with self._lock:
+            if self._process is process:
+                self._process = None
+        logger.info(f"Process {self.process_name} exited")
+        for callback in self._exit_callbacks:
+            callback()
+
+    def is_running(self) -> bool:
+        """
+        Check if process is running. Checks pid and create time of known process instead of scanning
+        :return: True if running, False otherwise
+        """
+        process = self._process
+        if process is not None and process.is_running():  # is_running also detects pid reuse via create time
+            return True
+        with self._lock:
+            if self._process is process:
+                self._process = None
+        return self.find() is not None
+
+    def terminate(self) -> None:
+        """Kill the process if running"""
+        process = self._process
+        if process is not None and process.is_running():
+            logger.info(f"Killing process {self.process_name}")
+            process.kill()
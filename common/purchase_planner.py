@@ -0,0 +1,109 @@
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Tuple, List, Sequence
+
+from common.item_catalog import ItemCatalog, CatalogItem
+
+# Inventory slots, trinket slot excluded
+INVENTORY_SLOTS = 6
+
+
+@dataclass(frozen=True)
+class Purchase:
+    """Dataclass containing one planned buy"""
+    item: CatalogItem
+    cost: int  # total cost minus owned components
+    consumed: Tuple[int, ...] = ()  # owned item ids merged into the item
+
+
+class PurchasePlanner:
+    """Works out every affordable purchase along a build path from one gold and inventory reading"""
+
+    def __init__(self, catalog: ItemCatalog, slots: int = INVENTORY_SLOTS):
+        """
+        :param catalog: item catalog with costs and component trees
+        :param slots: inventory slots a plan may fill
+        """
+        self.logger = logging.getLogger(__name__)
+        self.catalog = catalog
+        self.slots = slots
+
+    def plan(self, build_path: Sequence[int], inventory: Sequence[int], gold: float) -> List[Purchase]:
+        """
+        Plan the purchases of one shop visit. Owned path items are skipped, the first missing one is bought
+        using owned components, or as many of its components as gold allows, then the next one and so on
+        :param build_path: ids of finished items in build order, components are bought on the way
+        :param inventory: ids of owned items, one per occupied slot
+        :param gold: current gold
+        :return: purchases in the order they have to be made
+        """
+        owned = Counter(self.catalog.base_item(item_id) for item_id in inventory)
+        free = Counter(owned)  # owned items not claimed by an earlier path entry, may be merged into a purchase
+        used_slots = len(inventory)
+        purchases: List[Purchase] = []
+        for target in build_path:
+            if free[target]:
+                free[target] -= 1  # finished path items are never merged into later ones
+                continue
+            if target not in self.catalog or not self.catalog[target].purchasable:
+                self.logger.debug(f"Skipping {target}, it can not be bought")
+                continue
+            gold, used_slots, completed = self._buy(target, free, gold, used_slots, purchases)
+            if not completed:
+                break  # save the rest of the gold for this item
+            free[target] -= 1
+        return purchases
+
+    def _cost(self, item_id: int, free: Counter) -> Tuple[int, List[int]]:
+        """
+        Gold to buy an item when the shop merges owned components into it
+        :param item_id: item to buy
+        :param free: owned unclaimed items, components used are taken from it
+        :return: cost and ids of the owned components used
+        """
+        item = self.catalog[item_id]
+        cost, consumed = item.combine_cost, []
+        for component in item.components:
+            if free[component]:
+                free[component] -= 1
+                consumed.append(component)
+            else:
+                component_cost, component_consumed = self._cost(component, free)
+                cost += component_cost
+                consumed += component_consumed
+        return cost, consumed
+
+    def _buy(self, item_id: int, free: Counter, gold: float, used_slots: int,
+             purchases: List[Purchase]) -> Tuple[float, int, bool]:
+        """
+        Buy an item whole if affordable, its affordable components otherwise
+        :param item_id: item to buy
+        :param free: owned unclaimed items, updated with the purchases
+        :param gold: gold left
+        :param used_slots: occupied inventory slots
+        :param purchases: planned purchases, appended to
+        :return: gold left, occupied slots and whether the item was bought
+        """
+        item = self.catalog[item_id]
+        remaining = Counter(free)
+        cost, consumed = self._cost(item_id, remaining)
+        slots_after = used_slots - len(consumed) + 1
+        if item.purchasable and cost <= gold and slots_after <= self.slots:
+            remaining[item_id] += 1
+            free.clear()
+            free.update(remaining)
+            purchases.append(Purchase(item=item, cost=cost, consumed=tuple(consumed)))
+            return gold - cost, slots_after, True
+        reserved = Counter()  # owned or bought components set aside for this item
+        for component in item.components:
+            if free[component] - reserved[component] <= 0:
+                if component not in self.catalog:
+                    break
+                free.subtract(reserved)  # siblings' components are not merged into this one
+                gold, used_slots, completed = self._buy(component, free, gold, used_slots, purchases)
+                free.update(reserved)
+                if not completed:
+                    break
+            reserved[component] += 1
+        return gold, used_slots, False
@@ -0,0 +1,249 @@
+"""
+Serves a capture recorded by CaptureRecorder on local ports standing in for the LCU and the Live Client API.
+Run with: python -m common.replay_server capture.jsonl.gz --speed 10 --lockfile replay\\lockfile --bot yuumi
+to run a bot against the replay in the same process. The replayed Live Client traffic stands in for the game
+process, the bot plays the in game part of the capture while replay time is within it.
+Without --bot, point BotConfig.lol_base_path at the lockfile directory and set live_client_protocol to http
+to replay the client part from a separate bot process.
+"""
+import argparse
+import bisect
+import logging
+import ssl
+import threading
+import time
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional
+from urllib.parse import urlsplit
+
+from common.capture import read_capture
+from common.process_tracker import ProcessTracker
+
+logger = logging.getLogger(__name__)
+
+GAME_PROCESS_NAME = "League of Legends.exe"
+LIVE_CLIENT_PORT = 2999
+
+# (method, url) to recorded responses as (seconds since capture start, status, body), sorted by time
+Responses = Dict[Tuple[str, str], List[Tuple[float, int, str]]]
+
+
+class ReplayServer:
+    """Serves recorded responses of one origin. A request gets the latest response recorded up to replay time"""
+
+    def __init__(self, responses: Responses, clock_start: float, speed: float = 1.0, port: int = 0,
+                 certfile: Optional[Path] = None):
+        """
+        :param responses: recorded responses of this origin
+        :param clock_start: time.monotonic() replay started at, shared by all servers of a capture
+        :param speed: replay speed, 10 plays a capture ten times faster
+        :param port: port to listen on, random free port if 0
+        :param certfile: pem with certificate and key to serve https, http if None
+        """
+        self.responses = responses
+        self.times = {key: [response[0] for response in values] for key, values in responses.items()}
+        self.clock_start = clock_start
+        self.speed = speed
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+        self.port = self._server.server_address[1]
+
+    def replay_time(self) -> float:
+        return (time.monotonic() - self.clock_start) * self.speed
+
+    def lookup(self, method: str, url: str) -> Tuple[int, str]:
+        """
+        Find the response recorded for a request at current replay time
+        :param method: http method
+        :param url: path and query
+        :return: status and body
+        """
+        key = (method, url)
+        if key not in self.responses:
+            key = (method, urlsplit(url).path)
+        if key not in self.responses:
+            return (404, '{"httpStatus":404}') if method == "GET" else (204, "")
+        index = max(bisect.bisect_right(self.times[key], self.replay_time()) - 1, 0)
+        _, status, body = self.responses[key][index]
+        return status, body
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            wbufsize = 1 << 16  # headers and body leave in one write
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length", 0))
+                if length:
+                    self.rfile.read(length)
+                status, body = server.lookup(self.command, self.path)
+                content = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> int:
+        """
+        Serve in a background thread
+        :return: port the server listens on
+        """
+        threading.Thread(target=self._server.serve_forever, daemon=True, name=f"replay-{self.port}").start()
+        return self.port
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ReplayProcess(ProcessTracker):
+    """Stands in for the game process, runs while replay time is within the recorded Live Client traffic"""
+
+    def __init__(self, live_client: ReplayServer, process_name: str = GAME_PROCESS_NAME):
+        """
+        :param live_client: server replaying the Live Client API
+        :param process_name: name of the game process
+        """
+        super().__init__(process_name)
+        self.live_client = live_client
+        self.first = min(times[0] for times in live_client.times.values())
+        self.last = max(times[-1] for times in live_client.times.values())
+        self._running = False
+
+    def find(self, force: bool = False):
+        return None
+
+    def is_running(self) -> bool:
+        running = self.first <= self.live_client.replay_time() <= self.last
+        with self._lock:
+            exited, self._running = self._running and not running, running
+        if exited:
+            logger.info(f"Process {self.process_name} exited")
+            for callback in self._exit_callbacks:
+                callback()
+        return running
+
+    def terminate(self) -> None:
+        pass
+
+
+def load_responses(capture_path: Path) -> Dict[str, Responses]:
+    """
+    Group recorded responses by origin and request
+    :param capture_path: capture file
+    :return: origin to its responses
+    """
+    origins: Dict[str, Responses] = defaultdict(lambda: defaultdict(list))
+    first = None
+    for record in read_capture(capture_path):
+        first = record["ts"] if first is None else first
+        origins[record["origin"]][(record["method"], record["url"])].append(
+            (record["ts"] - first, record["status"], record["response"]))
+    for responses in origins.values():
+        for values in responses.values():
+            values.sort(key=lambda response: response[0])
+    return origins
+
+
+def start_replay(capture_path: Path, speed: float = 1.0, ports: Optional[Dict[str, int]] = None,
+                 certfile: Optional[Path] = None) -> Dict[str, ReplayServer]:
+    """
+    Start a replay server for every origin of a capture
+    :param capture_path: capture file
+    :param speed: replay speed
+    :param ports: origin to port, recorded port if origin missing
+    :param certfile: pem to serve https with
+    :return: origin to running ReplayServer
+    """
+    ports = ports or {}
+    clock_start = time.monotonic()
+    servers = {}
+    for origin, responses in load_responses(capture_path).items():
+        port = ports.get(origin, urlsplit(origin).port)
+        servers[origin] = ReplayServer(responses, clock_start, speed=speed, port=port, certfile=certfile)
+        servers[origin].start()
+        logger.info(f"Replaying {origin} on port {servers[origin].port}")
+    return servers
+
+
+def write_client_files(lockfile: Path, lcu_port: int, protocol: str) -> None:
+    """
+    Write the lockfile and a stub game cfg BotConfig reads, standing in for a League install
+    :param lockfile: lockfile path, the game cfg goes to Config/game.cfg next to it
+    :param lcu_port: port of the replayed LCU
+    :param protocol: http or https
+    """
+    lockfile.parent.mkdir(parents=True, exist_ok=True)
+    lockfile.write_text(f"LeagueClient:0:{lcu_port}:replay:{protocol}")
+    game_cfg = lockfile.parent / "Config" / "game.cfg"
+    if not game_cfg.exists():
+        game_cfg.parent.mkdir(exist_ok=True)
+        game_cfg.write_text("[General]\n[HUD]\n[ItemShop]\n")
+
+
+def run_bot(bot_name: str, lockfile: Path, live_client: Optional[ReplayServer], protocol: str) -> None:
+    """
+    Run a bot against the replay in this process, with the replayed game standing in for the game process
+    :param bot_name: bot name from bot.BOTS
+    :param lockfile: lockfile written by write_client_files
+    :param live_client: server replaying the Live Client API, None if the capture holds no game
+    :param protocol: http or https
+    """
+    from bot import load_bot  # the bots are only needed with --bot
+    from common.input_backends import NoopBackend
+    from common.utils import set_process_tracker
+    from config import BotConfig
+
+    if live_client:
+        set_process_tracker(GAME_PROCESS_NAME, ReplayProcess(live_client))
+    config = BotConfig(lol_base_path=lockfile.parent, lock_file_path=lockfile, bot_name=bot_name,
+                       live_client_port=str(live_client.port if live_client else LIVE_CLIENT_PORT),
+                       live_client_protocol=protocol, watch_lockfile=False, use_client_events=False)
+    load_bot(bot_name)(config=config, input_backend=NoopBackend()).main_loop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", type=Path)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--certfile", type=Path, help="pem with certificate and key to serve https")
+    parser.add_argument("--lockfile", type=Path, help="write a lockfile and game cfg pointing at the replayed LCU")
+    parser.add_argument("--bot", help="run this bot against the replay, needs --lockfile")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.bot and not args.lockfile:
+        parser.error("--bot needs --lockfile")
+
+    servers = start_replay(args.capture, speed=args.speed, certfile=args.certfile)
+    protocol = "https" if args.certfile else "http"
+    lcu = next((server for origin, server in servers.items() if not origin.endswith(f":{LIVE_CLIENT_PORT}")), None)
+    live_client = next((server for origin, server in servers.items()
+                        if origin.endswith(f":{LIVE_CLIENT_PORT}")), None)
+    if args.lockfile and lcu:
+        write_client_files(args.lockfile, lcu.port, protocol)
+    if args.bot:
+        run_bot(args.bot, args.lockfile, live_client, protocol)
+    else:
+        threading.Event().wait()
+
+
+if __name__ == '__main__':
+    main()
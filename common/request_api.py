@@ -1,4 +1,6 @@
+import dataclasses
 import logging
+import threading
 import time
 from functools import partial
 from typing import Optional, Dict, Any, Callable
@@ -7,124 +9,247 @@ import requests
 import urllib3
 from requests import Response, HTTPError
 
+from common import clock
+from common.capture import CaptureRecorder
+from common.metrics import METRICS, MetricsRegistry
+from common.retry_policy import RetryPolicy, CircuitBreaker, CircuitOpenError, RetryRule
+from common.transport import TransportConfig, Timeout, create_session, warm_up
+
 
 class RequestAPI:
     """Base requests API class"""
 
-    def __init__(self, protocol: str, domain: str, port: str):
+    def __init__(self, protocol: str, domain: str, port: str, recorder: Optional[CaptureRecorder] = None,
+                 name: str = "api", metrics: MetricsRegistry = METRICS, retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, transport: Optional[TransportConfig] = None):
+        """
+        :param recorder: records every request and response if set
+        :param name: api label of request metrics
+        :param metrics: registry request latency, status, size and retries are recorded to
+        :param retry_policy: per endpoint retry rules of *_with_retries calls, default rule for all if None
+        :param circuit_breaker: fails requests fast while the server is down, default CircuitBreaker if None
+        :param transport: connection pool and per endpoint timeouts, default TransportConfig if None
+        """
         self.logger = logging.getLogger(__name__)
-        self.base_url = f"{protocol}://{domain}:{port}"
-        self.session = requests.session()
-        self.headers = {}
+        self.recorder = recorder
+        self.name = name
+        self.metrics = metrics
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.transport = transport or TransportConfig()
+        self.session = create_session(self.transport)
+        self._connection_lock = threading.Lock()
+        self._connection = (f"{protocol}://{domain}:{port}", {})
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-    def _retry_request(self, request_callback: Callable[[], Response], retries: int = 5, initial_delay: int = 1,
-                       max_delay: int = 16) -> Response:
+    @property
+    def base_url(self) -> str:
+        return self._connection[0]
+
+    @base_url.setter
+    def base_url(self, base_url: str) -> None:
+        self.set_connection(base_url, self.headers)
+
+    @property
+    def headers(self) -> Dict[str, Any]:
+        return self._connection[1]
+
+    @headers.setter
+    def headers(self, headers: Dict[str, Any]) -> None:
+        self.set_connection(self.base_url, headers)
+
+    def set_connection(self, base_url: str, headers: Dict[str, Any]) -> None:
+        """
+        Swap base url and default headers together so no request sees half of a change
+        :param base_url: protocol, domain and port
+        :param headers: default headers
+        """
+        with self._connection_lock:
+            self._connection = (base_url, headers)
+        self.circuit_breaker.reset()
+
+    def warm_up(self, url: str = "/") -> bool:
+        """
+        Open a keep-alive connection ahead of the first request
+        :param url: url to request, any response counts
+        :return: True if connected, False if server is not listening yet
+        """
+        return warm_up(self.session, self.base_url + url, self.transport.timeout_for(url))
+
+    def _request(self, method: str, url: str, data: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> Response:
+        """
+        Do a request
+        :param method: http method
+        :param url: url to request
+        :param data: data to send with request
+        :param headers: headers to send with request, default headers if None
+        :param timeout: connect and read timeout, endpoint default of transport if None
+        :return: Response object
+        """
+        base_url, default_headers = self._connection
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError(f"{base_url} is down. Retry in {self.circuit_breaker.remaining():.1f} s",
+                                   request=requests.Request(method, base_url + url))
+        started, start = time.time(), time.perf_counter()
+        try:
+            response = self.session.request(method, url=base_url + url, headers=headers or default_headers,
+                                            json=data, timeout=timeout or self.transport.timeout_for(url),
+                                            verify=False)
+        except requests.RequestException:
+            self.circuit_breaker.record_failure()
+            self.metrics.observe_request(self.name, method, url, "error", time.perf_counter() - start, 0)
+            raise
+        self.circuit_breaker.record_success()
+        elapsed = time.perf_counter() - start
+        self.metrics.observe_request(self.name, method, url, str(response.status_code), elapsed,
+                                     len(response.content))
+        if self.recorder:
+            self.recorder.record(origin=base_url, method=method, url=url, request_body=data,
+                                 status=response.status_code, response_body=response.content, started=started,
+                                 elapsed=elapsed)
+        return response
+
+    def _retry_rule(self, url: str, retries: Optional[int], initial_delay: Optional[float],
+                    max_delay: Optional[float]) -> RetryRule:
+        """
+        Get retry rule of an endpoint with explicit arguments of a call applied
+        :param url: requested url
+        :param retries: amount of retries, rule's if None
+        :param initial_delay: starting delay between retries, rule's if None
+        :param max_delay: maximum delay between retries, rule's if None
+        :return: RetryRule object
+        """
+        rule = self.retry_policy.rule_for(url)
+        overrides = {name: value for name, value in (("retries", retries), ("initial_delay", initial_delay),
+                                                     ("max_delay", max_delay)) if value is not None}
+        return dataclasses.replace(rule, **overrides) if overrides else rule
+
+    def _retry_request(self, request_callback: Callable[[], Response], retries: Optional[int] = None,
+                       initial_delay: Optional[float] = None, max_delay: Optional[float] = None, method: str = "",
+                       url: str = "") -> Response:
         """
-        Method to retry a request
-        :param retries: amount of retries
-        :param initial_delay: starting delay between retries, increases exponentially
-        :param max_delay: maximum delay between retries allowed
+        Method to retry a request following the retry rule of its endpoint. Non retryable errors fail at once
+        :param retries: amount of retries, rule's if None
+        :param initial_delay: starting delay between retries, increases exponentially, rule's if None
+        :param max_delay: maximum delay between retries allowed, rule's if None
+        :param method: http method of request, for retry metrics
+        :param url: url of request, picks the retry rule
         :return: Response object
         """
-        for i in range(retries):
-            result = request_callback()
+        rule = self._retry_rule(url, retries, initial_delay, max_delay)
+        deadline = clock.monotonic() + rule.deadline
+        error: Optional[Exception] = None
+        for i in range(rule.retries):
             try:
-                result.raise_for_status()
-                return result
-            except HTTPError as err:
-                self.logger.debug(f"Retrying request {i + 1} times. Error {err}")
-            time.sleep(min(initial_delay * 2 ** i, max_delay))
-        raise HTTPError("Retries exceeded")
+                result = request_callback()
+                if result.ok:
+                    return result
+                status = result.status_code
+                if not self.retry_policy.is_retryable(rule, status):
+                    result.raise_for_status()  # e.g. 404 of an endpoint that will not appear, fail at once
+                error = HTTPError(f"{status} Error for url: {url}", response=result)
+            except (requests.ConnectionError, requests.Timeout) as err:  # Connection errors while client restarts
+                if not rule.retry_connection_errors:
+                    raise
+                error = err
+            # Wait for the circuit to let a probe through rather than fail on every attempt while it is open
+            backoff = max(self.retry_policy.backoff(rule, i), self.circuit_breaker.remaining())
+            if i == rule.retries - 1 or clock.monotonic() + backoff > deadline:
+                break
+            self.logger.debug(f"Retrying request {i + 1} times in {backoff:.2f} s. Error {error}")
+            self.metrics.observe_retry(self.name, method, url, backoff)
+            clock.sleep(backoff)
+        raise HTTPError(f"Retries exceeded for {url}") from error
 
     def get(self, url: str, data: Optional[Dict[str, Any]] = None,
-            headers: Optional[Dict[str, Any]] = None) -> Response:
+            headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> Response:
         """
         Do a get request
         :param url: url to get
         :param data: data to send with request
         :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
         :return: Response object
         """
-        if not headers:
-            headers = self.headers
-        return self.session.get(url=self.base_url + url, headers=headers, json=data, verify=False)
+        return self._request("GET", url, data=data, headers=headers, timeout=timeout)
 
     def post(self, url: str, data: Optional[Dict[str, Any]] = None,
-             headers: Optional[Dict[str, Any]] = None) -> Response:
+             headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> Response:
         """
         Do a post request
         :param url: url to get
         :param data: data to send with request
         :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
         :return: Response object
         """
-        if not headers:
-            headers = self.headers
-        return self.session.post(url=self.base_url + url, headers=headers, json=data, verify=False)
+        return self._request("POST", url, data=data, headers=headers, timeout=timeout)
 
     def put(self, url: str, data: Optional[Dict[str, Any]] = None,
-            headers: Optional[Dict[str, Any]] = None) -> Response:
+            headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> Response:
         """
         Do a put request
         :param url: url to get
         :param data: data to send with request
         :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
         :return: Response object
         """
-        if not headers:
-            headers = self.headers
-        return self.session.put(url=self.base_url + url, headers=headers, json=data, verify=False)
+        return self._request("PUT", url, data=data, headers=headers, timeout=timeout)
 
     def patch(self, url: str, data: Optional[Dict[str, Any]] = None,
-              headers: Optional[Dict[str, Any]] = None) -> Response:
+              headers: Optional[Dict[str, Any]] = None, timeout: Optional[Timeout] = None) -> Response:
         """
         Do a patch request
         :param url: url to get
         :param data: data to send with request
         :param headers: headers to send with request
+        :param timeout: connect and read timeout, endpoint default if None
         :return: Response object
         """
-        if not headers:
-            headers = self.headers
-        return self.session.patch(url=self.base_url + url, headers=headers, json=data, verify=False)
+        return self._request("PATCH", url, data=data, headers=headers, timeout=timeout)
 
     def get_with_retries(self, url: str, data: Optional[Dict[str, Any]] = None,
-                         headers: Optional[Dict[str, Any]] = None, retries: int = 5, initial_delay: int = 1,
-                         max_delay: int = 16) -> Response:
+                         headers: Optional[Dict[str, Any]] = None, retries: Optional[int] = None,
+                         initial_delay: Optional[float] = None, max_delay: Optional[float] = None) -> Response:
         """
         Attempt a get request given amount of time, delay between retries rises exponentially
         :param url: url to get
         :param data: data to send with request
         :param headers: headers to send with request
-        :param retries: amount of retries
-        :param initial_delay: starting delay between retries, increases exponentially
-        :param max_delay: maximum delay between retries allowed
+        :param retries: amount of retries, endpoint rule's if None
+        :param initial_delay: starting delay between retries, increases exponentially, endpoint rule's if None
+        :param max_delay: maximum delay between retries allowed, endpoint rule's if None
         :return: Response object
         """
         return self._retry_request(
             request_callback=partial(self.get, url=url, data=data, headers=headers),
             retries=retries,
             initial_delay=initial_delay,
-            max_delay=max_delay
+            max_delay=max_delay,
+            method="GET",
+            url=url
         )
 
     def post_with_retries(self, url: str, data: Optional[Dict[str, Any]] = None,
-                          headers: Optional[Dict[str, Any]] = None, retries: int = 5, initial_delay: int = 1,
-                          max_delay: int = 16) -> Response:
+                          headers: Optional[Dict[str, Any]] = None, retries: Optional[int] = None,
+                          initial_delay: Optional[float] = None, max_delay: Optional[float] = None) -> Response:
         """
         Attempt a post request given amount of time, delay between retries rises exponentially
         :param url: url to get
         :param data: data to send with request
         :param headers: headers to send with request
-        :param retries: amount of retries
-        :param initial_delay: starting delay between retries, increases exponentially
-        :param max_delay: maximum delay between retries allowed
+        :param retries: amount of retries, endpoint rule's if None
+        :param initial_delay: starting delay between retries, increases exponentially, endpoint rule's if None
+        :param max_delay: maximum delay between retries allowed, endpoint rule's if None
         :return: Response object
         """
         return self._retry_request(
             request_callback=partial(self.post, url=url, data=data, headers=headers),
             retries=retries,
             initial_delay=initial_delay,
-            max_delay=max_delay
+            max_delay=max_delay,
+            method="POST",
+            url=url
         )
@@ -0,0 +1,154 @@
+import fnmatch
+import logging
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import FrozenSet, Dict, Optional
+
+import requests
+
+from common import clock
+from common.metrics import endpoint_template
+
+# Statuses a server returns while overloaded or starting, worth retrying on any endpoint
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without sending a request while the circuit breaker of an API is open"""
+
+    def __init__(self, message="Circuit open, server is down", request: Optional[requests.Request] = None):
+        super().__init__(message, request=request)
+
+
+def is_connection_error(err: BaseException, base_url: str) -> bool:
+    """
+    Check whether a request error, or an error it was raised from, failed to connect to a server
+    :param err: raised error, e.g. HTTPError of exceeded retries
+    :param base_url: protocol, domain and port of the server
+    :return: True if connecting to given server failed, False for other servers, read timeouts and error statuses
+    """
+    error: Optional[BaseException] = err
+    while error is not None:
+        request = getattr(error, "request", None)
+        if isinstance(error, requests.ConnectionError) and request is not None:
+            return request.url.startswith(base_url + "/")
+        error = error.__cause__
+    return False
+
+
+@dataclass(frozen=True)
+class RetryRule:
+    """Dataclass containing how requests to an endpoint are retried"""
+    retry_statuses: FrozenSet[int] = TRANSIENT_STATUSES
+    retry_connection_errors: bool = True
+    retries: int = 5
+    initial_delay: float = 1.0
+    max_delay: float = 16.0
+    jitter: float = 0.5  # fraction of each backoff randomized away so callers don't retry in lockstep
+    deadline: float = 30.0  # seconds one call may spend including all retries
+
+
+@dataclass
+class RetryPolicy:
+    """Picks the RetryRule of a request by its endpoint template and computes backoffs"""
+    default: RetryRule = field(default_factory=RetryRule)
+    rules: Dict[str, RetryRule] = field(default_factory=dict)  # fnmatch pattern of endpoint template to rule
+
+    def rule_for(self, url: str) -> RetryRule:
+        """
+        Find the rule of an endpoint, first matching pattern wins
+        :param url: requested url
+        :return: RetryRule object
+        """
+        template = endpoint_template(url)
+        for pattern, rule in self.rules.items():
+            if fnmatch.fnmatchcase(template, pattern):
+                return rule
+        return self.default
+
+    @staticmethod
+    def is_retryable(rule: RetryRule, status: Optional[int]) -> bool:
+        """
+        Check whether a failed attempt should be retried
+        :param rule: rule of the request
+        :param status: status code of response, None for connection errors
+        :return: True if retryable, False otherwise
+        """
+        if status is None:
+            return rule.retry_connection_errors
+        return status in rule.retry_statuses
+
+    @staticmethod
+    def backoff(rule: RetryRule, attempt: int) -> float:
+        """
+        Jittered exponential delay before the next attempt
+        :param rule: rule of the request
+        :param attempt: zero based attempt that failed
+        :return: seconds to wait
+        """
+        delay = min(rule.initial_delay * 2 ** attempt, rule.max_delay)
+        return delay * (1 - rule.jitter * random.random())
+
+
+class CircuitBreaker:
+    """Fails requests fast after consecutive connection failures, lets one probe through every reset_timeout"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 5.0):
+        """
+        :param failure_threshold: consecutive connection failures that open the circuit
+        :param reset_timeout: seconds the circuit stays open before a probe request is allowed
+        """
+        self.logger = logging.getLogger(__name__)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def remaining(self) -> float:
+        """
+        Time till the next probe is allowed
+        :return: seconds, 0 if circuit is closed or a probe is due
+        """
+        opened_at = self.opened_at
+        return max(opened_at + self.reset_timeout - clock.monotonic(), 0.0) if opened_at is not None else 0.0
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent, letting a single probe through once reset_timeout passed
+        :return: True if request may be sent, False to fail fast
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or clock.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                self.logger.info("Circuit closed, server is back")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    self.logger.info(f"Circuit opened after {self.failures} connection failures")
+                self.opened_at = clock.monotonic()
+            self._probing = False
+
+    def reset(self) -> None:
+        """Close the circuit, e.g. once credentials changed and the old failures no longer apply"""
+        self.record_success()
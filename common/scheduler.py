@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import logging
+from typing import Callable, Optional, Dict, List, Tuple
+
+from common import clock
+
+
+class ScheduledAction:
+    """Handle of a deferred action or timer run by TickScheduler"""
+
+    def __init__(self, due: float, callback: Optional[Callable[[], None]], name: Optional[str]):
+        self.due = due
+        self.callback = callback
+        self.name = name
+        self.cancelled = False
+        self.done = False
+
+    @property
+    def pending(self) -> bool:
+        return not self.cancelled and not self.done
+
+    def remaining(self) -> float:
+        """
+        Time left till action is due
+        :return: seconds, 0 if due
+        """
+        return max(self.due - clock.monotonic(), 0.0)
+
+    def cancel(self) -> None:
+        """Cancel the action, its callback will not run"""
+        self.cancelled = True
+
+
+class TickScheduler:
+    """Runs timers and deferred actions from the bot loop instead of sleeping inside actions"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._queue: List[Tuple[float, int, ScheduledAction]] = []
+        self._named: Dict[str, ScheduledAction] = {}
+        self._counter = itertools.count()
+
+    def call_later(self, delay: float, callback: Optional[Callable[[], None]] = None,
+                   name: Optional[str] = None) -> ScheduledAction:
+        """
+        Schedule a callback to run on the first tick after delay
+        :param delay: seconds from now
+        :param callback: method to run, a plain timer if None
+        :param name: replaces a pending action with the same name, used to query it later
+        :return: ScheduledAction handle
+        """
+        if name:
+            self.cancel(name)
+        action = ScheduledAction(due=clock.monotonic() + delay, callback=callback, name=name)
+        heapq.heappush(self._queue, (action.due, next(self._counter), action))
+        if name:
+            self._named[name] = action
+        self.logger.debug(f"Scheduled {name or callback} in {delay} s")
+        return action
+
+    def wait(self, name: str, delay: float) -> ScheduledAction:
+        """
+        Start a cancellable wait the loop can check with is_pending instead of sleeping
+        :param name: name of the wait
+        :param delay: seconds to wait
+        :return: ScheduledAction handle
+        """
+        return self.call_later(delay, name=name)
+
+    def is_pending(self, name: str) -> bool:
+        """
+        Check if a named action or wait is still pending
+        :param name: name of action
+        :return: True if pending, False otherwise
+        """
+        action = self._named.get(name)
+        return bool(action and action.pending)
+
+    def cancel(self, name: str) -> None:
+        """
+        Cancel a named action if pending
+        :param name: name of action
+        """
+        action = self._named.pop(name, None)
+        if action and action.pending:
+            self.logger.debug(f"Cancelled {name}")
+            action.cancel()
+
+    def throttle(self, name: str, interval: float) -> bool:
+        """
+        Rate limit an action to once per interval
+        :param name: name of the action
+        :param interval: minimal seconds between runs
+        :return: True if action may run now, False otherwise
+        """
+        if self.is_pending(name):
+            return False
+        self.wait(name, interval)
+        return True
+
+    def run_pending(self) -> int:
+        """
+        Run every action that is due, called once per tick
+        :return: amount of callbacks run
+        """
+        ran = 0
+        now = clock.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, action = heapq.heappop(self._queue)
+            if not action.pending:
+                continue
+            action.done = True
+            if action.name and self._named.get(action.name) is action:
+                del self._named[action.name]
+            if action.callback:
+                action.callback()
+                ran += 1
+        return ran
+
+    def idle(self, max_wait: float) -> None:
+        """
+        Sleep until the next action is due, at most max_wait
+        :param max_wait: longest time to sleep
+        """
+        while self._queue and not self._queue[0][2].pending:
+            heapq.heappop(self._queue)
+        delay = min(self._queue[0][0] - clock.monotonic(), max_wait) if self._queue else max_wait
+        if delay > 0:
+            clock.sleep(delay)
+
+    def clear(self) -> None:
+        """Cancel everything, e.g. once the game ended"""
+        for _, _, action in self._queue:
+            action.cancel()
+        self._queue.clear()
+        self._named.clear()
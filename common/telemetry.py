@@ -0,0 +1,320 @@
+"""
+Per game telemetry in a local SQLite file: one row per game, typed per tick samples, game events and time spent
+in each client phase. Query with: python -m common.telemetry games --db telemetry.db
+"""
+import argparse
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple, List, Dict, Any
+
+from common import clock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY, bot TEXT NOT NULL, started_at REAL NOT NULL, ended_at REAL, result TEXT);
+CREATE TABLE IF NOT EXISTS ticks (
+    game_id TEXT NOT NULL, t REAL NOT NULL, gold REAL, current_hp REAL, max_hp REAL, level INTEGER,
+    alive INTEGER, tick_ms REAL, state_age_ms REAL);
+CREATE TABLE IF NOT EXISTS events (game_id TEXT NOT NULL, t REAL NOT NULL, kind TEXT NOT NULL, detail TEXT);
+CREATE TABLE IF NOT EXISTS phases (
+    bot TEXT NOT NULL, phase TEXT NOT NULL, started_at REAL NOT NULL, seconds REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS ticks_game ON ticks (game_id, t);
+CREATE INDEX IF NOT EXISTS events_game ON events (game_id, kind);
+CREATE INDEX IF NOT EXISTS phases_started ON phases (started_at);
+"""
+
+# Statements rows are queued for, rows of one flush are written in a single transaction
+STATEMENTS = {
+    "game": "INSERT OR REPLACE INTO games (game_id, bot, started_at) VALUES (?, ?, ?)",
+    "game_end": "UPDATE games SET ended_at = ?, result = ? WHERE game_id = ?",
+    "game_result": "UPDATE games SET result = ? WHERE game_id = ? AND result IS NULL",
+    "tick": "INSERT INTO ticks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "event": "INSERT INTO events VALUES (?, ?, ?, ?)",
+    "phase": "INSERT INTO phases VALUES (?, ?, ?, ?)",
+}
+
+# Event kinds recorded by the bots
+DEATH = "death"
+PURCHASE = "purchase"
+ITEM = "item"  # a build path item made of components was bought, time to first item is the first of these
+RETREAT = "retreat"
+
+
+class TelemetryRecorder:
+    """Queues telemetry rows without blocking the caller and writes them in batches from a background thread"""
+
+    def __init__(self, path: Path, bot_name: str, max_queue: int = 100000, flush_interval: float = 1.0,
+                 batch_size: int = 5000):
+        """
+        :param path: SQLite file, created if missing
+        :param bot_name: bot the rows are recorded for
+        :param max_queue: rows waiting to be written, newer rows are dropped if the writer falls behind
+        :param flush_interval: seconds between transactions
+        :param batch_size: rows written per transaction at most
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.bot_name = bot_name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Tuple[str, Tuple[Any, ...]]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._game: Optional[Tuple[str, float]] = None  # game id and clock.monotonic() it started at
+        self._unresolved: Optional[str] = None  # id of the last game, if it ended without a result
+        self._phase: Optional[Tuple[str, float, float]] = None  # phase, clock.time() and clock.monotonic() entered
+
+    @property
+    def game_id(self) -> Optional[str]:
+        return self._game[0] if self._game else None
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="telemetry-writer")
+        self._thread.start()
+        self.logger.info(f"Recording telemetry to {self.path}")
+
+    def close(self) -> None:
+        """Close the current phase, write pending rows and stop the writer thread"""
+        self.phase(None)
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _put(self, statement: str, row: Tuple[Any, ...]) -> None:
+        try:
+            self._queue.put_nowait((statement, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def start_game(self) -> str:
+        """
+        Open a game row, ticks and events are recorded for it till end_game
+        :return: game id
+        """
+        if self._game:
+            self.end_game()
+        game_id = uuid.uuid4().hex
+        self._game = (game_id, clock.monotonic())
+        self._put("game", (game_id, self.bot_name, clock.time()))
+        return game_id
+
+    def end_game(self, result: Optional[str] = None) -> None:
+        """
+        Close the current game row, does nothing if no game is open
+        :param result: Win or Lose as reported by the GameEnd event, None if the game process exited without one
+        """
+        game, self._game = self._game, None
+        if game:
+            self._put("game_end", (clock.time(), result, game[0]))
+            self._unresolved = game[0] if result is None else None
+
+    @property
+    def result_missing(self) -> bool:
+        """Whether the last game ended without a result, e.g. the game exited before its GameEnd event was read"""
+        return self._unresolved is not None
+
+    def record_result(self, result: Optional[str]) -> None:
+        """
+        Set the result of the last game if it ended without one
+        :param result: Win or Lose, e.g. from the end of game stats of the client, None if unknown
+        """
+        game_id, self._unresolved = self._unresolved, None
+        if game_id and result:
+            self._put("game_result", (result, game_id))
+
+    def sample(self, gold: float, current_hp: float, max_hp: float, level: int, is_alive: bool,
+               tick_seconds: float, state_age: Optional[float] = None) -> None:
+        """
+        Record the state at the end of a gameplay tick, does nothing if no game is open
+        :param gold: current gold
+        :param current_hp: current health
+        :param max_hp: maximum health
+        :param level: champion level
+        :param is_alive: whether the champion is alive
+        :param tick_seconds: time the tick took
+        :param state_age: age of the state the tick acted on, None if read inline
+        """
+        game = self._game
+        if game:
+            self._put("tick", (game[0], clock.monotonic() - game[1], gold, current_hp, max_hp, level, int(is_alive),
+                               tick_seconds * 1000, state_age * 1000 if state_age is not None else None))
+
+    def event(self, kind: str, detail: Optional[str] = None) -> None:
+        """
+        Record a game event, does nothing if no game is open
+        :param kind: event kind, e.g. DEATH or PURCHASE
+        :param detail: e.g. killer or item name
+        """
+        game = self._game
+        if game:
+            self._put("event", (game[0], clock.monotonic() - game[1], kind, detail))
+
+    def phase(self, phase: Optional[str]) -> None:
+        """
+        Record the current client phase, the time spent in the previous one is written once the phase changes
+        :param phase: ClientPhases value, None to close the current phase
+        """
+        current = self._phase
+        if current and current[0] == phase:
+            return
+        now = clock.monotonic()
+        if current:
+            self._put("phase", (self.bot_name, current[0], current[1], now - current[2]))
+        self._phase = (phase, clock.time(), now) if phase is not None else None
+
+    def _drain(self) -> List[Tuple[str, Tuple[Any, ...]]]:
+        rows = []
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, connection: sqlite3.Connection, rows: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        # Consecutive rows of one statement go to one executemany, order is kept so a game row precedes its update
+        try:
+            with connection:
+                start = 0
+                for index in range(1, len(rows) + 1):
+                    if index == len(rows) or rows[index][0] != rows[start][0]:
+                        connection.executemany(STATEMENTS[rows[start][0]], [row for _, row in rows[start:index]])
+                        start = index
+            self.written += len(rows)
+        except sqlite3.Error as err:
+            self.logger.warning(f"Dropped {len(rows)} telemetry rows. Error {err}")
+
+    def _run(self) -> None:
+        connection = connect(self.path)
+        try:
+            while True:
+                stopping = self._stop.wait(self.flush_interval)
+                rows = self._drain()
+                while rows:
+                    self._write(connection, rows)
+                    rows = self._drain() if len(rows) == self.batch_size else []
+                if stopping:
+                    break
+        finally:
+            connection.close()
+        if self.dropped:
+            self.logger.info(f"Telemetry dropped {self.dropped} rows")
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """
+    Open a telemetry file in WAL mode, readers such as the query CLI do not block the writer
+    :param path: SQLite file, created with the schema if missing
+    :return: connection
+    """
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # a crash loses the last transactions, never corrupts
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# One row per game with its event counts, ended_at falls back to the last tick of games cut off by a crash
+GAME_SUMMARY = f"""
+SELECT g.game_id, g.bot, datetime(g.started_at, 'unixepoch', 'localtime') AS started,
+       date(g.started_at, 'unixepoch', 'localtime') AS day, g.result,
+       round(coalesce(g.ended_at - g.started_at, (SELECT max(t) FROM ticks WHERE game_id = g.game_id)), 1) AS seconds,
+       (SELECT count(*) FROM events WHERE game_id = g.game_id AND kind = '{DEATH}') AS deaths,
+       (SELECT count(*) FROM events WHERE game_id = g.game_id AND kind = '{PURCHASE}') AS purchases,
+       (SELECT round(min(t), 1) FROM events WHERE game_id = g.game_id AND kind = '{ITEM}') AS first_item_seconds,
+       (SELECT count(*) FROM ticks WHERE game_id = g.game_id) AS ticks,
+       (SELECT round(avg(tick_ms), 2) FROM ticks WHERE game_id = g.game_id) AS mean_tick_ms,
+       (SELECT round(max(state_age_ms), 1) FROM ticks WHERE game_id = g.game_id) AS max_state_age_ms
+FROM games g
+"""
+
+
+def _rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
+
+
+def game_summaries(connection: sqlite3.Connection, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    :param connection: telemetry connection
+    :param limit: latest games returned
+    :return: one summary per game, latest first
+    """
+    return _rows(connection.execute(f"{GAME_SUMMARY} ORDER BY g.started_at DESC LIMIT ?", (limit,)))
+
+
+def day_summaries(connection: sqlite3.Connection, limit: int = 14) -> List[Dict[str, Any]]:
+    """
+    :param connection: telemetry connection
+    :param limit: latest days returned
+    :return: one summary per day with games, wins, averages and seconds spent per client phase, latest first
+    """
+    days = _rows(connection.execute(f"""
+        SELECT day, count(*) AS games, sum(result = 'Win') AS wins, round(avg(seconds), 1) AS mean_seconds,
+               round(avg(deaths), 2) AS mean_deaths, round(avg(first_item_seconds), 1) AS mean_first_item_seconds
+        FROM ({GAME_SUMMARY}) GROUP BY day ORDER BY day DESC LIMIT ?""", (limit,)))
+    phases: Dict[str, Dict[str, float]] = {}
+    for day, phase, seconds in connection.execute("""
+            SELECT date(started_at, 'unixepoch', 'localtime') AS day, phase, round(sum(seconds), 1)
+            FROM phases GROUP BY day, phase"""):
+        phases.setdefault(day, {})[phase] = seconds
+    known = {row["day"] for row in days}
+    days += [{"day": day, "games": 0} for day in phases if day not in known]  # days spent in queue only
+    days.sort(key=lambda row: row["day"], reverse=True)
+    return [dict(row, phase_seconds=phases.get(row["day"], {})) for row in days[:limit]]
+
+
+def game_curve(connection: sqlite3.Connection, game_id: str, bucket: float = 60.0) -> List[Dict[str, Any]]:
+    """
+    :param connection: telemetry connection
+    :param game_id: game to read, a unique prefix is enough
+    :param bucket: seconds of game time per row
+    :return: gold, hp fraction, level and deaths per bucket of game time
+    """
+    return _rows(connection.execute("""
+        SELECT CAST(t / :bucket AS INTEGER) * :bucket AS t, round(avg(gold)) AS gold, round(max(gold)) AS max_gold,
+               round(avg(current_hp / nullif(max_hp, 0)), 2) AS hp, max(level) AS level,
+               round(1 - avg(alive), 2) AS dead,
+               (SELECT count(*) FROM events e WHERE e.game_id = ticks.game_id AND e.kind = :death
+                AND CAST(e.t / :bucket AS INTEGER) = CAST(ticks.t / :bucket AS INTEGER)) AS deaths
+        FROM ticks WHERE game_id = (SELECT game_id FROM games WHERE game_id LIKE :game_id || '%' LIMIT 1)
+        GROUP BY CAST(t / :bucket AS INTEGER) ORDER BY t""", {"bucket": bucket, "game_id": game_id, "death": DEATH}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("games", "days", "curve"))
+    parser.add_argument("--db", type=Path, required=True, help="telemetry file, BotConfig.telemetry_path")
+    parser.add_argument("--limit", type=int, default=20, help="latest games or days shown")
+    parser.add_argument("--game", help="game id or id prefix for curve")
+    parser.add_argument("--bucket", type=float, default=60.0, help="seconds of game time per curve row")
+    args = parser.parse_args()
+    if not args.db.exists():
+        sys.exit(f"No telemetry at {args.db}")
+
+    connection = connect(args.db)
+    if args.command == "games":
+        result = game_summaries(connection, args.limit)
+    elif args.command == "days":
+        result = day_summaries(connection, args.limit)
+    else:
+        if not args.game:
+            latest = game_summaries(connection, 1)
+            args.game = latest[0]["game_id"] if latest else ""
+        result = game_curve(connection, args.game, args.bucket)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
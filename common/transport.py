@@ -0,0 +1,67 @@
+import fnmatch
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.metrics import endpoint_template
+
+logger = logging.getLogger(__name__)
+
+# Connect and read timeout in seconds
+Timeout = Tuple[float, float]
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Dataclass containing connection pool and timeout settings of a RequestAPI"""
+    pool_connections: int = 2  # hosts kept in the pool, one API talks to one host
+    pool_maxsize: int = 4  # keep-alive connections per host, covers concurrent champion select fetches
+    timeout: Timeout = (2.0, 10.0)
+    timeouts: Dict[str, Timeout] = field(default_factory=dict)  # fnmatch pattern of endpoint template to timeout
+
+    def timeout_for(self, url: str) -> Timeout:
+        """
+        Find the timeout of an endpoint, first matching pattern wins
+        :param url: requested url
+        :return: connect and read timeout
+        """
+        if self.timeouts:
+            template = endpoint_template(url)
+            for pattern, timeout in self.timeouts.items():
+                if fnmatch.fnmatchcase(template, pattern):
+                    return timeout
+        return self.timeout
+
+
+def create_session(config: TransportConfig) -> requests.Session:
+    """
+    Create a session with an explicitly sized keep-alive pool
+    :param config: transport settings
+    :return: requests.Session object
+    """
+    session = requests.Session()
+    # Retries are done by RequestAPI's retry policy, not by urllib3
+    adapter = HTTPAdapter(pool_connections=config.pool_connections, pool_maxsize=config.pool_maxsize,
+                          max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def warm_up(session: requests.Session, url: str, timeout: Timeout) -> bool:
+    """
+    Open a pooled keep-alive connection, paying TCP and TLS setup before the first real request
+    :param session: session whose pool keeps the connection
+    :param url: full url to request, any response counts
+    :param timeout: connect and read timeout
+    :return: True if a connection was opened, False if server is not listening yet
+    """
+    try:
+        session.get(url, timeout=timeout, verify=False)  # body is read, so the connection goes back to the pool
+        return True
+    except requests.RequestException as err:
+        logger.debug(f"Warm up of {url} failed {err}")
+        return False
@@ -1,12 +1,17 @@
 import logging
 import shlex
 import subprocess
-import time
-from typing import Callable
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
 
 import psutil
 
+from common import clock
+from common.process_tracker import ProcessTracker
+
 logger = logging.getLogger(__name__)
+_process_trackers: Dict[Tuple[str, Optional[Path]], ProcessTracker] = {}
+_process_overrides: Dict[str, ProcessTracker] = {}
 
 
 def wait_for_condition(condition_callback: Callable[[], bool], timeout: int = 300, delay: int = 10) -> bool:
@@ -17,28 +22,53 @@ def wait_for_condition(condition_callback: Callable[[], bool], timeout: int = 30
     :param delay: time to wait between retries
     :return: True if condition met in given timeout, False otherwise
     """
-    start = time.time()
-    while time.time() < start + timeout:
+    start = clock.monotonic()
+    while clock.monotonic() < start + timeout:
         if condition_callback():
             logger.info("Condition met")
             return True
-        time.sleep(delay)
+        clock.sleep(delay)
     logger.info("Failed to meet condition in given time")
     return False
 
 
+def get_process_tracker(process_name: str, install_path: Optional[Path] = None) -> ProcessTracker:
+    """
+    Get the shared tracker of a process, created on first use
+    :param process_name: name of said process
+    :param install_path: directory the executable is in, any process of that name if None
+    :return: ProcessTracker object
+    """
+    if process_name in _process_overrides:
+        return _process_overrides[process_name]
+    key = (process_name, install_path)
+    if key not in _process_trackers:
+        _process_trackers[key] = ProcessTracker(process_name, install_path=install_path)
+    return _process_trackers[key]
+
+
+def set_process_tracker(process_name: str, tracker: Optional[ProcessTracker]) -> Optional[ProcessTracker]:
+    """
+    Replace the shared tracker of a process for every install path, e.g. with a simulated game process
+    :param process_name: name of said process
+    :param tracker: tracker to share, None to create real ones on next use
+    :return: tracker replaced, None if there was none
+    """
+    previous = _process_overrides.pop(process_name, None)
+    if tracker is not None:
+        _process_overrides[process_name] = tracker
+    return previous
+
+
 def is_process_running(process_name: str) -> bool:
     """
     Check if process is running
     :param process_name: name of said process
     :return: True if running, False otherwise
     """
-    for process in psutil.process_iter():
-        if process.name() == process_name:
-            logger.debug(f"Process {process_name} is running = True")
-            return True
-    logger.debug(f"Process {process_name} is running = False")
-    return False
+    running = get_process_tracker(process_name).is_running()
+    logger.debug(f"Process {process_name} is running = {running}")
+    return running
 
 
 def run_process(process_name: str, args: str, shell: bool = False, capture_output: bool = False) -> psutil.Process:
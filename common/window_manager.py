@@ -1,48 +1,231 @@
 import logging
-from time import sleep
-from typing import Tuple, Callable
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Tuple, Callable, Dict, Deque, Optional, List, Any, TYPE_CHECKING
 
-import keyboard
-import mouse
-import pyautogui
-from win32gui import FindWindow, GetWindowRect, SetForegroundWindow
+from common import clock
+from common.constants import MapLocationRatios
+from common.input_backends import InputBackend, Win32Backend
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(frozen=True)
+class WindowState:
+    """Cached window handle and geometry with precomputed screen coordinates of every MapLocationRatios entry"""
+    handle: int
+    rect: Tuple[int, int, int, int]
+    locations: Dict[MapLocationRatios, Tuple[int, int]] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "locations", {location: self.point(location.value) for location in MapLocationRatios})
+
+    @property
+    def x(self) -> int:
+        return self.rect[0]
+
+    @property
+    def y(self) -> int:
+        return self.rect[1]
+
+    @property
+    def width(self) -> int:
+        return self.rect[2] - self.rect[0]
+
+    @property
+    def height(self) -> int:
+        return self.rect[3] - self.rect[1]
+
+    def point(self, ratio: Tuple[float, float]) -> Tuple[int, int]:
+        """
+        Calculate screen coordinates of a point in the window
+        :param ratio: fraction of window width and height
+        :return: x, y screen coordinates
+        """
+        return int(self.width * ratio[0] + self.x), int(self.height * ratio[1] + self.y)
+
+    def region(self, ratios: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+        """
+        Calculate screen coordinates of a region of the window
+        :param ratios: fractions of window size as left, top, right, bottom
+        :return: left, top, right, bottom screen coordinates
+        """
+        return self.point(ratios[:2]) + self.point(ratios[2:])
+
+
+def timed_input(method: Callable) -> Callable:
+    """Records how long an input method took, including focusing the window"""
+    @wraps(method)
+    def wrapper(self: "WindowManager", *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            latency = time.perf_counter() - start
+            self.input_latencies.append(latency)
+            self.logger.debug(f"{method.__name__} took {latency * 1000:.1f} ms")
+    return wrapper
+
+
+class InputMacro:
+    """Ordered sequence of input ops played back by WindowManager.run_macro under one foreground acquisition"""
+
+    def __init__(self):
+        self.ops: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    def key(self, key: str) -> "InputMacro":
+        """Press and release a key or chord such as ctrl+l"""
+        self.ops.append(("key", (key,)))
+        return self
+
+    def hold(self, key: str) -> "InputMacro":
+        """Press a key without releasing it"""
+        self.ops.append(("hold", (key,)))
+        return self
+
+    def release(self, key: str) -> "InputMacro":
+        """Release a held key"""
+        self.ops.append(("release", (key,)))
+        return self
+
+    def text(self, text: str) -> "InputMacro":
+        """Type text"""
+        self.ops.append(("text", (text,)))
+        return self
+
+    def right_click(self, ratio: Tuple[float, float]) -> "InputMacro":
+        """Right click at a ratio of the window"""
+        self.ops.append(("right_click", (ratio,)))
+        return self
+
+    def left_click(self, ratio: Tuple[float, float]) -> "InputMacro":
+        """Left click at a ratio of the window"""
+        self.ops.append(("left_click", (ratio,)))
+        return self
+
+    def wait(self, seconds: float) -> "InputMacro":
+        """Pause playback, for actions the game needs time for"""
+        self.ops.append(("wait", (seconds,)))
+        return self
 
 
 class WindowManager:
     """Base Class to manage a Window"""
 
-    def __init__(self, window_name: str):
+    def __init__(self, window_name: str, backend: Optional[InputBackend] = None, settle_delay: float = 0.5,
+                 max_state_age: float = 5.0, macro_interval: float = 0.03, typing_delay: float = 0.0,
+                 pid: Optional[Callable[[], Optional[int]]] = None):
+        """
+        :param window_name: title of window to manage
+        :param backend: platform backend sending the input, Win32Backend if None
+        :param settle_delay: time to wait after bringing window to foreground
+        :param max_state_age: seconds after which cached geometry is checked against the window again
+        :param macro_interval: time between ops of a macro
+        :param typing_delay: time between characters when typing text
+        :param pid: returns pid of the process owning the window, window is found by title only if None or it
+            returns None
+        """
         self.window_name = window_name
+        self.pid = pid
         self.logger = logging.getLogger(__name__)
-        self.handle = None
-        self.x = None
-        self.y = None
-        self.width = None
-        self.height = None
+        self.backend = backend or Win32Backend()
+        self.macro_interval = macro_interval
+        self.typing_delay = typing_delay
+        self.settle_delay = settle_delay
+        self.max_state_age = max_state_age
+        self.state: Optional[WindowState] = None
+        self.input_latencies: Deque[float] = deque(maxlen=256)
+        self._state_checked_at = 0.0
+
+    @property
+    def handle(self) -> Optional[int]:
+        return self.state.handle if self.state else None
+
+    @property
+    def x(self) -> Optional[int]:
+        return self.state.x if self.state else None
+
+    @property
+    def y(self) -> Optional[int]:
+        return self.state.y if self.state else None
+
+    @property
+    def width(self) -> Optional[int]:
+        return self.state.width if self.state else None
+
+    @property
+    def height(self) -> Optional[int]:
+        return self.state.height if self.state else None
 
     def configure(self) -> None:
         """Get necessary window parameters and set attributes accordingly"""
         self.logger.debug(f"Configuring WindowClicker for {self.window_name}")
-        self.handle = FindWindow(None, self.window_name)
-        window_rect = GetWindowRect(self.handle)
-        self.x = window_rect[0]
-        self.y = window_rect[1]
-        self.width = window_rect[2] - self.x
-        self.height = window_rect[3] - self.y
+        handle = self.backend.find_window(self.window_name, pid=self.pid() if self.pid else None)
+        self.state = WindowState(handle=handle, rect=self.backend.get_window_rect(handle))
+        self._state_checked_at = clock.monotonic()
+
+    def _check_geometry(self) -> None:
+        """Rebuild cached coordinates if the window moved or resized since last check"""
+        if clock.monotonic() - self._state_checked_at < self.max_state_age:
+            return
+        rect = self.backend.get_window_rect(self.state.handle)
+        if rect != self.state.rect:
+            self.logger.debug(f"Window {self.window_name} moved to {rect}")
+            self.state = WindowState(handle=self.state.handle, rect=rect)
+        self._state_checked_at = clock.monotonic()
 
     def set_foreground(self) -> bool:
         """
-        Sets the window as foreground
+        Sets the window as foreground. Skips focusing and settle delay if window is already in foreground
         :return: True if succeeded, False otherwise
         """
         try:
+            if self.state and self.backend.is_window(self.state.handle) \
+                    and self.backend.get_foreground_window() == self.state.handle:
+                self._check_geometry()
+                return True
             self.configure()
-            SetForegroundWindow(self.handle)
-            sleep(0.5)  # Might click too fast on wrong screen otherwise
+            self.backend.set_foreground_window(self.state.handle)
+            clock.sleep(self.settle_delay)  # Might click too fast on wrong screen otherwise
             return True
         except Exception:
             return False
 
+    def point(self, ratio: Tuple[float, float]) -> Tuple[int, int]:
+        """
+        Get screen coordinates of a ratio, precomputed for MapLocationRatios entries
+        :param ratio: fraction of window width and height
+        :return: x, y screen coordinates
+        """
+        try:
+            return self.state.locations[MapLocationRatios(ratio)]
+        except ValueError:
+            return self.state.point(ratio)
+
+    def grab(self, ratios: Tuple[float, float, float, float]) -> Optional["np.ndarray"]:
+        """
+        Screenshot a region of the window, e.g. ScreenRegionRatios.MINIMAP, without focusing it
+        :param ratios: fractions of window size as left, top, right, bottom
+        :return: height x width x 3 RGB uint8 array, None if window could not be found
+        """
+        try:
+            if self.state and self.backend.is_window(self.state.handle):
+                self._check_geometry()
+            else:
+                self.configure()
+            return self.backend.screenshot(self.state.region(ratios))
+        except Exception:
+            return None
+
+    def _click(self, ratio: Tuple[float, float], button: str) -> None:
+        x, y = self.point(ratio)
+        self.backend.move_to(x=x, y=y)
+        self.backend.click(button)
+
+    @timed_input
     def right_click(self, ratio: Tuple[float, float]) -> None:
         """
         Right click on window
@@ -50,9 +233,9 @@ class WindowManager:
         """
         if self.set_foreground():
             self.logger.debug(f"Right clicking {self.window_name} on ratio {ratio}")
-            pyautogui.moveTo(x=self.width * ratio[0] + self.x, y=self.height * ratio[1] + self.y)
-            mouse.right_click()
+            self._click(ratio, "right")
 
+    @timed_input
     def left_click(self, ratio: Tuple[float, float]) -> None:
         """
         Right click on window
@@ -60,9 +243,9 @@ class WindowManager:
         """
         if self.set_foreground():
             self.logger.debug(f"Left clicking {self.window_name} on ratio {ratio}")
-            pyautogui.moveTo(x=self.width * ratio[0] + self.x, y=self.height * ratio[1] + self.y)
-            mouse.click()
+            self._click(ratio, "left")
 
+    @timed_input
     def press_key(self, key: str) -> None:
         """
         Press a keyboard key once and release it
@@ -70,8 +253,9 @@ class WindowManager:
         """
         if self.set_foreground():
             self.logger.debug(f"Pressing and releasing key {key} on window {self.window_name}")
-            keyboard.press_and_release(key)
+            self.backend.press_and_release(key)
 
+    @timed_input
     def hold_key(self, key: str) -> None:
         """
         Hold a key indefinitely
@@ -79,9 +263,10 @@ class WindowManager:
         """
         if self.set_foreground():
             self.logger.debug(f"Holding key {key} on window {self.window_name}")
-            if not keyboard.is_pressed(key):
-                keyboard.press(key)
+            if not self.backend.is_pressed(key):
+                self.backend.press(key)
 
+    @timed_input
     def release(self, key: str) -> None:
         """
         Release a key you are holding
@@ -89,13 +274,46 @@ class WindowManager:
         """
         if self.set_foreground():
             self.logger.debug(f"Releasing key {key} on window {self.window_name}")
-            if keyboard.is_pressed(key):
-                keyboard.release(key)
+            if self.backend.is_pressed(key):
+                self.backend.release(key)
 
+    @timed_input
     def write(self, text: str) -> None:
         """
         Write text to window
         :param text:
         """
         if self.set_foreground():
-            keyboard.write(text)
+            self.backend.write(text, delay=self.typing_delay)
+
+    @timed_input
+    def run_macro(self, macro: InputMacro, interval: Optional[float] = None) -> bool:
+        """
+        Focus the window once and play back all ops of a macro
+        :param macro: ops to play back
+        :param interval: time between ops, macro_interval if None
+        :return: True if played back, False if window could not be focused
+        """
+        if not self.set_foreground():
+            return False
+        interval = self.macro_interval if interval is None else interval
+        self.logger.debug(f"Running macro of {len(macro.ops)} ops on window {self.window_name}")
+        for index, (op, args) in enumerate(macro.ops):
+            if index:
+                clock.sleep(interval)
+            if op == "key":
+                self.backend.press_and_release(*args)
+            elif op == "hold":
+                if not self.backend.is_pressed(*args):
+                    self.backend.press(*args)
+            elif op == "release":
+                self.backend.release(*args)
+            elif op == "text":
+                self.backend.write(*args, delay=self.typing_delay)
+            elif op == "right_click":
+                self._click(*args, button="right")
+            elif op == "left_click":
+                self._click(*args, button="left")
+            elif op == "wait":
+                clock.sleep(*args)
+        return True
@@ -9,11 +9,15 @@ class BotConfig:
     """Dataclass containing bot configuration"""
     # TODO Add .cfg file to bot data to alter behaviour from
     lol_base_path: Path = Path("C:\\Riot Games\\League of Legends")
-    lock_file_path: Path = lol_base_path / "lockfile"
-    game_cfg_path: Path = lol_base_path / "Config" / "game.cfg"
+    lock_file_path: Optional[Path] = None  # derived from lol_base_path if None
+    game_cfg_path: Optional[Path] = None  # derived from lol_base_path if None
     bot_data_path: Path = Path("C:\\ProgramData\\nunu-bot")
     bot_logs_dir_path: Path = bot_data_path / "logs"
     bot_logs_path: Path = bot_logs_dir_path / "bot-logs.log"
+    log_max_bytes: int = 10 * 1024 * 1024  # log file is gzipped and rotated at this size
+    log_backup_count: int = 5
+    log_json: bool = False  # write the log file as JSON lines
+    log_repeat_interval: float = 60.0  # identical messages are collapsed for this many seconds, 0 keeps all
     game_cfg_general: Dict[str, str] = field(
         default_factory=lambda: {"WindowMode": "1", "Height": "768", "Width": "1024"})
     game_cfg_hud: Dict[str, str] = field(default_factory=lambda: {"MinimapScale": "1.0000", "showalliedchat": "1",
@@ -21,6 +25,23 @@ class BotConfig:
     game_item_shop: Dict[str, str] = field(default_factory=lambda: {
         "NativeOffsetY": "-0.2096", "NativeOffsetX": "-0.2539", "CurrentTab": "0", "InvertDisplayOrder": "0",
         "InventoryPanelPinned": "0", "ConsumablesPanelPinned": "0", "BootsPanelPinned": "0"})
+    bot_name: str = "yuumi"  # bot to run, see bot.BOTS
+    input_backend: str = "win32"  # sends game input, see common.input_backends.INPUT_BACKENDS
+    live_client_port: str = "2999"
+    live_client_protocol: str = "https"  # http when pointed at a replay server without certificate
+    watch_lockfile: bool = True  # swap client credentials without restart when the client restarts
+    use_client_events: bool = True  # react to client WebSocket events instead of polling the phase
+    use_async_client: bool = False  # run client requests on one asyncio event loop with a shared pool
+    warm_up_live_client: bool = True  # open the Live Client API connection during the loading screen
+    live_client_snapshot_ttl: float = 0.25  # seconds one /allgamedata fetch is reused by in game reads
+    gameplay_tick_interval: float = 0.5  # pacing of gameplay loops, deferred actions run in between
+    state_poll_interval: Optional[float] = None  # refresh game state on a background thread, inline if None
+    minimap_vision: bool = False  # group up or retreat by champion icons on the minimap, see common.minimap
+    minimap_interval: float = 0.25  # seconds one minimap screenshot is reused
+    metrics_port: Optional[int] = None  # serve Prometheus metrics on localhost at this port, see common.metrics
+    capture_path: Optional[Path] = None  # record LCU and Live Client traffic to this gzip file, see common.capture
+    telemetry_path: Optional[Path] = None  # record per game ticks and events to this SQLite file, see common.telemetry
+    item_catalog_path: Optional[Path] = None  # Data Dragon item.json, bundled catalog of built items if None
     process_name: Optional[str] = None
     pid: Optional[str] = None
     port: Optional[str] = None
@@ -28,6 +49,13 @@ class BotConfig:
     protocol: Optional[str] = None
 
     def __post_init__(self):
+        self.lol_base_path = Path(self.lol_base_path)
+        self.lock_file_path = Path(self.lock_file_path or self.lol_base_path / "lockfile")
+        self.game_cfg_path = Path(self.game_cfg_path or self.lol_base_path / "Config" / "game.cfg")
+        self.bot_logs_path = Path(self.bot_logs_path)
+        self.capture_path = Path(self.capture_path) if self.capture_path else None
+        self.telemetry_path = Path(self.telemetry_path) if self.telemetry_path else None
+        self.item_catalog_path = Path(self.item_catalog_path) if self.item_catalog_path else None
         self._update_game_cfg()
         self._update_details_from_lockfile()
 
@@ -35,9 +63,11 @@ class BotConfig:
         """Updates game cfg file to desired values"""
         config = configparser.ConfigParser()
         config.read(self.game_cfg_path)
-        config["General"].update(self.game_cfg_general)
-        config["HUD"].update(self.game_cfg_hud)
-        config["ItemShop"].update(self.game_item_shop)
+        for section, values in (("General", self.game_cfg_general), ("HUD", self.game_cfg_hud),
+                                ("ItemShop", self.game_item_shop)):
+            if not config.has_section(section):  # e.g. a stub cfg of a replay or a fresh install
+                config.add_section(section)
+            config[section].update(values)
 
         with open(self.game_cfg_path, "w") as configfile:
             config.write(configfile)
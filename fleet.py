@@ -0,0 +1,193 @@
+"""
+Runs one bot process per League client install and restarts crashed workers.
+
+Example fleet.cfg, one section per worker. Keys are BotConfig fields:
+
+    [worker-1]
+    bot_name = yuumi
+    lol_base_path = C:\\Riot Games\\League of Legends
+    live_client_port = 2999
+    metrics_port = 9464
+    bot_logs_path = C:\\ProgramData\\nunu-bot\\logs\\worker-1.log
+
+Every worker tracks the game process started from the install its lockfile is in and sends input to the
+window of that process, so workers on one machine never act on each other's game.
+
+Run with: py .\\fleet.py fleet.cfg
+"""
+import argparse
+import configparser
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any, List, Optional
+
+from common.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Worker:
+    """Dataclass containing a worker process and its supervision state"""
+    name: str
+    settings: Dict[str, Any]
+    process: Optional[multiprocessing.Process] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    restart_at: float = 0.0
+    health: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_fleet_config(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read per worker BotConfig settings
+    :param path: fleet cfg file
+    :return: worker name to BotConfig keyword arguments
+    """
+    from config import BotConfig
+    types = {config_field.name: config_field.type for config_field in fields(BotConfig)}
+    parser = configparser.ConfigParser()
+    parser.optionxform = str  # keep field names case
+    parser.read(path)
+    workers = {}
+    for section in parser.sections():
+        settings = {}
+        for key, value in parser[section].items():
+            if key not in types:
+                raise KeyError(f"Unknown BotConfig field {key} in [{section}]")
+            if types[key] in (bool, "bool"):
+                settings[key] = parser[section].getboolean(key)
+            elif types[key] in (float, "float"):
+                settings[key] = float(value)
+            elif types[key] in (int, "int"):
+                settings[key] = int(value)
+            elif types[key] in (Optional[int], "Optional[int]"):
+                settings[key] = int(value)
+            elif types[key] in (Optional[float], "Optional[float]"):
+                settings[key] = float(value)
+            else:
+                settings[key] = value
+        workers[section] = settings
+    return workers
+
+
+def run_worker(name: str, settings: Dict[str, Any], health_queue: multiprocessing.Queue,
+               report_interval: float = 10) -> None:
+    """
+    Entry point of a worker process
+    :param name: worker name
+    :param settings: BotConfig keyword arguments
+    :param health_queue: queue to report health to the supervisor
+    :param report_interval: seconds between health reports
+    """
+    from bot import load_bot
+    from config import BotConfig
+
+    config = BotConfig(**settings)
+    configure_logger(config.bot_logs_path, max_bytes=config.log_max_bytes, backup_count=config.log_backup_count,
+                     json_format=config.log_json, repeat_interval=config.log_repeat_interval)
+    bot = load_bot(config.bot_name)(config=config)
+
+    def report():
+        while True:
+            health_queue.put((name, bot.health()))
+            time.sleep(report_interval)
+
+    threading.Thread(target=report, daemon=True, name="health").start()
+    bot.main_loop()
+
+
+class FleetSupervisor:
+    """Starts a process per worker, restarts crashed ones with backoff and collects their health"""
+
+    def __init__(self, workers: Dict[str, Dict[str, Any]], initial_backoff: float = 5, max_backoff: float = 300,
+                 stable_after: float = 600):
+        """
+        :param workers: worker name to BotConfig keyword arguments
+        :param initial_backoff: delay before first restart, doubles every restart
+        :param max_backoff: maximum restart delay
+        :param stable_after: seconds a worker must run to reset its backoff
+        """
+        self.workers = {name: Worker(name=name, settings=settings) for name, settings in workers.items()}
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self._context = multiprocessing.get_context("spawn")
+        self.health_queue = self._context.Queue()
+
+    def start_worker(self, worker: Worker) -> None:
+        logger.info(f"Starting worker {worker.name}")
+        worker.process = self._context.Process(target=run_worker, args=(worker.name, worker.settings,
+                                                                        self.health_queue),
+                                               name=worker.name, daemon=True)
+        worker.process.start()
+        worker.started_at = time.monotonic()
+
+    def check_workers(self) -> None:
+        """Schedule restarts of exited workers and start the ones that are due"""
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker.process is None:
+                if now >= worker.restart_at:
+                    self.start_worker(worker)
+                continue
+            if worker.process.is_alive():
+                continue
+            if now - worker.started_at >= self.stable_after:
+                worker.restarts = 0
+            backoff = min(self.initial_backoff * 2 ** worker.restarts, self.max_backoff)
+            logger.info(f"Worker {worker.name} exited with {worker.process.exitcode}. Restarting in {backoff} s")
+            worker.restarts += 1
+            worker.restart_at = now + backoff
+            worker.process = None
+
+    def collect_health(self, timeout: float) -> None:
+        """
+        Store health reports sent by workers
+        :param timeout: time to wait for the first report
+        """
+        try:
+            while True:
+                name, health = self.health_queue.get(timeout=timeout)
+                self.workers[name].health = health
+                timeout = 0
+        except queue.Empty:
+            pass
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Health of every worker
+        :return: list of per worker dicts
+        """
+        return [{"worker": worker.name, "alive": bool(worker.process and worker.process.is_alive()),
+                 "restarts": worker.restarts, **worker.health} for worker in self.workers.values()]
+
+    def run(self, summary_interval: float = 60) -> None:
+        """
+        Supervise workers forever
+        :param summary_interval: seconds between health summaries in log
+        """
+        last_summary = time.monotonic()
+        while True:
+            self.check_workers()
+            self.collect_health(timeout=1)
+            if time.monotonic() - last_summary >= summary_interval:
+                for worker in self.summary():
+                    logger.info(f"Fleet health {worker}")
+                last_summary = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a bot per League client install")
+    parser.add_argument("fleet_config", help="cfg file with one section per worker")
+    args = parser.parse_args()
+    configure_logger()
+    FleetSupervisor(load_fleet_config(args.fleet_config)).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,21 @@
-from bot.disco_nunu import DiscoNunu
-from bot.yuumi import YuumiBot
+import argparse
+
+from bot import BOTS, load_bot
+from common.input_backends import INPUT_BACKENDS
 from common.logger import configure_logger
+from config import BotConfig
 
 
 def main():
-    configure_logger()
-    bot = YuumiBot()
-    # bot = DiscoNunu() if you want Nunu
+    parser = argparse.ArgumentParser(description="Run a bot on the local League client")
+    parser.add_argument("--bot", choices=list(BOTS), default=BotConfig.bot_name, help="bot to run")
+    parser.add_argument("--input-backend", choices=list(INPUT_BACKENDS), default=BotConfig.input_backend,
+                        help="noop runs the bot without sending game input")
+    args = parser.parse_args()
+    config = BotConfig(bot_name=args.bot, input_backend=args.input_backend)
+    configure_logger(config.bot_logs_path, max_bytes=config.log_max_bytes, backup_count=config.log_backup_count,
+                     json_format=config.log_json, repeat_interval=config.log_repeat_interval)
+    bot = load_bot(config.bot_name)(config=config)  # only the chosen bot's module is imported
     bot.main_loop()
 
 